@@ -1,41 +1,450 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pathlib import Path
-import shutil
+from typing import BinaryIO, List, Optional, Union
+import asyncio
+import hashlib
 import tempfile
-from app.services.controller import run_interpretation_workflow
-from app.services.workflow.editor import update_interpretation, finalize_interpretation
-from app.services.workflow.billing import trigger_cpt_95251
-from app.config.loader import Config
+import zipfile
+from app.services.controller import run_interpretation_workflow, stream_interpretation_workflow
+from app.services.cgm_processing.loader import CGMIngestLimitError, load_cgm_file, is_supported_upload
+from app.services.cgm_processing.recommender import generate_recommendations
+from app.services.cgm_processing.summarizer import summary_view, event_page, SUMMARY_VIEWS, EVENT_LISTS
+from app.services.cgm_processing.rolling import get_rolling_registry
+from app.services.cgm_processing.agp import agp_report, DEFAULT_BIN_MINUTES
+from app.services.cgm_processing.rollups import (
+    get_rollup_store, record_daily_rollups, range_metrics, compare_periods
+)
+from app.services.workflow.editor import (
+    update_interpretation, finalize_interpretation, load_interpretation, list_interpretations
+)
+from app.services.workflow.billing import trigger_cpt_95251, get_billing_ledger
+from app.services.workflow.dedup import get_interpret_coalescer, upload_key
+from app.services.workflow.jobs import get_job_queue, spool_path, JobQueueFullError
+from app.services.workflow.batch import run_batch_interpretation, extract_archive
+from app.services.workflow.concurrency import ServerBusyError, get_in_flight_limiter, run_cpu_on_upload
+from app.api.responses import select_fields
+from app.config.loader import get_config
+from app.utils import jsonio
+from app.utils.json_stream import PayloadTooLargeError
 
 router = APIRouter()
-config = Config()
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UNSUPPORTED_UPLOAD_DETAIL = "Only .json, .csv and .gz (gzipped JSON or CSV) files are supported."
+VIEW_DETAIL = f"view must be one of: {', '.join(SUMMARY_VIEWS)}"
+
+
+def _busy(error: Exception) -> HTTPException:
+    retry_after = get_config().concurrency_retry_after_seconds
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(retry_after)})
+
+
+def _write_upload(source: BinaryIO, path: Path) -> None:
+    with open(path, "wb") as out:
+        for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+            out.write(chunk)
+
+
+def _upload_digest(source: BinaryIO) -> str:
+    """sha256 of an upload, leaving it rewound for parsing."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def _agp_from_upload(
+    source: Union[Path, BinaryIO],
+    bin_minutes: int,
+    timezone: Optional[str],
+    include_overlay: bool
+) -> dict:
+    """Runs on the CPU pool."""
+    return agp_report(load_cgm_file(source), bin_minutes, timezone, include_overlay)
+
+
+def _shape(result: dict, view: str, fields: Optional[str]) -> dict:
+    """Applies the summary view and field selection without touching `result`."""
+    if "summary" in result:
+        result = dict(result, summary=summary_view(result["summary"], view))
+    return select_fields(result, fields)
+
 
 @router.post("/interpret")
 async def interpret_cgm_data(
     patient_id: str = Form(...),
     provider_id: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    include_events: bool = Form(False),
+    extended_metrics: bool = Form(False),
+    include_agp: bool = Form(False),
+    view: str = Form("full"),
+    fields: Optional[str] = Form(None)
 ):
     """
-    Uploads a CGM JSON file, runs the full interpretation pipeline,
+    Uploads a CGM export (JSON, Dexcom Clarity or Libre CSV, optionally
+    gzipped), runs the full interpretation pipeline,
     and returns the editable report with interpretation_id.
-    """
-    if not file.filename.endswith(".json"):
-        raise HTTPException(status_code=400, detail="Only .json files are supported.")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = Path(tmp.name)
+    Excursions are summarized as episodes; set include_events to also get
+    (and store) one entry per out-of-range reading. extended_metrics adds
+    MAGE, CONGA, MODD, LBGI/HBGI, ADRR and GRI to the summary and
+    include_agp the hourly AGP percentile bands (see /agp for finer bins).
 
-    try:
-        result = run_interpretation_workflow(
+    The full summary is always stored; `view` (metrics, summary or full)
+    and `fields` (comma-separated, dotted for nested keys) only trim the
+    response. Event lists left out can be paged from
+    /interpretations/{id}/events.
+
+    Identical uploads for the same patient and provider share one pipeline run while in
+    flight and replay its result for a short while afterwards. Beyond
+    concurrency.max_in_flight uploads being parsed at once the request
+    gets 429; the LLM call does not hold a slot.
+    """
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_UPLOAD_DETAIL)
+    if view not in SUMMARY_VIEWS:
+        raise HTTPException(status_code=400, detail=VIEW_DETAIL)
+
+    def run():
+        return run_interpretation_workflow(
             patient_id=patient_id,
             provider_id=provider_id,
-            file_path=tmp_path
+            file_path=file.file,
+            include_events=include_events,
+            extended_metrics=extended_metrics,
+            limiter=get_in_flight_limiter(),
+            include_agp=include_agp
         )
-        return result
+
+    try:
+        coalescer = get_interpret_coalescer()
+        if coalescer is None:
+            result = await run()
+        else:
+            # The upload is parsed straight from its spooled file, so hash it first
+            digest = await asyncio.to_thread(_upload_digest, file.file)
+            # Shared with coalesced callers, so shaped per request below
+            result = await coalescer.run(
+                upload_key(
+                    patient_id, provider_id, digest,
+                    include_events=include_events, extended_metrics=extended_metrics, include_agp=include_agp
+                ),
+                run
+            )
+    except ServerBusyError as e:
+        raise _busy(e)
+    except CGMIngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _shape(result, view, fields)
+
+
+@router.post("/agp")
+async def ambulatory_glucose_profile(
+    file: UploadFile = File(...),
+    bin_minutes: int = Form(DEFAULT_BIN_MINUTES),
+    timezone: Optional[str] = Form(None),
+    include_overlay: bool = Form(False)
+):
+    """
+    AGP report for a CGM export: 5/25/50/75/95th percentile bands by
+    time of day, per-day stats and optionally the daily overlay. `timezone`
+    is an IANA zone name; by default the file's own UTC offset is used.
+    """
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_UPLOAD_DETAIL)
+
+    try:
+        with get_in_flight_limiter().slot():
+            return await run_cpu_on_upload(_agp_from_upload, file.file, bin_minutes, timezone, include_overlay)
+    except ServerBusyError as e:
+        raise _busy(e)
+    except CGMIngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {jsonio.dumps_text(event['data'])}\n\n"
+
+
+@router.post("/interpret/stream")
+async def stream_cgm_interpretation(
+    patient_id: str = Form(...),
+    provider_id: str = Form(...),
+    file: UploadFile = File(...),
+    include_events: bool = Form(False),
+    extended_metrics: bool = Form(False),
+    include_agp: bool = Form(False),
+    view: str = Form("full")
+):
+    """
+    Server-sent-events variant of /interpret: emits the summary and
+    recommendations first, then LLM text as it is generated, then the
+    saved interpretation_id. `view` trims the summary event as for /interpret.
+    """
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_UPLOAD_DETAIL)
+    if view not in SUMMARY_VIEWS:
+        raise HTTPException(status_code=400, detail=VIEW_DETAIL)
+
+    events = stream_interpretation_workflow(
+        patient_id=patient_id,
+        provider_id=provider_id,
+        file_path=file.file,
+        include_events=include_events,
+        extended_metrics=extended_metrics,
+        include_agp=include_agp
+    )
+    # Parse and summarize before committing to a 200 so upload errors keep their
+    # status codes; the upload is fully read by then, before the request closes it.
+    # The in-flight slot covers only this part, not the LLM stream.
+    try:
+        with get_in_flight_limiter().slot():
+            first = await events.__anext__()
+    except ServerBusyError as e:
+        await events.aclose()
+        raise _busy(e)
+    except CGMIngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        try:
+            yield _sse({"event": first["event"], "data": _shape(first["data"], view, None)})
+            async for event in events:
+                yield _sse(event)
+        except Exception as e:
+            yield _sse({"event": "error", "data": {"detail": str(e)}})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/interpret/jobs", status_code=202)
+async def submit_interpretation_job(
+    patient_id: str = Form(...),
+    provider_id: str = Form(...),
+    file: UploadFile = File(...)
+):
+    """
+    Stores the upload and queues the interpretation pipeline on the
+    background worker pool. Poll /jobs/{job_id} for stage and result.
+    """
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_UPLOAD_DETAIL)
+
+    upload_path = spool_path(Path(file.filename).suffix)
+    await asyncio.to_thread(_write_upload, file.file, upload_path)
+
+    try:
+        job_id = get_job_queue().submit(patient_id, provider_id, upload_path)
+    except JobQueueFullError as e:
+        upload_path.unlink(missing_ok=True)
+        raise _busy(e)
+
+    return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_interpretation_job(job_id: str):
+    """
+    Reports a queued interpretation's status, current stage and, once
+    saved, the same payload /interpret returns.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@router.post("/interpret/batch")
+async def interpret_cgm_batch(
+    files: List[UploadFile] = File(...),
+    provider_id: Optional[str] = Form(None),
+    mapping: Optional[str] = Form(None)
+):
+    """
+    Interprets many patients in one request. Accepts CGM exports
+    (.json/.csv/.gz) and/or .zip archives of them. `mapping` is a JSON
+    object from file name to {"patient_id", "provider_id"} (or just a
+    patient_id string); unmapped files use their file name stem as
+    patient_id and the form provider_id.
+    Returns one result or error per file. The whole batch takes one
+    in-flight slot.
+    """
+    try:
+        file_map = jsonio.loads(mapping) if mapping else {}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid mapping JSON: {e}")
+    if not isinstance(file_map, dict):
+        raise HTTPException(status_code=400, detail="mapping must be a JSON object keyed by file name.")
+    for name, entry in file_map.items():
+        if not isinstance(entry, (dict, str)):
+            raise HTTPException(
+                status_code=400,
+                detail=f"mapping[{name!r}] must be a patient_id string or a {{patient_id, provider_id}} object."
+            )
+
+    limiter = get_in_flight_limiter()
+    try:
+        limiter.acquire()
+    except ServerBusyError as e:
+        raise _busy(e)
+
+    try:
+        return await _interpret_batch(files, provider_id, file_map)
     finally:
-        tmp_path.unlink(missing_ok=True)
+        limiter.release()
+
+
+async def _interpret_batch(files: List[UploadFile], provider_id: Optional[str], file_map: dict) -> dict:
+    with tempfile.TemporaryDirectory(prefix="cgm-batch-") as tmp_dir:
+        tmp_root = Path(tmp_dir)
+        uploads = []
+        max_files = get_config().batch_max_files
+        if len(files) > max_files:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {max_files} files.")
+        for index, upload in enumerate(files):
+            name = Path(upload.filename or f"upload_{index}.json").name
+            if not (is_supported_upload(name) or name.endswith(".zip")):
+                raise HTTPException(
+                    status_code=400, detail=f"{name}: only .json, .csv, .gz and .zip files are supported."
+                )
+            path = tmp_root / f"upload_{index}_{name}"
+            await asyncio.to_thread(_write_upload, upload.file, path)
+            if name.endswith(".zip"):
+                try:
+                    uploads.extend(await asyncio.to_thread(
+                        extract_archive, path, tmp_root, max_files - len(uploads)
+                    ))
+                except PayloadTooLargeError:
+                    raise HTTPException(status_code=413, detail=f"Batch exceeds {max_files} files.")
+                except (ValueError, zipfile.BadZipFile) as e:
+                    raise HTTPException(status_code=400, detail=f"{name}: {e}")
+            else:
+                uploads.append((name, path))
+
+        if len(uploads) > max_files:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {max_files} files.")
+
+        items = []
+        for name, path in uploads:
+            entry = file_map.get(name, {})
+            if isinstance(entry, str):
+                entry = {"patient_id": entry}
+            item_provider = entry.get("provider_id") or provider_id
+            if not item_provider:
+                raise HTTPException(status_code=400, detail=f"{name}: no provider_id given.")
+            items.append({
+                "filename": name,
+                "path": path,
+                "patient_id": entry.get("patient_id") or Path(name.removesuffix(".gz")).stem,
+                "provider_id": item_provider
+            })
+
+        results = await run_batch_interpretation(items)
+
+    return {
+        "results": results,
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error")
+    }
+
+
+@router.post("/patients/{patient_id}/readings")
+async def append_patient_readings(patient_id: str, file: UploadFile = File(...)):
+    """
+    Appends newly collected readings (same formats as /interpret) to
+    the patient's rolling summary. Overlapping pushes are deduplicated by
+    timestamp; readings outside the rolling window expire.
+    """
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_UPLOAD_DETAIL)
+
+    try:
+        with get_in_flight_limiter().slot():
+            readings = await run_cpu_on_upload(load_cgm_file, file.file)
+            added, state = await asyncio.to_thread(get_rolling_registry().append, patient_id, readings)
+            await asyncio.to_thread(record_daily_rollups, patient_id, readings)
+    except ServerBusyError as e:
+        raise _busy(e)
+    except CGMIngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"patient_id": patient_id, "added": added, "window_readings": len(state)}
+
+
+@router.get("/patients/{patient_id}/summary")
+async def get_patient_summary(patient_id: str):
+    """
+    Current summary and recommendations over the patient's rolling window,
+    without re-processing the full history.
+    """
+    state = get_rolling_registry().get(patient_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No readings for patient: {patient_id}")
+
+    def summarize():
+        with state.lock:
+            return state.summary()
+
+    try:
+        summary = await asyncio.to_thread(summarize)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "patient_id": patient_id,
+        "summary": summary,
+        "recommendations": generate_recommendations(summary["recommendation_context"])
+    }
+
+
+ISO_DAY = r"^\d{4}-\d{2}-\d{2}$"
+
+
+@router.get("/patients/{patient_id}/metrics")
+async def get_patient_range_metrics(
+    patient_id: str,
+    start: Optional[str] = Query(None, pattern=ISO_DAY),
+    end: Optional[str] = Query(None, pattern=ISO_DAY)
+):
+    """
+    CGM metrics for any inclusive day range (local dates), merged from
+    stored per-day rollups instead of re-processing raw readings.
+    """
+    result = await asyncio.to_thread(range_metrics, get_rollup_store(), patient_id, start, end)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No CGM data for patient {patient_id} in range.")
+    return {"patient_id": patient_id, **result}
+
+
+@router.get("/patients/{patient_id}/compare")
+async def compare_patient_periods(
+    patient_id: str,
+    days: int = Query(7, ge=1, le=366),
+    end: Optional[str] = Query(None, pattern=ISO_DAY)
+):
+    """
+    Compares the last `days` (ending at `end`, default the latest day with
+    data) against the `days` before, e.g. last 7 vs previous 7 days.
+    """
+    result = await asyncio.to_thread(compare_periods, get_rollup_store(), patient_id, days, end)
+    if result is None or result["current"] is None:
+        raise HTTPException(status_code=404, detail=f"No CGM data for patient {patient_id} in range.")
+    return {"patient_id": patient_id, "days": days, **result}
 
 
 @router.post("/edit/{interpretation_id}")
@@ -48,8 +457,10 @@ async def edit_interpretation(
     Updates the interpretation text if it hasn't been finalized.
     """
     try:
-        update_interpretation(interpretation_id, new_text, provider_id)
+        await asyncio.to_thread(update_interpretation, interpretation_id, new_text, provider_id)
         return {"message": "Interpretation updated successfully."}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -65,12 +476,14 @@ async def finalize_report(
     Locks the report and triggers CPT 95251 billing event if valid.
     """
     try:
-        finalized_data = finalize_interpretation(interpretation_id)
+        finalized_data = await asyncio.to_thread(finalize_interpretation, interpretation_id)
         if duration_days >= 3:
-            billing_id = trigger_cpt_95251(
+            billing_id = await asyncio.to_thread(
+                trigger_cpt_95251,
                 patient_id=patient_id,
                 provider_id=provider_id,
-                duration_days=duration_days
+                duration_days=duration_days,
+                interpretation_id=interpretation_id
             )
             return {
                 "message": "Report finalized and CPT 95251 triggered.",
@@ -78,5 +491,120 @@ async def finalize_report(
             }
         else:
             return {"message": "Report finalized (CPT not triggered due to short duration)."}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/billing/events")
+async def list_billing_events(
+    provider_id: Optional[str] = None,
+    patient_id: Optional[str] = None,
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    cpt_code: Optional[str] = None
+):
+    """
+    Billing events from the ledger, filtered by provider, patient,
+    month (YYYY-MM) and CPT code.
+    """
+    events = await asyncio.to_thread(
+        get_billing_ledger().query,
+        provider_id=provider_id, patient_id=patient_id, month=month, cpt_code=cpt_code
+    )
+    return {"events": events, "count": len(events)}
+
+
+@router.get("/billing/summary")
+async def summarize_billing(
+    by: str = "provider_id,month,cpt_code",
+    provider_id: Optional[str] = None,
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    cpt_code: Optional[str] = None
+):
+    """
+    Month-end reconciliation: event counts and monitored days grouped by
+    any of provider_id, patient_id, month and cpt_code.
+    """
+    try:
+        groups = await asyncio.to_thread(
+            get_billing_ledger().aggregate,
+            by=[key.strip() for key in by.split(",") if key.strip()],
+            provider_id=provider_id, month=month, cpt_code=cpt_code
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"groups": groups}
+
+
+@router.get("/interpretations")
+async def list_stored_interpretations(
+    patient_id: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    finalized: Optional[bool] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Lists interpretation metadata (newest first), filtered by patient,
+    provider, finalized status and ISO timestamp range.
+    """
+    return {
+        "items": await asyncio.to_thread(
+            list_interpretations,
+            patient_id=patient_id,
+            provider_id=provider_id,
+            finalized=finalized,
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset
+        ),
+        "limit": limit,
+        "offset": offset
+    }
+
+
+@router.get("/interpretations/{interpretation_id}")
+async def get_interpretation(
+    interpretation_id: str,
+    view: str = Query("full"),
+    fields: Optional[str] = None
+):
+    """
+    Returns one stored interpretation, including its summary, trimmed by
+    `view` and `fields` as for /interpret.
+    """
+    if view not in SUMMARY_VIEWS:
+        raise HTTPException(status_code=400, detail=VIEW_DETAIL)
+    try:
+        return _shape(await asyncio.to_thread(load_interpretation, interpretation_id), view, fields)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/interpretations/{interpretation_id}/events")
+async def get_interpretation_events(
+    interpretation_id: str,
+    kind: str = Query(..., description=f"one of: {', '.join(EVENT_LISTS)}"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Pages through one event list of a stored interpretation's summary
+    (episodes and spikes always; per-reading events if include_events was set).
+    """
+    try:
+        stored = await asyncio.to_thread(load_interpretation, interpretation_id)
+        return event_page(stored["summary"], kind, offset, limit)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"{kind} was not stored for {interpretation_id}; interpret with include_events to keep it."
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
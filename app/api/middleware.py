@@ -0,0 +1,169 @@
+import cProfile
+import gzip
+import io
+import logging
+import pstats
+import re
+import time
+from pathlib import Path
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from app.config.loader import get_config
+from app.utils.telemetry import REQUESTS, REQUEST_SECONDS, start_trace
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class TelemetryMiddleware:
+    """
+    Counts and times every HTTP request by route template. Opt-in extras
+    from the telemetry config:
+    - slow_request_ms: log requests slower than this with their stage timings
+    - profiling: run requests sent with `X-Profile: 1` under cProfile and
+      write the stats to profile_dir. The profiler sees everything on the
+      event loop meanwhile, so use it on a quiet instance.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        config = get_config()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profiler = None
+        if config.telemetry_profiling and dict(scope["headers"]).get(PROFILE_HEADER) == b"1":
+            profiler = cProfile.Profile()
+
+        trace = start_trace()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            route_name = getattr(route, "path", None) or "unmatched"
+            REQUESTS.inc(method=scope["method"], route=route_name, status=status["code"])
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route_name)
+
+            slow_ms = config.telemetry_slow_request_ms
+            if slow_ms is not None and elapsed * 1000 >= slow_ms:
+                stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in trace)
+                logger.warning(
+                    "Slow request %s %s: %.1fms status=%s stages: %s",
+                    scope["method"], scope["path"], elapsed * 1000, status["code"], stages or "none"
+                )
+            if profiler is not None:
+                _write_profile(profiler, config.telemetry_profile_dir, scope["path"])
+
+
+def _write_profile(profiler: cProfile.Profile, directory: Path, path: str) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    target = directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{name}.prof"
+    profiler.dump_stats(str(target))
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+    logger.info("Profile for %s written to %s\n%s", path, target, summary.getvalue())
+    return target
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least compression.minimum_size bytes with
+    brotli (when installed) or gzip, whichever the client's Accept-Encoding
+    prefers. Only single-message bodies are compressed: streamed responses
+    such as the SSE endpoint pass through so events are not held back in a
+    compressor's buffer.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        config = get_config()
+        encoding = None
+        if scope["type"] == "http" and config.compression_enabled:
+            encoding = choose_encoding(dict(scope["headers"]).get(b"accept-encoding", b""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held = {"start": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                held["start"] = message
+                return
+            start, held["start"] = held["start"], None
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body")
+                or len(body) < config.compression_minimum_size
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith("text/event-stream")
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            body = _compress(body, encoding, config)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def choose_encoding(accept_encoding: bytes) -> Optional[str]:
+    """"br" or "gzip", whichever the Accept-Encoding header ranks higher (br wins ties)."""
+    weights = {}
+    for item in accept_encoding.decode("latin-1").lower().split(","):
+        name, _, params = item.partition(";")
+        params = params.strip()
+        try:
+            weights[name.strip()] = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weights[name.strip()] = 0.0
+
+    best, best_weight = None, 0.0
+    for candidate in ("br", "gzip") if brotli is not None else ("gzip",):
+        weight = weights.get(candidate, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = candidate, weight
+    return best
+
+
+def _compress(body: bytes, encoding: str, config) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=config.compression_gzip_level, mtime=0)
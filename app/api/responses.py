@@ -0,0 +1,34 @@
+from typing import Any, Optional
+from fastapi.responses import JSONResponse
+from app.utils import jsonio
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with app.utils.jsonio (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return jsonio.dumps(content)
+
+
+def select_fields(data: dict, fields: Optional[str]) -> dict:
+    """
+    Keeps only the comma-separated `fields` of a response body; dotted
+    names reach into nested objects ("interpretation_id,summary.metrics").
+    Names that are not present are skipped.
+    """
+    if not fields:
+        return data
+    selected: dict = {}
+    for path in filter(None, (name.strip() for name in fields.split(","))):
+        parts = path.split(".")
+        value = data
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            node = selected
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = value
+    return selected
@@ -1,14 +1,40 @@
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
+from typing import Mapping, Optional
 from dotenv import load_dotenv
 load_dotenv()
 
+CONFIG_PATH_ENV = "CGM_CONFIG"
+OVERRIDE_PREFIX = "CGM__"
+
+
+def apply_env_overrides(config: dict, environ: Mapping[str, str]) -> dict:
+    """
+    Overlays CGM__SECTION__KEY=value variables onto the parsed YAML, e.g.
+    CGM__LLM__MODEL=gpt-4.1 or CGM__JOBS__WORKERS=4. Values are parsed as
+    YAML scalars so numbers, booleans and null keep their types.
+    """
+    for name, raw in environ.items():
+        if not name.startswith(OVERRIDE_PREFIX):
+            continue
+        keys = [key.lower() for key in name[len(OVERRIDE_PREFIX):].split("__") if key]
+        if not keys:
+            continue
+        section = config
+        for key in keys[:-1]:
+            if not isinstance(section.get(key), dict):
+                section[key] = {}
+            section = section[key]
+        section[keys[-1]] = yaml.safe_load(raw) if raw else None
+    return config
+
 
 class Config:
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", environ: Optional[Mapping[str, str]] = None):
         self.path = Path(config_path)
-        self.config = self._load_yaml()
+        self.config = apply_env_overrides(self._load_yaml(), os.environ if environ is None else environ)
 
         self.app_name = self.config["app"]["name"]
         self.host = self.config["app"]["host"]
@@ -18,14 +44,84 @@ class Config:
         self.llm_model = self.config["llm"]["model"]
         self.llm_base_url = self.config["llm"]["base_url"]
         self.llm_api_key = os.getenv(self.config["llm"]["api_key_env"])
+        self.llm_timeout = self.config["llm"].get("timeout_seconds", 60)
+        self.llm_connect_timeout = self.config["llm"].get("connect_timeout_seconds", 10)
+        self.llm_max_retries = self.config["llm"].get("max_retries", 3)
+        self.llm_backoff_base = self.config["llm"].get("backoff_base_seconds", 0.5)
+        self.llm_backoff_max = self.config["llm"].get("backoff_max_seconds", 8)
+        self.llm_max_concurrency = self.config["llm"].get("max_concurrency", 16)
+        self.llm_max_connections = self.config["llm"].get("max_connections", 32)
+        self.llm_max_keepalive = self.config["llm"].get("max_keepalive_connections", 16)
+
+        cache = self.config["llm"].get("cache", {})
+        self.llm_cache_enabled = cache.get("enabled", False)
+        self.llm_cache_max_entries = cache.get("max_entries", 256)
+        self.llm_cache_ttl_seconds = cache.get("ttl_seconds")
+        self.llm_cache_dir = Path(cache["disk_dir"]) if cache.get("disk_dir") else None
+        self.llm_cache_disk_max_bytes = cache.get("disk_max_bytes", 50 * 1024 * 1024)
+
+        dedup = self.config.get("dedup", {})
+        self.dedup_enabled = dedup.get("enabled", False)
+        self.dedup_ttl_seconds = dedup.get("ttl_seconds", 600)
+        self.dedup_max_entries = dedup.get("max_entries", 1024)
+
+        jobs = self.config.get("jobs", {})
+        self.jobs_workers = jobs.get("workers", 2)
+        self.jobs_queue_depth = jobs.get("queue_depth", 32)
+        self.jobs_backend = jobs.get("backend", "memory")
+        self.jobs_sqlite_path = Path(jobs.get("sqlite_path", "data/jobs/jobs.db"))
+        self.jobs_spool_dir = Path(jobs.get("spool_dir", "data/jobs/uploads"))
+        self.jobs_result_ttl_seconds = jobs.get("result_ttl_seconds", 3600)
+        self.jobs_max_finished = jobs.get("max_finished", 1000)
+
+        batch = self.config.get("batch", {})
+        self.batch_workers = batch.get("workers") or os.cpu_count() or 1
+        self.batch_llm_concurrency = batch.get("llm_concurrency", 8)
+        self.batch_max_files = batch.get("max_files", 500)
+
+        storage = self.config.get("storage", {})
+        self.storage_backend = storage.get("backend", "sqlite")
+        self.storage_sqlite_path = Path(storage.get("sqlite_path", "data/interpretations.db"))
+        self.storage_rollups_path = Path(storage.get("rollups_path", "data/rollups.db"))
+        self.storage_cache_size = storage.get("cache_size", 256)
+
+        billing = self.config.get("billing", {})
+        self.billing_ledger_dir = Path(billing.get("ledger_dir", "data/logs/billing/ledger"))
+        self.billing_segment_max_bytes = billing.get("segment_max_bytes", 64 * 1024 * 1024)
+        self.billing_fsync = billing.get("fsync", True)
+
+        rolling = self.config.get("rolling", {})
+        self.rolling_window_days = rolling.get("window_days", 14)
+        self.rolling_max_patients = rolling.get("max_patients", 1000)
 
         self.input_dir = Path(self.config["paths"]["input_dir"])
         self.output_dir = Path(self.config["paths"]["interpretation_dir"])
         self.billing_log_dir = Path(self.config["paths"]["billing_log_dir"])
 
-        # Ensure output paths exist
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.billing_log_dir.mkdir(parents=True, exist_ok=True)
+        ingest = self.config.get("ingest", {})
+        self.ingest_max_readings = ingest.get("max_readings")
+        self.ingest_max_bytes = ingest.get("max_bytes")
+        self.ingest_chunk_size = ingest.get("chunk_size", 65536)
+        self.ingest_document_parse_max_bytes = ingest.get("document_parse_max_bytes", 16 * 1024 * 1024)
+
+        telemetry = self.config.get("telemetry", {})
+        self.telemetry_slow_request_ms = telemetry.get("slow_request_ms")
+        self.telemetry_profiling = telemetry.get("profiling", False)
+        self.telemetry_profile_dir = Path(telemetry.get("profile_dir", "data/profiles"))
+
+        concurrency = self.config.get("concurrency", {})
+        self.concurrency_cpu_executor = concurrency.get("cpu_executor", "process")
+        self.concurrency_cpu_workers = concurrency.get("cpu_workers", 4)
+        self.concurrency_inline_max_bytes = concurrency.get("inline_max_bytes", 1024 * 1024)
+        self.concurrency_max_in_flight = concurrency.get("max_in_flight", 32)
+        self.concurrency_retry_after_seconds = concurrency.get("retry_after_seconds", 5)
+
+        compression = self.config.get("compression", {})
+        self.compression_enabled = compression.get("enabled", True)
+        self.compression_minimum_size = compression.get("minimum_size", 1024)
+        self.compression_gzip_level = compression.get("gzip_level", 6)
+        self.compression_brotli_quality = compression.get("brotli_quality", 4)
+        # Directories are created by the stores that write to them, on first use
 
     def _load_yaml(self):
         if not self.path.exists():
@@ -34,4 +130,13 @@ class Config:
             return yaml.safe_load(f)
 
     def as_dict(self):
-        return self.config
\ No newline at end of file
+        return self.config
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """
+    The process-wide Config, parsed once on first use from $CGM_CONFIG
+    (default config.yaml). Tests can call get_config.cache_clear().
+    """
+    return Config(os.getenv(CONFIG_PATH_ENV, "config.yaml"))
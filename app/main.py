@@ -1,17 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from app.api.endpoints import router
-from app.config.loader import Config
+from app.api.middleware import CompressionMiddleware, TelemetryMiddleware
+from app.api.responses import FastJSONResponse
+from app.config.loader import get_config
+from app.services.llm.client import aclose_async_client
+from app.services.workflow.jobs import shutdown_job_queue
+from app.services.workflow.concurrency import shutdown_cpu_executor
+from app.services.workflow.billing import shutdown_billing_ledger
+from app.utils.telemetry import REGISTRY, PROMETHEUS_CONTENT_TYPE
 from pathlib import Path
 
-config = Config()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_job_queue()
+    shutdown_cpu_executor()
+    shutdown_billing_ledger()
+    await aclose_async_client()
+
 
 app = FastAPI(
-    title=config.app_name,
+    title=get_config().app_name,
     description="AI-Powered CGM Interpretation Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.mount("/static", StaticFiles(directory="ui"), name="static")
@@ -25,6 +43,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+# Outermost, so request timings include compression
+app.add_middleware(TelemetryMiddleware)
+
 app.include_router(router, prefix="/api")
 
 @app.get("/")
@@ -34,4 +56,9 @@ async def serve_frontend():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "THYRA CGM Interpretation API"}
\ No newline at end of file
+    return {"status": "healthy", "service": "THYRA CGM Interpretation API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint: stage, request, LLM and cache metrics."""
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
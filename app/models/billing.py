@@ -1,9 +1,12 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class BillingEvent(BaseModel):
     timestamp: datetime
     patient_id: str
     provider_id: str
     cpt_code: str = "95251"
-    duration_days: int
\ No newline at end of file
+    duration_days: int
+    billing_id: Optional[str] = None
+    interpretation_id: Optional[str] = None
\ No newline at end of file
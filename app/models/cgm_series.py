@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from app.models.cgm_point import CGMPoint
+
+
+class CGMSeries:
+    """
+    Columnar CGM trace: two parallel arrays of int64 epoch seconds and
+    float32 glucose (mg/dL), plus the UTC offset of the source clock.
+
+    `tz_offset` is in seconds; None means the source timestamps were naive
+    and are rendered back without tzinfo. When the offset changes within
+    the trace (a DST switch), `offsets` holds one offset per reading and
+    `tz_offset` is the first reading's. CGMPoint is only materialized on
+    request through `to_points()` / iteration.
+    """
+
+    __slots__ = ("timestamps", "glucose", "tz_offset", "offsets", "is_sorted")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        glucose: np.ndarray,
+        tz_offset: Optional[int] = 0,
+        is_sorted: bool = False,
+        offsets: Optional[np.ndarray] = None
+    ):
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        self.glucose = np.ascontiguousarray(glucose, dtype=np.float32)
+        if self.timestamps.shape != self.glucose.shape:
+            raise ValueError("timestamps and glucose must have the same length")
+        if offsets is not None:
+            offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+            if offsets.shape != self.timestamps.shape:
+                raise ValueError("offsets must have one entry per reading")
+        self.tz_offset = tz_offset
+        self.offsets = offsets
+        self.is_sorted = is_sorted
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+    def __iter__(self) -> Iterator[CGMPoint]:
+        if self.offsets is None:
+            for ts, value in zip(self.timestamps.tolist(), self.glucose.tolist()):
+                yield CGMPoint(timestamp=self.to_datetime(ts), glucose=value)
+            return
+        for ts, value, offset in zip(self.timestamps.tolist(), self.glucose.tolist(), self.offsets.tolist()):
+            yield CGMPoint(timestamp=self.to_datetime(ts, offset), glucose=value)
+
+    @classmethod
+    def empty(cls) -> "CGMSeries":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), is_sorted=True)
+
+    @classmethod
+    def from_points(cls, points: Iterable[CGMPoint]) -> "CGMSeries":
+        points = list(points)
+        if not points:
+            return cls.empty()
+        tz_offset = utc_offset_seconds(points[0].timestamp)
+        timestamps = np.fromiter((epoch_seconds(p.timestamp) for p in points), dtype=np.int64, count=len(points))
+        glucose = np.fromiter((p.glucose for p in points), dtype=np.float32, count=len(points))
+        offsets = [utc_offset_seconds(p.timestamp) for p in points]
+        if any(offset != tz_offset for offset in offsets):
+            return cls(timestamps, glucose, tz_offset=tz_offset, offsets=np.array([o or 0 for o in offsets]))
+        return cls(timestamps, glucose, tz_offset=tz_offset)
+
+    def sorted(self) -> "CGMSeries":
+        """
+        Returns a chronologically ordered series (stable, like sorted()).
+        Skips the sort entirely when the producer already guaranteed order.
+        """
+        if self.is_sorted:
+            return self
+        if len(self) < 2 or bool(np.all(self.timestamps[1:] >= self.timestamps[:-1])):
+            self.is_sorted = True
+            return self
+        order = np.argsort(self.timestamps, kind="stable")
+        offsets = self.offsets[order] if self.offsets is not None else None
+        return CGMSeries(
+            self.timestamps[order], self.glucose[order], self.tz_offset, is_sorted=True, offsets=offsets
+        )
+
+    def local_seconds(self) -> np.ndarray:
+        """Epoch seconds shifted into the source clock (for hour-of-day maths)."""
+        if self.offsets is not None:
+            return self.timestamps + self.offsets
+        return self.timestamps + (self.tz_offset or 0)
+
+    def to_datetime(self, ts: int, offset: Optional[int] = None) -> datetime:
+        """`offset` defaults to the series' tz_offset."""
+        if offset is None:
+            offset = self.tz_offset
+        if offset is None:
+            return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+        return datetime.fromtimestamp(ts, timezone(timedelta(seconds=offset)))
+
+    def isoformat(self, index: int) -> str:
+        offset = int(self.offsets[index]) if self.offsets is not None else None
+        return self.to_datetime(int(self.timestamps[index]), offset).isoformat()
+
+    def isoformat_many(self, indices: Optional[np.ndarray] = None) -> List[str]:
+        """Vectorized isoformat() for many readings at once."""
+        ts = self.local_seconds() if indices is None else self.local_seconds()[indices]
+        strings = np.datetime_as_string(ts.astype("datetime64[s]"), unit="s")
+        if self.offsets is not None:
+            offsets = self.offsets if indices is None else self.offsets[indices]
+            unique, inverse = np.unique(offsets, return_inverse=True)
+            suffixes = np.array([_offset_suffix(int(offset)) for offset in unique])
+            return np.char.add(strings, suffixes[inverse]).tolist()
+        suffix = _offset_suffix(self.tz_offset)
+        if suffix:
+            strings = np.char.add(strings, suffix)
+        return strings.tolist()
+
+    def to_points(self) -> List[CGMPoint]:
+        return list(self)
+
+
+def epoch_seconds(dt: datetime) -> int:
+    """Epoch seconds for aware datetimes; naive ones are read as UTC wall time."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def utc_offset_seconds(dt: datetime) -> Optional[int]:
+    offset = dt.utcoffset()
+    return None if offset is None else int(offset.total_seconds())
+
+
+def _offset_suffix(tz_offset: Optional[int]) -> str:
+    if tz_offset is None:
+        return ""
+    return datetime(2000, 1, 1, tzinfo=timezone(timedelta(seconds=tz_offset))).isoformat()[19:]
+
+
+def as_series(readings: Union[CGMSeries, Iterable[CGMPoint]]) -> CGMSeries:
+    """Accepts either a CGMSeries or the legacy List[CGMPoint]."""
+    if isinstance(readings, CGMSeries):
+        return readings
+    return CGMSeries.from_points(readings)
@@ -0,0 +1,192 @@
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+from app.models.cgm_point import CGMPoint
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.metrics import TIR_LOWER, TIR_UPPER
+
+AGP_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BIN_MINUTES = 15
+SUMMARY_BIN_MINUTES = 60
+
+# UTC offsets change on the hour or half hour, so one lookup per half hour is exact
+_OFFSET_RESOLUTION = 1800
+
+
+def local_seconds(series: CGMSeries, timezone: Optional[str] = None) -> np.ndarray:
+    """
+    Epoch seconds shifted to local wall-clock time. Without `timezone`
+    the series' own UTC offset is used; with an IANA name (e.g.
+    "America/New_York") offsets follow that zone, including DST changes.
+    """
+    if timezone is None:
+        return series.local_seconds()
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {timezone}")
+
+    def offset_at(ts: int) -> int:
+        return int(datetime.fromtimestamp(ts, dt_timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+    # One lookup per UTC day; only days containing a transition are
+    # resolved at half-hour granularity
+    timestamps = series.timestamps
+    days, inverse = np.unique(timestamps // 86400, return_inverse=True)
+    at_start = np.array([offset_at(int(d) * 86400) for d in days], dtype=np.int64)
+    at_end = np.array([offset_at(int(d) * 86400 + 86399) for d in days], dtype=np.int64)
+    offsets = at_start[inverse]
+    for day in np.flatnonzero(at_start != at_end):
+        members = np.flatnonzero(inverse == day)
+        buckets, bucket_of = np.unique(timestamps[members] // _OFFSET_RESOLUTION, return_inverse=True)
+        bucket_offsets = np.array([offset_at(int(b) * _OFFSET_RESOLUTION) for b in buckets], dtype=np.int64)
+        offsets[members] = bucket_offsets[bucket_of]
+    return timestamps + offsets
+
+
+def _binned_percentiles(bins: np.ndarray, values: np.ndarray, n_bins: int, percentiles) -> Dict[str, Any]:
+    """
+    Linear-interpolated percentiles (numpy's default method) of `values`
+    within every bin, from one global lexsort instead of a sort per bin.
+    """
+    order = np.lexsort((values, bins))
+    ordered = values[order]
+    counts = np.bincount(bins, minlength=n_bins)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    has_data = counts > 0
+    result = {"count": counts.tolist()}
+    for p in percentiles:
+        position = (counts - 1).clip(min=0) * (p / 100.0)
+        lo = np.floor(position).astype(np.int64)
+        hi = np.ceil(position).astype(np.int64)
+        frac = position - lo
+        safe = np.where(has_data, starts, 0)
+        if ordered.size:
+            value = ordered[safe + lo] * (1 - frac) + ordered[safe + hi] * frac
+        else:
+            value = np.zeros(n_bins)
+        result[f"p{p}"] = np.where(has_data, np.round(value, 1), None).tolist()
+    return result
+
+
+def compute_agp(
+    readings: Union[CGMSeries, List[CGMPoint]],
+    bin_minutes: int = DEFAULT_BIN_MINUTES,
+    timezone: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Ambulatory Glucose Profile: 5/25/50/75/95th percentile bands by time of
+    day, all days folded onto one 24-hour axis in `bin_minutes` bins.
+    Columnar output; bins without readings report None.
+    """
+    if bin_minutes <= 0 or 1440 % bin_minutes:
+        raise ValueError("bin_minutes must divide a day evenly")
+    series = as_series(readings)
+    glucose = series.glucose.astype(np.float64)
+    valid = ~np.isnan(glucose)
+    local = local_seconds(series, timezone)[valid]
+
+    n_bins = 1440 // bin_minutes
+    bins = ((local % 86400) // 60 // bin_minutes).astype(np.int64)
+    profile = {
+        "bin_minutes": bin_minutes,
+        "timezone": timezone,
+        "minute_of_day": list(range(0, 1440, bin_minutes)),
+    }
+    profile.update(_binned_percentiles(bins, glucose[valid], n_bins, AGP_PERCENTILES))
+    return profile
+
+
+def _day_groups(series: CGMSeries, timezone: Optional[str]):
+    glucose = series.glucose.astype(np.float64)
+    valid = ~np.isnan(glucose)
+    local = local_seconds(series, timezone)[valid]
+    glucose = glucose[valid]
+    order = np.argsort(local, kind="stable")
+    local, glucose = local[order], glucose[order]
+    days = local // 86400
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1)) if days.size else np.empty(0, dtype=np.int64)
+    labels = days[starts].astype("datetime64[D]").astype(str).tolist()
+    return local, glucose, days, starts, labels
+
+
+def daily_stats(readings: Union[CGMSeries, List[CGMPoint]], timezone: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per local calendar day: readings, mean, SD, min, max and time in/below/above range."""
+    local, glucose, days, starts, labels = _day_groups(as_series(readings), timezone)
+    if glucose.size == 0:
+        return []
+
+    counts = np.diff(np.append(starts, glucose.size))
+    sums = np.add.reduceat(glucose, starts)
+    means = sums / counts
+    deviations = (glucose - np.repeat(means, counts)) ** 2
+    stds = np.sqrt(np.add.reduceat(deviations, starts) / np.maximum(counts - 1, 1))
+    minima = np.minimum.reduceat(glucose, starts)
+    maxima = np.maximum.reduceat(glucose, starts)
+    in_range = np.add.reduceat(((glucose >= TIR_LOWER) & (glucose <= TIR_UPPER)).astype(np.int64), starts)
+    below = np.add.reduceat((glucose < TIR_LOWER).astype(np.int64), starts)
+    above = np.add.reduceat((glucose > TIR_UPPER).astype(np.int64), starts)
+
+    return [
+        {
+            "date": labels[k],
+            "readings": int(counts[k]),
+            "mean_glucose": round(float(means[k]), 2),
+            "std_glucose": round(float(stds[k]), 2) if counts[k] > 1 else 0.0,
+            "min_glucose": round(float(minima[k]), 2),
+            "max_glucose": round(float(maxima[k]), 2),
+            "tir_percent": round(float(in_range[k]) / counts[k] * 100, 2),
+            "below_70_percent": round(float(below[k]) / counts[k] * 100, 2),
+            "above_180_percent": round(float(above[k]) / counts[k] * 100, 2)
+        }
+        for k in range(len(labels))
+    ]
+
+
+def daily_overlay(
+    readings: Union[CGMSeries, List[CGMPoint]],
+    bin_minutes: int = DEFAULT_BIN_MINUTES,
+    timezone: Optional[str] = None
+) -> Dict[str, Any]:
+    """One trace per day: mean glucose in each time-of-day bin (None where no readings)."""
+    if bin_minutes <= 0 or 1440 % bin_minutes:
+        raise ValueError("bin_minutes must divide a day evenly")
+    local, glucose, days, starts, labels = _day_groups(as_series(readings), timezone)
+    n_bins = 1440 // bin_minutes
+
+    row = np.repeat(np.arange(len(labels)), np.diff(np.append(starts, glucose.size)))
+    cell = row * n_bins + (local % 86400) // 60 // bin_minutes
+    size = len(labels) * n_bins
+    counts = np.bincount(cell, minlength=size).reshape(len(labels), n_bins)
+    sums = np.bincount(cell, weights=glucose, minlength=size).reshape(len(labels), n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.round(sums / counts, 1)
+
+    return {
+        "bin_minutes": bin_minutes,
+        "timezone": timezone,
+        "minute_of_day": list(range(0, 1440, bin_minutes)),
+        "days": labels,
+        "values": np.where(np.isnan(means), None, means).tolist()
+    }
+
+
+def agp_report(
+    readings: Union[CGMSeries, List[CGMPoint]],
+    bin_minutes: int = DEFAULT_BIN_MINUTES,
+    timezone: Optional[str] = None,
+    include_overlay: bool = False
+) -> Dict[str, Any]:
+    """Full AGP payload for the /agp endpoint."""
+    series = as_series(readings)
+    report = {
+        "profile": compute_agp(series, bin_minutes, timezone),
+        "daily_stats": daily_stats(series, timezone)
+    }
+    if include_overlay:
+        report["daily_overlay"] = daily_overlay(series, bin_minutes, timezone)
+    return report
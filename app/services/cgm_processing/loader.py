@@ -1,60 +1,310 @@
-import json
-from typing import List
+import csv
+import gzip
+import io
+import os
+import tempfile
+import warnings
+from array import array
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
-from app.models.cgm_point import CGMPoint
 
+import numpy as np
 
-def load_cgm_file(file_path: Path) -> List[CGMPoint]:
+from app.config.loader import get_config
+from app.models.cgm_series import CGMSeries, epoch_seconds, utc_offset_seconds
+from app.utils import jsonio
+from app.utils.json_stream import JSONStream, PayloadTooLargeError
+
+
+class CGMIngestLimitError(PayloadTooLargeError):
+    """Raised when an upload exceeds the configured reading or byte limits."""
+
+
+# A reader takes the (decompressed) binary stream and the ingest limits
+CGMReader = Callable[[BinaryIO, "_IngestLimits"], CGMSeries]
+
+# name -> (sniff(head bytes) -> bool, reader); probed in registration order
+_READERS: "OrderedDict[str, Tuple[Callable[[bytes], bool], CGMReader]]" = OrderedDict()
+
+SUPPORTED_EXTENSIONS = (".json", ".csv", ".gz")
+SNIFF_BYTES = 8192
+SPOOL_CHUNK_BYTES = 1024 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+UTF8_BOM = b"\xef\xbb\xbf"
+MMOL_TO_MG_DL = 18.0182
+
+
+class _IngestLimits(NamedTuple):
+    max_readings: Optional[int]
+    max_bytes: Optional[int]
+    chunk_size: int
+    document_parse_max_bytes: Optional[int] = None
+
+
+def register_reader(name: str, sniff: Callable[[bytes], bool], reader: CGMReader) -> None:
+    """
+    Adds (or replaces) a CGM file reader. `sniff` sees the first few KB of
+    the decompressed file; the first reader whose sniff matches is used.
+    """
+    _READERS[name] = (sniff, reader)
+
+
+def detect_format(head: bytes) -> str:
+    """Name of the registered reader that accepts a file starting with `head`."""
+    head = head.lstrip(UTF8_BOM)
+    for name, (sniff, _) in _READERS.items():
+        if sniff(head):
+            return name
+    raise ValueError("Unrecognized CGM file format")
+
+
+def is_supported_upload(filename: Optional[str]) -> bool:
+    return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def load_cgm_file(
+    file_path: Union[Path, bytes, BinaryIO],
+    max_readings: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> CGMSeries:
     """
-    Loads and parses a JSON file with Dexcom-style CGM readings.
-    Supports both mock files and Dexcom API-compatible schema.
+    Loads and parses a CGM export: Dexcom-style JSON (mock list or API
+    schema), Dexcom Clarity CSV or FreeStyle Libre CSV, optionally
+    gzip-compressed. The format is detected from the content, not the
+    file name; see register_reader for adding more.
+
+    JSON up to ingest.document_parse_max_bytes is parsed in one pass when
+    orjson is installed and streamed one record at a time otherwise; CSV
+    columns are parsed in bulk. Either way readings go straight into typed
+    buffers.
 
     Args:
-        file_path: path to a local .json file
+        file_path: path to a local CGM export, its raw bytes, or a seekable
+            binary file object (e.g. an upload's spooled file), read from its
+            current position
+        max_readings: reading cap (defaults to ingest.max_readings)
+        max_bytes: size cap, on disk and after decompression (defaults to ingest.max_bytes)
 
     Returns:
-        List[CGMPoint]
+        CGMSeries sorted by timestamp
     """
-    with open(file_path, "r") as f:
-        raw_data = json.load(f)
+    config = get_config()
+    limits = _IngestLimits(
+        config.ingest_max_readings if max_readings is None else max_readings,
+        config.ingest_max_bytes if max_bytes is None else max_bytes,
+        config.ingest_chunk_size,
+        config.ingest_document_parse_max_bytes
+    )
 
-    # Handle Dexcom official schema
-    if isinstance(raw_data, dict) and "records" in raw_data:
-        readings = raw_data["records"]
-        return _parse_dexcom_records(readings)
+    if isinstance(file_path, (bytes, bytearray)):
+        return _load_stream(io.BytesIO(file_path), limits)
+    if hasattr(file_path, "read"):
+        return _load_stream(file_path, limits)
+    with open(file_path, "rb") as f:
+        return _load_stream(f, limits)
 
-    # Handle list of mock data records
-    elif isinstance(raw_data, list):
-        return _parse_mock_format(raw_data)
 
+def spool_upload(fp: BinaryIO, max_bytes: Optional[int] = None) -> Path:
+    """
+    Copies an open upload, from its current position, to a temporary file
+    so a worker process can stream it from disk; the caller deletes it.
+    Stops with CGMIngestLimitError once the copy passes the size cap
+    (defaults to ingest.max_bytes).
+    """
+    if max_bytes is None:
+        max_bytes = get_config().ingest_max_bytes
+    fd, name = tempfile.mkstemp(prefix="cgm-upload-")
+    path = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            written = 0
+            while chunk := fp.read(SPOOL_CHUNK_BYTES):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise CGMIngestLimitError(f"CGM file exceeds the {max_bytes} byte limit")
+                out.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def _load_stream(f: BinaryIO, limits: _IngestLimits) -> CGMSeries:
+    # seek/tell rather than fstat: fileno() would force a spooled upload onto disk
+    start = f.tell()
+    size = f.seek(0, io.SEEK_END) - start
+    f.seek(start)
+    if limits.max_bytes is not None and size > limits.max_bytes:
+        raise CGMIngestLimitError(f"CGM file is {size} bytes; the limit is {limits.max_bytes}")
+
+    stream: BinaryIO = f
+    if f.read(2) == GZIP_MAGIC:
+        f.seek(start)
+        stream = gzip.GzipFile(fileobj=f, mode="rb")
     else:
+        f.seek(start)
+
+    try:
+        try:
+            head = stream.read(SNIFF_BYTES)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Unreadable CGM file: {e}") from e
+        _, reader = _READERS[detect_format(head)]
+        return reader(_PrefixedReader(head, stream), limits)
+    except CGMIngestLimitError:
+        raise
+    except PayloadTooLargeError as e:
+        raise CGMIngestLimitError(str(e)) from e
+    except (OSError, EOFError) as e:
+        # Truncated or corrupt gzip members surface here
+        raise ValueError(f"Unreadable CGM file: {e}") from e
+
+
+class _PrefixedReader(io.RawIOBase):
+    """
+    Replays bytes already read from `fp` (the sniffed head) before the
+    rest of it. Closing it leaves `fp` open.
+    """
+
+    def __init__(self, prefix: bytes, fp: BinaryIO):
+        self._prefix = memoryview(prefix)
+        self._fp = fp
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._fp.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self.readall()
+        head = bytes(self._prefix[:size])
+        self._prefix = self._prefix[len(head):]
+        if len(head) == size:
+            return head
+        return head + self._fp.read(size - len(head))
+
+    def readall(self) -> bytes:
+        data = bytes(self._prefix) + self._fp.read()
+        self._prefix = memoryview(b"")
+        return data
+
+
+def _read_json(fp: BinaryIO, limits: _IngestLimits) -> CGMSeries:
+    builder = _SeriesBuilder(limits.max_readings)
+    head = fp.read(len(UTF8_BOM))
+    if head != UTF8_BOM:
+        fp = _PrefixedReader(head, fp)
+    cap = limits.document_parse_max_bytes or 0
+    if limits.max_bytes is not None:
+        cap = min(cap, limits.max_bytes)
+
+    if jsonio.HAVE_ORJSON and cap > 0:
+        data = fp.read(cap + 1)
+        if len(data) <= cap:
+            # Small enough to hold: one orjson pass beats tokenizing in Python
+            document = jsonio.loads(data)
+            if isinstance(document, dict):
+                if "records" not in document or not isinstance(document["records"], list):
+                    raise ValueError("Unrecognized CGM file format")
+                return _parse_dexcom_records(document["records"], builder)
+            if not isinstance(document, list):
+                raise ValueError("Unrecognized CGM file format")
+            return _parse_mock_format(document, builder)
+        fp = _PrefixedReader(data, fp)
+
+    stream = JSONStream(fp, chunk_size=limits.chunk_size, max_bytes=limits.max_bytes)
+    first = stream.peek()
+
+    # Handle Dexcom official schema
+    if first == "{":
+        for key in stream.iter_object_keys():
+            if key == "records":
+                return _parse_dexcom_records(stream.iter_array(), builder)
+            stream.skip()
         raise ValueError("Unrecognized CGM file format")
 
+    # Handle list of mock data records
+    return _parse_mock_format(stream.iter_array(), builder)
+
+
+class _SeriesBuilder:
+    """Appends readings straight into compact typed buffers."""
 
-def _parse_mock_format(data: List[dict]) -> List[CGMPoint]:
-    parsed = []
+    def __init__(self, max_readings: Optional[int] = None):
+        self.timestamps = array("q")
+        self.glucose = array("f")
+        self.tz_offset: Optional[int] = 0
+        self.max_readings = max_readings
+        self._first = True
+        self._tzinfo = None
+        # (index, offset) wherever the UTC offset changes, e.g. at a DST switch
+        self._offset_changes: List[Tuple[int, Optional[int]]] = []
+
+    def append(self, timestamp: str, value) -> None:
+        if self.max_readings is not None and len(self.timestamps) >= self.max_readings:
+            raise CGMIngestLimitError(f"CGM file exceeds the {self.max_readings} reading limit")
+        dt = _parse_time(timestamp)
+        if self._first:
+            self.tz_offset = utc_offset_seconds(dt)
+            self._tzinfo = dt.tzinfo
+            self._first = False
+        elif dt.tzinfo != self._tzinfo:
+            self._tzinfo = dt.tzinfo
+            self._offset_changes.append((len(self.timestamps), utc_offset_seconds(dt)))
+        self.timestamps.append(epoch_seconds(dt))
+        self.glucose.append(float(value))
+
+    def _offsets(self) -> Optional[np.ndarray]:
+        """Per-reading offsets, or None when every reading shares tz_offset."""
+        if not any(offset != self.tz_offset for _, offset in self._offset_changes):
+            return None
+        offsets = np.full(len(self.timestamps), self.tz_offset or 0, dtype=np.int64)
+        for index, offset in self._offset_changes:
+            offsets[index:] = offset or 0
+        return offsets
+
+    def build(self) -> CGMSeries:
+        series = CGMSeries(
+            np.frombuffer(self.timestamps, dtype=np.int64) if self.timestamps else np.empty(0, dtype=np.int64),
+            np.frombuffer(self.glucose, dtype=np.float32) if self.glucose else np.empty(0, dtype=np.float32),
+            tz_offset=self.tz_offset,
+            offsets=self._offsets()
+        )
+        return series.sorted()
+
+
+def _parse_mock_format(data: Iterable[dict], builder: Optional[_SeriesBuilder] = None) -> CGMSeries:
+    builder = builder or _SeriesBuilder()
     for item in data:
+        if not isinstance(item, dict):
+            raise ValueError("Unrecognized CGM record format")
         timestamp = item.get("timestamp") or item.get("systemTime") or item.get("displayTime")
         value = item.get("glucose_mg_per_dl") or item.get("value") or item.get("smoothedValue")
         if timestamp and value:
-            parsed.append(CGMPoint(
-                timestamp=_parse_time(timestamp),
-                glucose=float(value)
-            ))
-    return sorted(parsed, key=lambda x: x.timestamp)
+            builder.append(timestamp, value)
+    return builder.build()
 
 
-def _parse_dexcom_records(records: List[dict]) -> List[CGMPoint]:
-    parsed = []
+def _parse_dexcom_records(records: Iterable[dict], builder: Optional[_SeriesBuilder] = None) -> CGMSeries:
+    builder = builder or _SeriesBuilder()
     for r in records:
+        if not isinstance(r, dict):
+            raise ValueError("Unrecognized CGM record format")
         if not r.get("value"):
             continue
-        parsed.append(CGMPoint(
-            timestamp=_parse_time(r["systemTime"]),
-            glucose=float(r["value"])
-        ))
-    return sorted(parsed, key=lambda x: x.timestamp)
+        builder.append(r["systemTime"], r["value"])
+    return builder.build()
 
 
 def _parse_time(t: str) -> datetime:
@@ -63,3 +313,157 @@ def _parse_time(t: str) -> datetime:
         return datetime.fromisoformat(t.replace("Z", "+00:00"))
     except Exception:
         raise ValueError(f"Invalid timestamp format: {t}")
+
+
+def _read_text(fp: BinaryIO, limits: _IngestLimits) -> str:
+    """Whole decompressed payload as text, enforcing max_bytes on the decompressed size."""
+    data = fp.read() if limits.max_bytes is None else fp.read(limits.max_bytes + 1)
+    if limits.max_bytes is not None and len(data) > limits.max_bytes:
+        raise CGMIngestLimitError(f"CGM file exceeds the {limits.max_bytes} byte limit once decompressed")
+    return data.decode("utf-8-sig", errors="replace")
+
+
+def _csv_columns(text: str, header_row: int, wanted: List[str]) -> List[np.ndarray]:
+    """
+    Reads just the requested columns of a CSV export as numpy string
+    arrays with numpy's C tokenizer, so later steps work per column
+    instead of per row.
+    """
+    lines = text.split("\n", header_row + 1)
+    if len(lines) <= header_row:
+        raise ValueError("CGM CSV file has no header row")
+    header = [name.strip() for name in next(csv.reader([lines[header_row]]))]
+    missing = [name for name in wanted if name not in header]
+    if missing:
+        raise ValueError(f"CGM CSV file is missing the '{missing[0]}' column")
+
+    body = lines[header_row + 1] if len(lines) > header_row + 1 else ""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # header-only files
+        table = np.loadtxt(
+            io.StringIO(body), delimiter=",", quotechar='"', comments=None, dtype=str,
+            usecols=[header.index(name) for name in wanted], ndmin=2
+        )
+    return [table[:, k] for k in range(len(wanted))]
+
+
+def _glucose_column(values: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """
+    Vectorized numeric conversion; Clarity's "Low"/"High" markers become
+    the sensor limits (40/400 mg/dL) and blanks become NaN.
+    """
+    values = np.where(values == "", "nan", values)
+    values = np.where(values == "Low", str(40 / scale), values)
+    values = np.where(values == "High", str(400 / scale), values)
+    try:
+        glucose = values.astype(np.float64) * scale
+    except ValueError as e:
+        raise ValueError(f"Invalid glucose value in CGM file: {e}") from e
+    return np.round(glucose, 1) if scale != 1.0 else glucose
+
+
+def _to_epoch(stamps: np.ndarray) -> np.ndarray:
+    """ISO-like wall-clock strings (naive) to epoch seconds, parsed by numpy in bulk."""
+    try:
+        return stamps.astype("datetime64[s]").astype(np.int64)
+    except ValueError as e:
+        raise ValueError(f"Invalid timestamp format in CGM file: {e}") from e
+
+
+def _series_from_columns(timestamps: np.ndarray, glucose: np.ndarray, limits: _IngestLimits) -> CGMSeries:
+    keep = ~np.isnan(glucose) & (glucose > 0)
+    if limits.max_readings is not None and int(keep.sum()) > limits.max_readings:
+        raise CGMIngestLimitError(f"CGM file exceeds the {limits.max_readings} reading limit")
+    # CSV exports carry device wall-clock time without an offset, like naive JSON timestamps
+    return CGMSeries(timestamps[keep], glucose[keep].astype(np.float32), tz_offset=None).sorted()
+
+
+CLARITY_TIMESTAMP = "Timestamp (YYYY-MM-DDThh:mm:ss)"
+CLARITY_EVENT_TYPE = "Event Type"
+CLARITY_GLUCOSE_MG = "Glucose Value (mg/dL)"
+CLARITY_GLUCOSE_MMOL = "Glucose Value (mmol/L)"
+
+
+def _sniff_clarity(head: bytes) -> bool:
+    return CLARITY_TIMESTAMP.encode() in head.split(b"\n", 1)[0]
+
+
+def _read_clarity_csv(fp: BinaryIO, limits: _IngestLimits) -> CGMSeries:
+    """Dexcom Clarity export: EGV rows only; the metadata rows have no timestamp."""
+    text = _read_text(fp, limits)
+    header_line = text.split("\n", 1)[0]
+    glucose_column = CLARITY_GLUCOSE_MMOL if CLARITY_GLUCOSE_MMOL in header_line else CLARITY_GLUCOSE_MG
+    stamps, events, values = _csv_columns(text, 0, [CLARITY_TIMESTAMP, CLARITY_EVENT_TYPE, glucose_column])
+
+    egv = (events == "EGV") & (stamps != "")
+    scale = MMOL_TO_MG_DL if glucose_column == CLARITY_GLUCOSE_MMOL else 1.0
+    return _series_from_columns(_to_epoch(stamps[egv]), _glucose_column(values[egv], scale), limits)
+
+
+LIBRE_TIMESTAMP = "Device Timestamp"
+LIBRE_RECORD_TYPE = "Record Type"
+LIBRE_HISTORIC_MG = "Historic Glucose mg/dL"
+LIBRE_HISTORIC_MMOL = "Historic Glucose mmol/L"
+LIBRE_HISTORIC_RECORD = "0"
+
+
+def _sniff_libre(head: bytes) -> bool:
+    lines = head.split(b"\n", 2)[:2]
+    return any(LIBRE_TIMESTAMP.encode() in line and b"Historic Glucose" in line for line in lines)
+
+
+def _libre_iso(stamps: np.ndarray) -> np.ndarray:
+    """
+    "MM-DD-YYYY HH:MM" (or DD-MM-YYYY, detected from the data) to ISO text
+    by rearranging fixed-width character columns, no per-row parsing.
+    Stamps already in YYYY-MM-DD order pass through.
+    """
+    if stamps.size == 0 or stamps[0][4:5] == "-":
+        return stamps
+    if not (np.char.str_len(stamps) == 16).all():
+        raise ValueError("Invalid timestamp format in CGM file: expected MM-DD-YYYY HH:MM")
+    chars = stamps.astype("U16").view("U1").reshape(-1, 16)
+    first = chars[:, 0:2].copy().view("U2").ravel().astype(np.int64)
+    second = chars[:, 3:5].copy().view("U2").ravel().astype(np.int64)
+    if (first > 12).any():
+        return _rearrange_date(chars, day_first=True)
+    if (second > 12).any() or (first == second).all():
+        return _rearrange_date(chars, day_first=False)
+
+    # Every field is a valid month: keep the reading order that forms one contiguous trace
+    candidates = [_rearrange_date(chars, day_first) for day_first in (False, True)]
+    widest_gap = [int(np.diff(np.sort(_to_epoch(iso))).max(initial=0)) for iso in candidates]
+    if widest_gap[0] == widest_gap[1]:
+        raise ValueError("Ambiguous dates in CGM file: cannot tell DD-MM-YYYY from MM-DD-YYYY")
+    return candidates[int(widest_gap[1] < widest_gap[0])]
+
+
+def _rearrange_date(chars: np.ndarray, day_first: bool) -> np.ndarray:
+    month = chars[:, 3:5] if day_first else chars[:, 0:2]
+    day = chars[:, 0:2] if day_first else chars[:, 3:5]
+    dash = np.full((len(chars), 1), "-")
+    iso = np.hstack([chars[:, 6:10], dash, month, dash, day, np.full((len(chars), 1), "T"), chars[:, 11:16]])
+    return np.ascontiguousarray(iso).view("U16").ravel()
+
+
+def _read_libre_csv(fp: BinaryIO, limits: _IngestLimits) -> CGMSeries:
+    """
+    FreeStyle Libre (LibreView) export: a title line, then the header.
+    Only historic (record type 0, every 15 minutes) readings are used;
+    scans duplicate the same trace at irregular times.
+    """
+    text = _read_text(fp, limits)
+    header_row = 0 if LIBRE_TIMESTAMP in text.split("\n", 1)[0] else 1
+    header_line = text.split("\n", header_row + 1)[header_row]
+    glucose_column = LIBRE_HISTORIC_MMOL if LIBRE_HISTORIC_MMOL in header_line else LIBRE_HISTORIC_MG
+    stamps, kinds, values = _csv_columns(text, header_row, [LIBRE_TIMESTAMP, LIBRE_RECORD_TYPE, glucose_column])
+
+    historic = (kinds == LIBRE_HISTORIC_RECORD) & (stamps != "")
+    scale = MMOL_TO_MG_DL if glucose_column == LIBRE_HISTORIC_MMOL else 1.0
+    timestamps = _to_epoch(_libre_iso(stamps[historic]))
+    return _series_from_columns(timestamps, _glucose_column(values[historic], scale), limits)
+
+
+register_reader("json", lambda head: head.lstrip()[:1] in (b"{", b"["), _read_json)
+register_reader("dexcom_clarity_csv", _sniff_clarity, _read_clarity_csv)
+register_reader("libre_csv", _sniff_libre, _read_libre_csv)
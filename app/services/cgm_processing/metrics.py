@@ -1,6 +1,8 @@
-from typing import List, Dict
-from statistics import mean, stdev
+from typing import List, Dict, Union
+import numpy as np
 from app.models.cgm_point import CGMPoint
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.resample import resample_to_grid, wear_metrics
 
 # Glycemic thresholds in mg/dL (standard)
 TIR_LOWER = 70
@@ -8,9 +10,34 @@ TIR_UPPER = 180
 LOW_L1 = 54
 HIGH_L1 = 250
 
-def compute_cgm_metrics(readings: List[CGMPoint]) -> Dict[str, float]:
+# Band codes produced by glucose_bands()
+BAND_BELOW_54 = 0
+BAND_54_70 = 1
+BAND_IN_RANGE = 2
+BAND_180_250 = 3
+BAND_ABOVE_250 = 4
+BAND_MISSING = 5
+
+_LOW_EDGES = np.array([LOW_L1, TIR_LOWER], dtype=np.float64)
+_HIGH_EDGES = np.array([TIR_UPPER, HIGH_L1], dtype=np.float64)
+
+
+def glucose_bands(values: np.ndarray) -> np.ndarray:
     """
-    Computes standard CGM metrics from CGMPoint list:
+    Classifies every reading into one threshold band in a single sweep:
+    <54, 54–69, 70–180, 181–250, >250 (and BAND_MISSING for NaN).
+    """
+    bands = (
+        np.searchsorted(_LOW_EDGES, values, side="right")
+        + np.searchsorted(_HIGH_EDGES, values, side="left")
+    ).astype(np.int8)
+    bands[np.isnan(values)] = BAND_MISSING
+    return bands
+
+
+def compute_cgm_metrics(readings: Union[CGMSeries, List[CGMPoint]]) -> Dict[str, float]:
+    """
+    Computes standard CGM metrics from a CGMSeries (or legacy CGMPoint list):
     - Mean Glucose
     - Standard Deviation
     - Coefficient of Variation (CV)
@@ -18,28 +45,53 @@ def compute_cgm_metrics(readings: List[CGMPoint]) -> Dict[str, float]:
     - Time In Range (70–180 mg/dL)
     - Time Below Range (Level 1 <70, Level 2 <54)
     - Time Above Range (Level 1 >180, Level 2 >250)
+    - Wear time and sampling regularity (see resample.wear_metrics)
     Returns all metrics in percentages and absolute stats.
     """
+    series = as_series(readings).sorted()
+    values = series.glucose.astype(np.float64)
+    metrics = metrics_from_arrays(values, glucose_bands(values))
+    metrics.update(wear_metrics(resample_to_grid(series)))
+    return metrics
 
-    # Extract glucose values
-    glucose_values = [r.glucose for r in readings if r.glucose is not None]
-    total = len(glucose_values)
+
+def metrics_from_arrays(values: np.ndarray, bands: np.ndarray) -> Dict[str, float]:
+    """
+    Metric kernel over float64 glucose values and their precomputed bands,
+    shared by compute_cgm_metrics and the fused summary engine.
+    """
+    band_counts = np.bincount(bands, minlength=BAND_MISSING + 1)
+    total = int(band_counts[:BAND_MISSING].sum())
 
     if total == 0:
         raise ValueError("No valid CGM glucose data available.")
 
+    glucose_values = values if band_counts[BAND_MISSING] == 0 else values[bands != BAND_MISSING]
+
     # Core metrics
-    avg = mean(glucose_values)
-    std = stdev(glucose_values) if total > 1 else 0.0
+    avg = float(glucose_values.mean())
+    std = float(glucose_values.std(ddof=1)) if total > 1 else 0.0
+    return metrics_from_stats(band_counts, avg, std)
+
+
+def metrics_from_stats(band_counts: np.ndarray, avg: float, std: float) -> Dict[str, float]:
+    """
+    Final metric assembly from per-band reading counts plus mean and
+    sample standard deviation; also used by the rolling accumulator.
+    """
+    total = int(np.sum(band_counts[:BAND_MISSING]))
+    if total == 0:
+        raise ValueError("No valid CGM glucose data available.")
+
     cv = (std / avg) * 100 if avg else 0.0
     gmi = 3.31 + (0.02392 * avg)
 
     # TIR metrics (percentage of time)
-    tir = len([v for v in glucose_values if TIR_LOWER <= v <= TIR_UPPER])
-    below_70 = len([v for v in glucose_values if v < TIR_LOWER])
-    below_54 = len([v for v in glucose_values if v < LOW_L1])
-    above_180 = len([v for v in glucose_values if v > TIR_UPPER])
-    above_250 = len([v for v in glucose_values if v > HIGH_L1])
+    tir = int(band_counts[BAND_IN_RANGE])
+    below_54 = int(band_counts[BAND_BELOW_54])
+    below_70 = below_54 + int(band_counts[BAND_54_70])
+    above_250 = int(band_counts[BAND_ABOVE_250])
+    above_180 = above_250 + int(band_counts[BAND_180_250])
 
     return {
         "mean_glucose": round(avg, 2),
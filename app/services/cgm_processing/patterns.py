@@ -1,111 +1,161 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from datetime import datetime
+import numpy as np
 from app.models.cgm_point import CGMPoint
-from app.utils.datetime_tools import is_nocturnal, is_dawn_window
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.resample import CGMGrid, resample_to_grid
+from app.services.cgm_processing.metrics import (
+    glucose_bands, BAND_54_70, BAND_180_250, BAND_ABOVE_250
+)
+from app.utils.datetime_tools import hours_of_day, nocturnal_mask, dawn_window_mask
+
+SPIKE_WINDOW_SECONDS = 60 * 60
+SPIKE_MIN_DELTA = 40
+DAWN_STEP_SECONDS = 5 * 60  # rises are measured reading-to-reading at 5-minute cadence
+DAWN_MIN_RISE = 20
+DAWN_MIN_EVENTS = 3
+
 
 def is_postprandial(dt: datetime) -> bool:
     """Postprandial window: 6 AM to 10 PM."""
     return 6 <= dt.hour <= 22
 
 
-def _group_hypo_episodes(events: List[Dict], min_gap_minutes: int = 30) -> List[Dict]:
-    """Group consecutive low-glucose readings into discrete episodes."""
-    if not events:
+def _group_episodes(
+    series: CGMSeries,
+    indices: np.ndarray,
+    extreme: str = "min",
+    interval_seconds: int = 0,
+    min_gap_minutes: int = 30
+) -> List[Dict]:
+    """
+    Run-length encodes out-of-range readings into discrete episodes.
+
+    Readings closer than `min_gap_minutes` belong to the same episode.
+    `extreme` selects the nadir ("min", reported as min_glucose) or peak
+    ("max", reported as max_glucose). duration_minutes spans first to last
+    reading plus one sampling interval, so a lone reading still counts.
+    """
+    if indices.size == 0:
         return []
 
-    grouped = []
-    current_group = [events[0]]
-
-    for i in range(1, len(events)):
-        prev = datetime.fromisoformat(events[i - 1]["timestamp"])
-        curr = datetime.fromisoformat(events[i]["timestamp"])
-        gap = (curr - prev).total_seconds() / 60.0
-
-        if gap <= min_gap_minutes:
-            current_group.append(events[i])
-        else:
-            grouped.append(current_group)
-            current_group = [events[i]]
-
-    grouped.append(current_group)
-
-    episodes = []
-    for group in grouped:
-        times = [datetime.fromisoformat(r["timestamp"]) for r in group]
-        values = [r["glucose"] for r in group]
-        episodes.append({
-            "start": min(times).isoformat(),
-            "end": max(times).isoformat(),
-            "min_glucose": min(values),
-            "count": len(group)
-        })
-
-    return episodes
-
-
-def detect_all_patterns(readings: List[CGMPoint]) -> Dict[str, Any]:
-    readings = sorted(readings, key=lambda x: x.timestamp)
-
-    hypo = []
-    nocturnal_hypo = []
-    hyper = []
+    ts = series.timestamps[indices]
+    values = np.round(series.glucose[indices].astype(np.float64), 2)
+
+    # A new episode starts wherever the gap to the previous event exceeds the limit
+    breaks = np.flatnonzero(np.diff(ts) > min_gap_minutes * 60) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [ts.size])) - 1
+
+    start_iso = series.isoformat_many(indices[starts])
+    end_iso = series.isoformat_many(indices[ends])
+    reduce = np.minimum if extreme == "min" else np.maximum
+    extremes = reduce.reduceat(values, starts).tolist()
+    durations = np.round((ts[ends] - ts[starts] + interval_seconds) / 60.0, 1).tolist()
+    counts = (ends - starts + 1).tolist()
+
+    return [
+        {
+            "start": start_iso[k],
+            "end": end_iso[k],
+            f"{extreme}_glucose": extremes[k],
+            "duration_minutes": durations[k],
+            "count": counts[k]
+        }
+        for k in range(len(counts))
+    ]
+
+
+def _events(series: CGMSeries, indices: np.ndarray) -> List[Dict]:
+    stamps = series.isoformat_many(indices)
+    values = np.round(series.glucose[indices].astype(np.float64), 2).tolist()
+    return [{"timestamp": t, "glucose": v} for t, v in zip(stamps, values)]
+
+
+def detect_all_patterns(
+    readings: Union[CGMSeries, List[CGMPoint]],
+    include_events: bool = False
+) -> Dict[str, Any]:
+    series = as_series(readings).sorted()
+    glucose = series.glucose.astype(np.float64)
+    return patterns_from_arrays(
+        series, glucose, glucose_bands(glucose), hours_of_day(series.local_seconds()),
+        resample_to_grid(series), include_events=include_events
+    )
+
+
+def patterns_from_arrays(
+    series: CGMSeries,
+    glucose: np.ndarray,
+    bands: np.ndarray,
+    hours: np.ndarray,
+    grid: CGMGrid,
+    include_events: bool = False
+) -> Dict[str, Any]:
+    """
+    Pattern kernel over a sorted series and its precomputed float64 values,
+    threshold bands, local hours and regular grid (see summarizer.generate_summary).
+
+    Out-of-range readings are reported as run-length episodes plus reading
+    counts; the per-reading *_events lists are only built with include_events.
+
+    Spike and dawn windows are fixed slot offsets on the grid, so they mean
+    the same elapsed time for 1-, 5- and 15-minute devices and never span
+    a sensor gap.
+    """
+    hypo_idx = np.flatnonzero(bands <= BAND_54_70)
+    hyper_idx = np.flatnonzero((bands == BAND_180_250) | (bands == BAND_ABOVE_250))
+    nocturnal_hypo_idx = hypo_idx[nocturnal_mask(hours[hypo_idx])]
+
+    # Improved postprandial spike detection (~60 minutes apart)
     spikes = []
-    spike_tracker = set()
-
-    for r in readings:
-        if r.glucose < 70:
-            hypo.append({
-                "timestamp": r.timestamp.isoformat(),
-                "glucose": r.glucose
-            })
-            if is_nocturnal(r.timestamp):
-                nocturnal_hypo.append({
-                    "timestamp": r.timestamp.isoformat(),
-                    "glucose": r.glucose
-                })
-
-        elif r.glucose > 180:
-            hyper.append({
-                "timestamp": r.timestamp.isoformat(),
-                "glucose": r.glucose
-            })
-
-    # Improved postprandial spike detection
-    for i in range(len(readings) - 12):  # ~60 minutes apart
-        start = readings[i]
-        end = readings[i + 12]
-        delta = end.glucose - start.glucose
-
-        if not is_postprandial(start.timestamp):
-            continue
-
-        if delta >= 40:  # tighter, more specific spike definition
-            rounded_time = start.timestamp.replace(minute=0, second=0)
-            if rounded_time in spike_tracker:
-                continue
-            spike_tracker.add(rounded_time)
-
-            spikes.append({
-                "start": start.timestamp.isoformat(),
-                "end": end.timestamp.isoformat(),
-                "delta": round(delta, 2)
-            })
+    window = grid.offset(SPIKE_WINDOW_SECONDS)
+    n_windows = len(grid) - window
+    if n_windows > 0:
+        start_src = grid.source[:n_windows]
+        end_src = grid.source[window:]
+        delta = grid.values[window:] - grid.values[:n_windows]  # NaN across gaps
+        start_hours = hours[start_src]
+        candidates = np.flatnonzero(
+            (start_src >= 0) & (end_src >= 0)
+            & (start_hours >= 6) & (start_hours <= 22)
+            & (delta >= SPIKE_MIN_DELTA)  # tighter, more specific spike definition
+        )
+        # Keep only the first spike that starts in each clock hour
+        hour_buckets = series.local_seconds()[start_src[candidates]] // 3600
+        _, first = np.unique(hour_buckets, return_index=True)
+        candidates = candidates[np.sort(first)]
+
+        start_iso = series.isoformat_many(start_src[candidates])
+        end_iso = series.isoformat_many(end_src[candidates])
+        deltas = np.round(delta[candidates], 2).tolist()
+        spikes = [
+            {"start": s, "end": e, "delta": d}
+            for s, e, d in zip(start_iso, end_iso, deltas)
+        ]
 
     # Dawn phenomenon detection: multiple rising events between 2–8 AM
-    dawn_rise_count = 0
-    for i in range(1, len(readings)):
-        prev = readings[i - 1]
-        curr = readings[i]
-        if is_dawn_window(prev.timestamp) and is_dawn_window(curr.timestamp):
-            if curr.glucose - prev.glucose >= 20:
-                dawn_rise_count += 1
-    dawn_present = dawn_rise_count >= 3
-
-    return {
-        "hypoglycemia_events": hypo,
-        "nocturnal_hypoglycemia_events": nocturnal_hypo,
-        "nocturnal_hypoglycemia_episodes": _group_hypo_episodes(nocturnal_hypo),
-        "hyperglycemia_events": hyper,
+    step = grid.offset(DAWN_STEP_SECONDS)
+    src = grid.source[::step]
+    values = grid.values[::step]
+    paired = (src[:-1] >= 0) & (src[1:] >= 0)
+    dawn = dawn_window_mask(hours[src])
+    rises = np.diff(values) >= DAWN_MIN_RISE
+    dawn_rise_count = int(np.count_nonzero(paired & dawn[:-1] & dawn[1:] & rises))
+    dawn_present = dawn_rise_count >= DAWN_MIN_EVENTS
+
+    patterns = {
+        "hypoglycemia_event_count": int(hypo_idx.size),
+        "nocturnal_hypoglycemia_event_count": int(nocturnal_hypo_idx.size),
+        "hyperglycemia_event_count": int(hyper_idx.size),
+        "hypoglycemia_episodes": _group_episodes(series, hypo_idx, "min", grid.interval),
+        "nocturnal_hypoglycemia_episodes": _group_episodes(series, nocturnal_hypo_idx, "min", grid.interval),
+        "hyperglycemia_episodes": _group_episodes(series, hyper_idx, "max", grid.interval),
         "postprandial_spikes": spikes,
         "dawn_phenomenon": dawn_present
     }
+    if include_events:
+        patterns["hypoglycemia_events"] = _events(series, hypo_idx)
+        patterns["nocturnal_hypoglycemia_events"] = _events(series, nocturnal_hypo_idx)
+        patterns["hyperglycemia_events"] = _events(series, hyper_idx)
+    return patterns
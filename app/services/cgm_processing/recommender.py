@@ -25,7 +25,23 @@ def generate_recommendations(context: Dict[str, bool]) -> List[str]:
     if context.get("dawn_present", False):
         recs.append("Dawn phenomenon detected; evaluate basal rate or consider split dose timing.")
 
-    if not recs:
+    if context.get("low_wear_time", False):
+        recs.append("CGM wear time is below 70%; interpret metrics with caution and encourage consistent sensor wear.")
+
+    if context.get("hypo_risk", False):
+        recs.append("Low Blood Glucose Index indicates at least moderate hypoglycemia risk; review insulin doses and hypoglycemia treatment plan.")
+
+    if context.get("hyper_risk", False):
+        recs.append("High Blood Glucose Index indicates high hyperglycemia risk; consider therapy intensification.")
+
+    if context.get("high_gri", False):
+        recs.append("Glycemia Risk Index is in zone D/E; prioritize a prompt therapy review.")
+
+    if context.get("insufficient_data", False):
+        # Too little data to rule anything out, so never advise keeping therapy as is
+        recs.insert(0, "Less than 14 days of CGM data with at least 70% wear; treat these findings as provisional "
+                       "and confirm them with more sensor data before changing therapy.")
+    elif not recs:
         recs.append("Maintain current therapy; no concerning patterns identified.")
 
     return recs
\ No newline at end of file
@@ -0,0 +1,119 @@
+from typing import Dict, Optional
+import numpy as np
+from app.models.cgm_series import CGMSeries
+
+DEFAULT_INTERVAL_SECONDS = 300
+MAX_GRID_DAYS = 800
+
+# International consensus on CGM time-in-range reporting (Battelino 2019)
+SUFFICIENT_WEAR_PERCENT = 70
+SUFFICIENT_DAYS = 14
+
+
+class CGMGrid:
+    """
+    A sorted CGMSeries aligned onto a regular time grid.
+
+    Slot i covers `start + i * interval`. `source[i]` is the index of the
+    reading that landed in the slot (-1 for a gap) and `values[i]` its
+    glucose (NaN for a gap), so a window of W seconds is a fixed offset of
+    W // interval slots regardless of device cadence or sensor dropouts.
+    """
+
+    __slots__ = ("start", "interval", "values", "source")
+
+    def __init__(self, start: int, interval: int, values: np.ndarray, source: np.ndarray):
+        self.start = start
+        self.interval = interval
+        self.values = values
+        self.source = source
+
+    def __len__(self) -> int:
+        return int(self.source.shape[0])
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.source >= 0
+
+    def offset(self, seconds: int) -> int:
+        """Number of slots spanning `seconds` (at least one)."""
+        return max(1, int(round(seconds / self.interval)))
+
+
+def infer_interval(series: CGMSeries) -> int:
+    """Device cadence in seconds: median spacing, rounded to whole minutes."""
+    if len(series) < 2:
+        return DEFAULT_INTERVAL_SECONDS
+    diffs = np.diff(series.timestamps)
+    diffs = diffs[diffs > 0]
+    if diffs.size == 0:
+        return DEFAULT_INTERVAL_SECONDS
+    return max(60, int(round(float(np.median(diffs)) / 60.0)) * 60)
+
+
+def resample_to_grid(series: CGMSeries, interval: Optional[int] = None) -> CGMGrid:
+    """
+    Snaps each reading of a sorted series to its nearest grid slot.
+    When several readings share a slot the latest one wins.
+    """
+    interval = interval or infer_interval(series)
+    if len(series) == 0:
+        return CGMGrid(0, interval, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+
+    start = int(series.timestamps[0])
+    slots = np.rint((series.timestamps - start) / interval).astype(np.int64)
+    n_slots = int(slots[-1]) + 1
+    if n_slots * interval > MAX_GRID_DAYS * 86400:
+        raise ValueError(f"CGM data spans more than {MAX_GRID_DAYS} days")
+
+    source = np.full(n_slots, -1, dtype=np.int64)
+    # Slots are non-decreasing, so the last reading per slot closes each run
+    last = np.flatnonzero(np.append(slots[1:] != slots[:-1], True))
+    source[slots[last]] = last
+
+    values = np.full(n_slots, np.nan, dtype=np.float64)
+    values[slots[last]] = series.glucose[last]
+    return CGMGrid(start, interval, values, source)
+
+
+def wear_metrics(grid: CGMGrid) -> Dict[str, float]:
+    """
+    Wear-time and data-sufficiency figures for a resampled trace.
+    """
+    n_slots = len(grid)
+    if n_slots == 0:
+        return wear_figures(0, 0, grid.interval, 0, 0)
+
+    valid = grid.valid
+    missing = ~valid
+    # Gap runs: rising edges of the missing mask
+    edges = np.diff(np.concatenate(([0], missing.view(np.int8), [0])))
+    gap_starts = np.flatnonzero(edges == 1)
+    gap_ends = np.flatnonzero(edges == -1)
+    longest = int((gap_ends - gap_starts).max()) if gap_starts.size else 0
+
+    return wear_figures(n_slots, int(np.count_nonzero(valid)), grid.interval, int(gap_starts.size), longest)
+
+
+def wear_figures(
+    n_slots: int,
+    valid_slots: int,
+    interval: int,
+    gap_count: int,
+    longest_gap_slots: int
+) -> Dict[str, float]:
+    """Formats wear figures from slot counts (shared with the rolling accumulator)."""
+    return {
+        "wear_time_percent": round(valid_slots / n_slots * 100, 2) if n_slots else 0.0,
+        "days_of_data": round(n_slots * interval / 86400, 2),
+        "sampling_interval_minutes": round(interval / 60, 2),
+        "gap_count": gap_count,
+        "longest_gap_minutes": round(longest_gap_slots * interval / 60, 2)
+    }
+
+
+def is_sufficient(wear: Dict[str, float]) -> bool:
+    return (
+        wear["wear_time_percent"] >= SUFFICIENT_WEAR_PERCENT
+        and wear["days_of_data"] >= SUFFICIENT_DAYS
+    )
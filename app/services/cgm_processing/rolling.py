@@ -0,0 +1,374 @@
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.loader import get_config
+from app.models.cgm_series import CGMSeries
+from app.services.cgm_processing.agp import compute_agp, SUMMARY_BIN_MINUTES
+from app.services.cgm_processing.metrics import (
+    glucose_bands, metrics_from_stats,
+    BAND_54_70, BAND_180_250, BAND_ABOVE_250, BAND_MISSING
+)
+from app.services.cgm_processing.patterns import (
+    SPIKE_WINDOW_SECONDS, SPIKE_MIN_DELTA, DAWN_STEP_SECONDS, DAWN_MIN_RISE, DAWN_MIN_EVENTS
+)
+from app.services.cgm_processing.resample import (
+    DEFAULT_INTERVAL_SECONDS, infer_interval, wear_figures
+)
+from app.services.cgm_processing.summarizer import recommendation_context
+
+EPISODE_GAP_SECONDS = 30 * 60
+
+
+class _EpisodeTracker:
+    """
+    Run-length episodes over a sliding window of out-of-range readings.
+
+    Readings arrive in time order and expire oldest first, so each episode
+    keeps its members in a deque and its nadir/peak in a monotonic deque;
+    both operations are amortized O(1).
+    """
+
+    def __init__(self, extreme: str):
+        self.extreme = extreme
+        self.count = 0
+        self._episodes: Deque[dict] = deque()
+
+    def _beats(self, a: float, b: float) -> bool:
+        return a <= b if self.extreme == "min" else a >= b
+
+    def add(self, ts: int, value: float) -> None:
+        last = self._episodes[-1] if self._episodes else None
+        if last is None or ts - last["members"][-1][0] > EPISODE_GAP_SECONDS:
+            last = {"members": deque(), "extremes": deque()}
+            self._episodes.append(last)
+        last["members"].append((ts, value))
+        extremes = last["extremes"]
+        while extremes and self._beats(value, extremes[-1][1]):
+            extremes.pop()
+        extremes.append((ts, value))
+        self.count += 1
+
+    def expire(self, ts: int) -> None:
+        """Drops the reading at `ts` if it is the oldest tracked member."""
+        if not self._episodes or self._episodes[0]["members"][0][0] != ts:
+            return
+        first = self._episodes[0]
+        first["members"].popleft()
+        if first["extremes"][0][0] == ts:
+            first["extremes"].popleft()
+        if not first["members"]:
+            self._episodes.popleft()
+        self.count -= 1
+
+    def boundaries(self) -> List[int]:
+        return [ts for e in self._episodes for ts in (e["members"][0][0], e["members"][-1][0])]
+
+    def episodes(self, interval: int, fmt) -> List[Dict]:
+        return [
+            {
+                "start": fmt(e["members"][0][0]),
+                "end": fmt(e["members"][-1][0]),
+                f"{self.extreme}_glucose": float(np.round(e["extremes"][0][1], 2)),
+                "duration_minutes": round((e["members"][-1][0] - e["members"][0][0] + interval) / 60.0, 1),
+                "count": len(e["members"])
+            }
+            for e in self._episodes
+        ]
+
+
+class RollingSummary:
+    """
+    Per-patient CGM state that absorbs new readings incrementally.
+
+    Keeps the last `window_days` of readings and, alongside them, every
+    statistic generate_summary needs: Welford mean/variance, band counters,
+    open excursion episodes, grid occupancy and gaps, postprandial spikes
+    and dawn rises. extend() costs O(new + expired readings); summary()
+    formats that state, and only the AGP percentiles re-read the window.
+
+    The grid interval is inferred from the first push and anchored at the
+    first reading ever seen, so on regular-cadence data the summary equals
+    generate_summary over the window. Readings whose timestamp is already
+    in the window are ignored, which makes overlapping pushes safe. A
+    reading older than the newest one triggers a rebuild of the window.
+    """
+
+    def __init__(self, window_days: float = 14, interval: Optional[int] = None):
+        self.window_seconds = int(window_days * 86400)
+        self.interval = interval
+        self.tz_offset: Optional[int] = 0
+        self._anchor: Optional[int] = None
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._readings: Deque[Tuple[int, float, int]] = deque()  # (ts, glucose, band)
+        self._seen = set()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._band_counts = np.zeros(BAND_MISSING + 1, dtype=np.int64)
+        self._hypo = _EpisodeTracker("min")
+        self._nocturnal_hypo = _EpisodeTracker("min")
+        self._hyper = _EpisodeTracker("max")
+        self._slots: Dict[int, Tuple[int, float]] = {}  # slot -> latest (ts, glucose)
+        self._occupied: Deque[int] = deque()
+        self._gaps: Deque[Tuple[int, int]] = deque()  # (first missing slot, length)
+        self._longest: Deque[Tuple[int, int]] = deque()  # monotonic by length
+        self._spikes: Deque[dict] = deque()  # every spike candidate, by start
+        self._dawn: Deque[Tuple[int, int]] = deque()  # (start ts, end slot)
+
+    def __len__(self) -> int:
+        return len(self._readings)
+
+    @property
+    def newest(self) -> Optional[int]:
+        return self._readings[-1][0] if self._readings else None
+
+    # -- ingestion ---------------------------------------------------------
+
+    def extend(self, series: CGMSeries) -> int:
+        """Adds a batch of readings; returns how many were new."""
+        series = series.sorted()
+        if len(series) == 0:
+            return 0
+        if self._anchor is None:
+            self.tz_offset = series.tz_offset
+            self.interval = self.interval or (
+                infer_interval(series) if len(series) > 1 else DEFAULT_INTERVAL_SECONDS
+            )
+            self._anchor = int(series.timestamps[0])
+            self._spike_window = max(1, int(round(SPIKE_WINDOW_SECONDS / self.interval)))
+            self._dawn_step = max(1, int(round(DAWN_STEP_SECONDS / self.interval)))
+
+        timestamps = series.timestamps.tolist()
+        values = series.glucose.astype(np.float64)
+        bands = glucose_bands(values).tolist()
+        values = values.tolist()
+
+        fresh, batch_seen = [], set()
+        for k, ts in enumerate(timestamps):
+            if ts not in self._seen and ts not in batch_seen:
+                batch_seen.add(ts)
+                fresh.append(k)
+        if not fresh:
+            return 0
+        if self._readings and timestamps[fresh[0]] < self.newest:
+            # Late data: merge and replay the window in order
+            merged = sorted(
+                list(self._readings) + [(timestamps[k], values[k], bands[k]) for k in fresh],
+                key=lambda r: r[0]
+            )
+            self._anchor = min(self._anchor, merged[0][0])
+            self._reset()
+            for reading in merged:
+                self._add(*reading)
+        else:
+            for k in fresh:
+                self._add(timestamps[k], values[k], bands[k])
+        self._expire()
+        return len(fresh)
+
+    def _hour(self, ts: int) -> int:
+        return ((ts + (self.tz_offset or 0)) // 3600) % 24
+
+    def _slot(self, ts: int) -> int:
+        return int(round((ts - self._anchor) / self.interval))
+
+    def _add(self, ts: int, value: float, band: int) -> None:
+        self._readings.append((ts, value, band))
+        self._seen.add(ts)
+        self._band_counts[band] += 1
+        if band == BAND_MISSING:
+            return
+
+        # Welford update
+        self._n += 1
+        delta = value - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (value - self._mean)
+
+        hour = self._hour(ts)
+        if band <= BAND_54_70:
+            self._hypo.add(ts, value)
+            if hour >= 22 or hour < 6:
+                self._nocturnal_hypo.add(ts, value)
+        elif band in (BAND_180_250, BAND_ABOVE_250):
+            self._hyper.add(ts, value)
+
+        self._place(ts, value)
+
+    def _place(self, ts: int, value: float) -> None:
+        slot = self._slot(ts)
+        if self._occupied and self._occupied[-1] == slot:
+            # Latest reading wins the slot: retract what the previous
+            # occupant contributed as the end of a spike or dawn rise
+            if self._spikes and self._spikes[-1]["end_slot"] == slot:
+                self._spikes.pop()
+            if self._dawn and self._dawn[-1][1] == slot:
+                self._dawn.pop()
+        else:
+            if self._occupied and slot - self._occupied[-1] > 1:
+                gap = (self._occupied[-1] + 1, slot - self._occupied[-1] - 1)
+                self._gaps.append(gap)
+                while self._longest and self._longest[-1][1] <= gap[1]:
+                    self._longest.pop()
+                self._longest.append(gap)
+            self._occupied.append(slot)
+        self._slots[slot] = (ts, value)
+
+        start = self._slots.get(slot - self._spike_window)
+        if start is not None and 6 <= self._hour(start[0]) <= 22 and value - start[1] >= SPIKE_MIN_DELTA:
+            self._spikes.append({
+                "start_ts": start[0], "end_ts": ts, "end_slot": slot,
+                "bucket": (start[0] + (self.tz_offset or 0)) // 3600,
+                "delta": float(np.round(value - start[1], 2))
+            })
+
+        if slot % self._dawn_step == 0:
+            prev = self._slots.get(slot - self._dawn_step)
+            if (
+                prev is not None
+                and 2 <= self._hour(prev[0]) < 8 and 2 <= self._hour(ts) < 8
+                and value - prev[1] >= DAWN_MIN_RISE
+            ):
+                self._dawn.append((prev[0], slot))
+
+    def _expire(self) -> None:
+        cutoff = self.newest - self.window_seconds
+        while self._readings and self._readings[0][0] <= cutoff:
+            ts, value, band = self._readings.popleft()
+            self._seen.discard(ts)
+            self._band_counts[band] -= 1
+            if band == BAND_MISSING:
+                continue
+
+            # Welford removal
+            if self._n == 1:
+                self._n, self._mean, self._m2 = 0, 0.0, 0.0
+            else:
+                mean = (self._n * self._mean - value) / (self._n - 1)
+                self._m2 -= (value - mean) * (value - self._mean)
+                self._mean = mean
+                self._n -= 1
+
+            self._hypo.expire(ts)
+            self._nocturnal_hypo.expire(ts)
+            self._hyper.expire(ts)
+
+            slot = self._slot(ts)
+            if self._slots.get(slot, (None,))[0] == ts:
+                del self._slots[slot]
+                self._occupied.popleft()
+                first = self._occupied[0] if self._occupied else math.inf
+                while self._gaps and self._gaps[0][0] < first:
+                    self._gaps.popleft()
+                while self._longest and self._longest[0][0] < first:
+                    self._longest.popleft()
+
+            while self._spikes and self._spikes[0]["start_ts"] <= ts:
+                self._spikes.popleft()
+            while self._dawn and self._dawn[0][0] <= ts:
+                self._dawn.popleft()
+
+    # -- output ------------------------------------------------------------
+
+    def _formatter(self, timestamps: List[int]):
+        stamps = CGMSeries(np.array(timestamps, dtype=np.int64), np.zeros(len(timestamps)), self.tz_offset)
+        return dict(zip(timestamps, stamps.isoformat_many()))
+
+    def summary(self, include_agp: bool = False) -> Dict[str, Any]:
+        """Current summary in the generate_summary schema."""
+        if self._n == 0:
+            raise ValueError("No valid CGM glucose data available.")
+
+        std = math.sqrt(max(self._m2, 0.0) / (self._n - 1)) if self._n > 1 else 0.0
+        metrics = metrics_from_stats(self._band_counts, self._mean, std)
+        n_slots = self._slot(self.newest) - self._slot(self._readings[0][0]) + 1
+        metrics.update(wear_figures(
+            n_slots, len(self._occupied), self.interval, len(self._gaps),
+            self._longest[0][1] if self._longest else 0
+        ))
+
+        trackers = (self._hypo, self._nocturnal_hypo, self._hyper)
+        needed = {ts for tracker in trackers for ts in tracker.boundaries()}
+        # Only the first candidate starting in each local clock hour is reported
+        spikes, bucket = [], None
+        for spike in self._spikes:
+            if spike["bucket"] != bucket:
+                spikes.append(spike)
+                bucket = spike["bucket"]
+        needed.update(ts for s in spikes for ts in (s["start_ts"], s["end_ts"]))
+        iso = self._formatter(sorted(needed))
+
+        patterns = {
+            "hypoglycemia_event_count": self._hypo.count,
+            "nocturnal_hypoglycemia_event_count": self._nocturnal_hypo.count,
+            "hyperglycemia_event_count": self._hyper.count,
+            "hypoglycemia_episodes": self._hypo.episodes(self.interval, iso.__getitem__),
+            "nocturnal_hypoglycemia_episodes": self._nocturnal_hypo.episodes(self.interval, iso.__getitem__),
+            "hyperglycemia_episodes": self._hyper.episodes(self.interval, iso.__getitem__),
+            "postprandial_spikes": [
+                {"start": iso[s["start_ts"]], "end": iso[s["end_ts"]], "delta": s["delta"]}
+                for s in spikes
+            ],
+            "dawn_phenomenon": len(self._dawn) >= DAWN_MIN_EVENTS
+        }
+        summary = {"metrics": metrics, "patterns": patterns}
+        if include_agp:
+            summary["agp"] = compute_agp(self.window_series(), SUMMARY_BIN_MINUTES)
+        summary["recommendation_context"] = recommendation_context(metrics, patterns)
+        return summary
+
+    def window_series(self) -> CGMSeries:
+        """The readings currently in the window, as a sorted series."""
+        timestamps = np.fromiter((r[0] for r in self._readings), dtype=np.int64, count=len(self._readings))
+        glucose = np.fromiter((r[1] for r in self._readings), dtype=np.float32, count=len(self._readings))
+        return CGMSeries(timestamps, glucose, self.tz_offset, is_sorted=True)
+
+
+class RollingSummaryRegistry:
+    """Process-wide map of patient_id -> RollingSummary, evicting the least recently used."""
+
+    def __init__(self, window_days: float = 14, max_patients: int = 1000):
+        self.window_days = window_days
+        self.max_patients = max_patients
+        self._patients: "OrderedDict[str, RollingSummary]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, patient_id: str, create: bool = False) -> Optional[RollingSummary]:
+        with self._lock:
+            state = self._patients.get(patient_id)
+            if state is None and create:
+                state = self._patients[patient_id] = RollingSummary(self.window_days)
+                while len(self._patients) > self.max_patients:
+                    self._patients.popitem(last=False)
+            if state is not None:
+                self._patients.move_to_end(patient_id)
+            return state
+
+    def append(self, patient_id: str, series: CGMSeries) -> Tuple[int, RollingSummary]:
+        state = self.get(patient_id, create=True)
+        with state.lock:
+            return state.extend(series), state
+
+
+_registry: Optional[RollingSummaryRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_rolling_registry() -> RollingSummaryRegistry:
+    """Process-wide registry sized from the rolling config."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = get_config()
+            _registry = RollingSummaryRegistry(
+                window_days=config.rolling_window_days,
+                max_patients=config.rolling_max_patients
+            )
+        return _registry
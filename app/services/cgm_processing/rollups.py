@@ -0,0 +1,299 @@
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config.loader import get_config
+from app.utils import jsonio
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.metrics import (
+    glucose_bands, metrics_from_stats, BAND_54_70, BAND_180_250, BAND_ABOVE_250, BAND_MISSING
+)
+from app.services.cgm_processing.resample import resample_to_grid, wear_figures
+
+HISTOGRAM_BUCKET = 10  # mg/dL
+HISTOGRAM_BUCKETS = 41  # last bucket collects >= 400
+EPISODE_GAP_SECONDS = 30 * 60
+
+
+def _excursions(timestamps: np.ndarray) -> dict:
+    """Episode count and boundary times for one day's out-of-range readings."""
+    if timestamps.size == 0:
+        return {"readings": 0, "episodes": 0, "first_ts": None, "last_ts": None}
+    breaks = int(np.count_nonzero(np.diff(timestamps) > EPISODE_GAP_SECONDS))
+    return {
+        "readings": int(timestamps.size),
+        "episodes": breaks + 1,
+        "first_ts": int(timestamps[0]),
+        "last_ts": int(timestamps[-1])
+    }
+
+
+def build_daily_rollups(readings) -> Dict[str, dict]:
+    """
+    Splits a trace into local calendar days and reduces each day to a
+    mergeable partial aggregate: reading count, sum and sum of squared
+    deviations, band counts, a 10 mg/dL histogram, grid occupancy and gap
+    boundaries, and excursion episode boundaries.
+    """
+    series = as_series(readings).sorted()
+    if len(series) == 0:
+        return {}
+
+    glucose = series.glucose.astype(np.float64)
+    bands = glucose_bands(glucose)
+    valid = bands != BAND_MISSING
+    days = series.local_seconds() // 86400
+    grid = resample_to_grid(series)
+    slot_base = int(round(grid.start / grid.interval))
+    occupied_slots = np.flatnonzero(grid.valid)
+    occupant_days = days[grid.source[occupied_slots]]
+
+    rollups = {}
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(series)]))):
+        day = int(days[lo])
+        values = glucose[lo:hi][valid[lo:hi]]
+        if values.size == 0:
+            continue
+        day_bands = bands[lo:hi]
+        timestamps = series.timestamps[lo:hi]
+
+        slots = occupied_slots[occupant_days == day]
+        steps = np.diff(slots) - 1
+        gaps = steps[steps > 0]
+
+        hypo = valid[lo:hi] & (day_bands <= BAND_54_70)
+        hyper = (day_bands == BAND_180_250) | (day_bands == BAND_ABOVE_250)
+        buckets = np.minimum(values // HISTOGRAM_BUCKET, HISTOGRAM_BUCKETS - 1).astype(np.int64)
+
+        rollups[(date(1970, 1, 1) + timedelta(days=day)).isoformat()] = {
+            "count": int(values.size),
+            "sum": float(values.sum()),
+            "m2": float(((values - values.mean()) ** 2).sum()),
+            "bands": np.bincount(day_bands, minlength=BAND_MISSING + 1).tolist(),
+            "histogram": np.bincount(buckets, minlength=HISTOGRAM_BUCKETS).tolist(),
+            "first_ts": int(timestamps[0]),
+            "last_ts": int(timestamps[-1]),
+            "interval": grid.interval,
+            "slots": int(slots.size),
+            "first_slot": slot_base + int(slots[0]) if slots.size else None,
+            "last_slot": slot_base + int(slots[-1]) if slots.size else None,
+            "gap_count": int(gaps.size),
+            "longest_gap": int(gaps.max()) if gaps.size else 0,
+            "hypo": _excursions(timestamps[hypo]),
+            "hyper": _excursions(timestamps[hyper])
+        }
+    return rollups
+
+
+def _merge_excursions(parts: List[dict]) -> dict:
+    merged = {"readings": 0, "episodes": 0, "first_ts": None, "last_ts": None}
+    for part in parts:
+        if not part["readings"]:
+            continue
+        merged["readings"] += part["readings"]
+        merged["episodes"] += part["episodes"]
+        if merged["last_ts"] is not None and part["first_ts"] - merged["last_ts"] <= EPISODE_GAP_SECONDS:
+            merged["episodes"] -= 1  # the episode runs across midnight
+        if merged["first_ts"] is None:
+            merged["first_ts"] = part["first_ts"]
+        merged["last_ts"] = part["last_ts"]
+    return merged
+
+
+def merge_rollups(rollups: Dict[str, dict]) -> Optional[dict]:
+    """
+    Combines day rollups (keyed by ISO day) into one aggregate in O(days).
+    Variance uses the pairwise (Chan) update; gaps and episodes are
+    stitched across day boundaries. Returns None when there is no data.
+    """
+    days = [rollups[day] for day in sorted(rollups)]
+    if not days:
+        return None
+
+    n, mean, m2 = 0, 0.0, 0.0
+    gap_count, longest, last_slot = 0, 0, None
+    for day in days:
+        day_mean = day["sum"] / day["count"]
+        total = n + day["count"]
+        delta = day_mean - mean
+        m2 += day["m2"] + delta * delta * n * day["count"] / total
+        mean += delta * day["count"] / total
+        n = total
+
+        gap_count += day["gap_count"]
+        longest = max(longest, day["longest_gap"])
+        if day["first_slot"] is not None:
+            if last_slot is not None and day["first_slot"] - last_slot > 1:
+                gap_count += 1
+                longest = max(longest, day["first_slot"] - last_slot - 1)
+            last_slot = day["last_slot"]
+
+    slotted = [day for day in days if day["first_slot"] is not None]
+    return {
+        "days": len(days),
+        "count": n,
+        "mean": mean,
+        "m2": m2,
+        "bands": np.sum([day["bands"] for day in days], axis=0).tolist(),
+        "histogram": np.sum([day["histogram"] for day in days], axis=0).tolist(),
+        "interval": days[-1]["interval"],
+        "slots": sum(day["slots"] for day in days),
+        "n_slots": slotted[-1]["last_slot"] - slotted[0]["first_slot"] + 1 if slotted else 0,
+        "gap_count": gap_count,
+        "longest_gap": longest,
+        "hypo": _merge_excursions([day["hypo"] for day in days]),
+        "hyper": _merge_excursions([day["hyper"] for day in days])
+    }
+
+
+def histogram_percentiles(histogram: List[int], percentiles=(10, 25, 50, 75, 90)) -> Dict[str, float]:
+    """Percentile estimates from bucket counts, interpolating linearly within a bucket."""
+    counts = np.asarray(histogram, dtype=np.float64)
+    cumulative = np.cumsum(counts)
+    if cumulative[-1] == 0:
+        return {}
+    estimates = {}
+    for p in percentiles:
+        target = cumulative[-1] * p / 100
+        bucket = int(np.searchsorted(cumulative, target))
+        below = cumulative[bucket - 1] if bucket else 0.0
+        fraction = (target - below) / counts[bucket] if counts[bucket] else 0.0
+        # The top bucket is open-ended; report its lower edge
+        value = min(bucket + fraction, HISTOGRAM_BUCKETS - 1) * HISTOGRAM_BUCKET
+        estimates[f"p{p}"] = round(float(value), 1)
+    return estimates
+
+
+def rollup_metrics(aggregate: dict) -> Dict[str, Any]:
+    """compute_cgm_metrics-compatible metrics (plus episode counts) from merge_rollups output."""
+    std = float(np.sqrt(aggregate["m2"] / (aggregate["count"] - 1))) if aggregate["count"] > 1 else 0.0
+    metrics = metrics_from_stats(np.asarray(aggregate["bands"]), aggregate["mean"], std)
+    metrics.update(wear_figures(
+        aggregate["n_slots"], aggregate["slots"], aggregate["interval"],
+        aggregate["gap_count"], aggregate["longest_gap"]
+    ))
+    metrics.update({
+        "hypoglycemia_episode_count": aggregate["hypo"]["episodes"],
+        "hyperglycemia_episode_count": aggregate["hyper"]["episodes"]
+    })
+    return metrics
+
+
+def metric_deltas(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, float]:
+    """current - previous for every numeric metric both periods report."""
+    return {
+        key: round(value - previous[key], 2)
+        for key, value in current.items()
+        if isinstance(value, (int, float)) and isinstance(previous.get(key), (int, float))
+    }
+
+
+class RollupStore:
+    """
+    Day rollups per patient in a WAL-mode SQLite file. For each day the
+    most complete rollup wins, so re-uploading overlapping exports never
+    double counts a day.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_rollups ("
+                "patient_id TEXT NOT NULL, day TEXT NOT NULL, readings INTEGER NOT NULL, "
+                "data TEXT NOT NULL, PRIMARY KEY (patient_id, day))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, patient_id: str, rollups: Dict[str, dict]) -> None:
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO daily_rollups (patient_id, day, readings, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (patient_id, day) DO UPDATE SET readings = excluded.readings, data = excluded.data "
+                "WHERE excluded.readings >= daily_rollups.readings",
+                [
+                    (patient_id, day, rollup["count"], jsonio.dumps_text(rollup))
+                    for day, rollup in rollups.items()
+                ]
+            )
+
+    def range(self, patient_id: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, dict]:
+        """Day rollups with start <= day <= end (ISO dates, both optional)."""
+        rows = self._conn().execute(
+            "SELECT day, data FROM daily_rollups WHERE patient_id = ? AND day >= ? AND day <= ? ORDER BY day",
+            (patient_id, start or "", end or "9999-12-31")
+        ).fetchall()
+        return {day: jsonio.loads(data) for day, data in rows}
+
+    def latest_day(self, patient_id: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT MAX(day) FROM daily_rollups WHERE patient_id = ?", (patient_id,)
+        ).fetchone()
+        return row[0]
+
+
+def range_metrics(store: RollupStore, patient_id: str, start: Optional[str], end: Optional[str]) -> Optional[dict]:
+    """Metrics for an inclusive day range, or None if the range holds no data."""
+    aggregate = merge_rollups(store.range(patient_id, start, end))
+    if aggregate is None:
+        return None
+    return {
+        "start": start,
+        "end": end,
+        "days_with_data": aggregate["days"],
+        "metrics": rollup_metrics(aggregate),
+        "percentiles": histogram_percentiles(aggregate["histogram"])
+    }
+
+
+def compare_periods(store: RollupStore, patient_id: str, days: int, end: Optional[str] = None) -> Optional[dict]:
+    """
+    The `days` ending at `end` (default: the latest day with data) versus
+    the `days` before them, with per-metric deltas.
+    """
+    end = end or store.latest_day(patient_id)
+    if end is None:
+        return None
+    end_day = date.fromisoformat(end)
+    current_start = end_day - timedelta(days=days - 1)
+    previous_end = current_start - timedelta(days=1)
+    previous_start = previous_end - timedelta(days=days - 1)
+
+    current = range_metrics(store, patient_id, current_start.isoformat(), end_day.isoformat())
+    previous = range_metrics(store, patient_id, previous_start.isoformat(), previous_end.isoformat())
+    return {
+        "current": current,
+        "previous": previous,
+        "delta": metric_deltas(current["metrics"], previous["metrics"]) if current and previous else None
+    }
+
+
+_store: Optional[RollupStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RollupStore(get_config().storage_rollups_path)
+        return _store
+
+
+def record_daily_rollups(patient_id: str, readings: CGMSeries) -> None:
+    """Folds an ingested trace into the patient's stored day rollups."""
+    get_rollup_store().upsert(patient_id, build_daily_rollups(readings))
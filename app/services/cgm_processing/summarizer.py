@@ -1,27 +1,133 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
 from app.models.cgm_point import CGMPoint
-from app.services.cgm_processing.metrics import compute_cgm_metrics
-from app.services.cgm_processing.patterns import detect_all_patterns
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.agp import compute_agp, SUMMARY_BIN_MINUTES
+from app.services.cgm_processing.metrics import glucose_bands, metrics_from_arrays
+from app.services.cgm_processing.patterns import patterns_from_arrays
+from app.services.cgm_processing.variability import (
+    variability_from_arrays, LBGI_MODERATE_RISK, HBGI_HIGH_RISK
+)
+from app.services.cgm_processing.resample import (
+    resample_to_grid, wear_metrics, is_sufficient, SUFFICIENT_WEAR_PERCENT
+)
+from app.utils.datetime_tools import hours_of_day
 
 
-def generate_summary(readings: List[CGMPoint]) -> Dict[str, Any]:
+def generate_summary(
+    readings: Union[CGMSeries, List[CGMPoint]],
+    include_events: bool = False,
+    extended_metrics: bool = False,
+    include_agp: bool = False
+) -> Dict[str, Any]:
     """
     Unifies metrics and event patterns into one structured summary
     ready for interpretation, review, billing, and audit.
+
+    Metrics and patterns share one sorted series and one set of derived
+    arrays (float64 values, threshold bands, local hours, regular grid), so the readings
+    are swept once instead of once per metric and once per detector.
+    Loader output is already ordered and is not re-sorted.
+    Per-reading event lists are only included with include_events.
+    With include_agp, `agp` carries hourly percentile bands; finer bins
+    via agp.agp_report.
+    With extended_metrics, `variability` adds MAGE, CONGA, MODD, LBGI/HBGI,
+    ADRR and GRI (see variability.py) and their risk flags.
     """
-    metrics = compute_cgm_metrics(readings)
-    patterns = detect_all_patterns(readings)
-
-    summary = {
-        "metrics": metrics,
-        "patterns": patterns,
-        "recommendation_context": {
-            "high_cv": metrics["cv"] > 36,
-            "low_tir": metrics["tir_percent"] < 70,
-            "frequent_hypos": len(patterns.get("nocturnal_hypoglycemia_episodes", [])) >= 2,
-            "frequent_spikes": len(patterns["postprandial_spikes"]) >= 3,
-            "dawn_present": patterns["dawn_phenomenon"]
-        }
-    }
+    series = as_series(readings).sorted()
+    glucose = series.glucose.astype(np.float64)
+    bands = glucose_bands(glucose)
+    hours = hours_of_day(series.local_seconds())
+    grid = resample_to_grid(series)
+
+    metrics = metrics_from_arrays(glucose, bands)
+    metrics.update(wear_metrics(grid))
+    patterns = patterns_from_arrays(series, glucose, bands, hours, grid, include_events)
 
+    summary = {"metrics": metrics, "patterns": patterns}
+    if include_agp:
+        summary["agp"] = compute_agp(series, SUMMARY_BIN_MINUTES)
+    variability = None
+    if extended_metrics:
+        variability = summary["variability"] = variability_from_arrays(series, glucose, bands, grid)
+    summary["recommendation_context"] = recommendation_context(metrics, patterns, variability)
     return summary
+
+
+def recommendation_context(
+    metrics: Dict[str, Any],
+    patterns: Dict[str, Any],
+    variability: Optional[Dict[str, Any]] = None
+) -> Dict[str, bool]:
+    """Rule flags consumed by recommender.generate_recommendations."""
+    context = {
+        "high_cv": metrics["cv"] > 36,
+        "low_tir": metrics["tir_percent"] < 70,
+        "frequent_hypos": len(patterns.get("nocturnal_hypoglycemia_episodes", [])) >= 2,
+        "frequent_spikes": len(patterns["postprandial_spikes"]) >= 3,
+        "dawn_present": patterns["dawn_phenomenon"],
+        "low_wear_time": metrics["wear_time_percent"] < SUFFICIENT_WEAR_PERCENT,
+        "insufficient_data": not is_sufficient(metrics)
+    }
+    if variability is not None:
+        context.update({
+            "hypo_risk": variability["lbgi"] >= LBGI_MODERATE_RISK,
+            "hyper_risk": variability["hbgi"] >= HBGI_HIGH_RISK,
+            "high_gri": variability["gri_zone"] in ("D", "E")
+        })
+    return context
+
+
+SUMMARY_VIEWS = ("metrics", "summary", "full")
+# Pattern entries that hold one item per event, episode or spike
+EVENT_LISTS = (
+    "hypoglycemia_episodes",
+    "nocturnal_hypoglycemia_episodes",
+    "hyperglycemia_episodes",
+    "postprandial_spikes",
+    "hypoglycemia_events",
+    "nocturnal_hypoglycemia_events",
+    "hyperglycemia_events"
+)
+
+
+def summary_view(summary: Dict[str, Any], view: str = "full") -> Dict[str, Any]:
+    """
+    Trimmed copy of a summary (the original is not modified):
+    - metrics: metrics and, if present, variability
+    - summary: everything except the event lists, which are replaced by
+      `event_counts`; fetch them with event_page
+    - full: the summary as is
+    """
+    if view not in SUMMARY_VIEWS:
+        raise ValueError(f"Unknown view '{view}'; expected one of {', '.join(SUMMARY_VIEWS)}")
+    if view == "full":
+        return summary
+    if view == "metrics":
+        return {key: summary[key] for key in ("metrics", "variability") if key in summary}
+
+    patterns = summary.get("patterns", {})
+    trimmed = {key: value for key, value in summary.items() if key != "patterns"}
+    trimmed["patterns"] = {key: value for key, value in patterns.items() if key not in EVENT_LISTS}
+    trimmed["event_counts"] = {key: len(patterns[key]) for key in EVENT_LISTS if key in patterns}
+    return trimmed
+
+
+def event_page(summary: Dict[str, Any], kind: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    One page of a summary's event list. Raises ValueError for an unknown
+    kind and KeyError when the list was not stored (per-reading event lists
+    are only kept with include_events).
+    """
+    if kind not in EVENT_LISTS:
+        raise ValueError(f"Unknown event list '{kind}'; expected one of {', '.join(EVENT_LISTS)}")
+    items = summary.get("patterns", {}).get(kind)
+    if items is None:
+        raise KeyError(kind)
+    return {
+        "kind": kind,
+        "items": items[offset:offset + limit],
+        "total": len(items),
+        "offset": offset,
+        "limit": limit
+    }
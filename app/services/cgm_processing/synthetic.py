@@ -0,0 +1,144 @@
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.cgm_series import CGMSeries
+from app.utils import jsonio
+
+DEFAULT_START = datetime(2025, 8, 1, tzinfo=timezone.utc)
+OUTPUT_FORMATS = ("mock", "dexcom")
+
+# Meal times (local hours) and the shape of a postprandial rise
+MEAL_HOURS = (7.5, 12.5, 19.0)
+MEAL_PEAK_MINUTES = 60
+MEAL_RISE_MG_DL = 70
+
+
+def _bumps(minutes: np.ndarray, centers: np.ndarray, amplitudes: np.ndarray, width: float) -> np.ndarray:
+    """Sum of gamma-like bumps (rise, then slower decay) peaking `width` minutes after each center."""
+    signal = np.zeros(minutes.size)
+    span = int(width * 5)
+    step = minutes[1] - minutes[0] if minutes.size > 1 else 5
+    for center, amplitude in zip(centers, amplitudes):
+        lo = np.searchsorted(minutes, center)
+        hi = min(minutes.size, lo + int(span // step) + 1)
+        t = (minutes[lo:hi] - center) / width
+        signal[lo:hi] += amplitude * t * np.exp(1 - t)
+    return signal
+
+
+def generate_trace(
+    days: float = 14,
+    interval_minutes: int = 5,
+    baseline_glucose: float = 120.0,
+    variability: float = 1.0,
+    hypo_per_day: float = 0.3,
+    hyper_per_day: float = 0.5,
+    gaps_per_day: float = 0.2,
+    seed: int = 0,
+    start: datetime = DEFAULT_START,
+    tz_offset: Optional[int] = 0
+) -> CGMSeries:
+    """
+    Deterministic synthetic CGM trace: a daily rhythm around
+    `baseline_glucose` (fasting level) with a dawn rise, three meals,
+    AR(1) sensor noise, Poisson-timed hypo and hyper excursions and sensor
+    gaps. `variability` scales meal size and noise; the same arguments
+    always produce the same series.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(days * 1440 // interval_minutes)
+    minutes = np.arange(n, dtype=np.float64) * interval_minutes
+    local_hours = (minutes / 60 + (tz_offset or 0) / 3600) % 24
+    n_days = int(np.ceil(days))
+
+    glucose = baseline_glucose + 12 * np.sin(2 * np.pi * (local_hours - 10) / 24)
+    glucose += 25 * np.exp(-((local_hours - 6.5) ** 2) / 2)  # dawn rise
+
+    day_starts = np.arange(n_days) * 1440.0
+    meal_times = (day_starts[:, None] + np.array(MEAL_HOURS) * 60).ravel()
+    meal_times += rng.normal(0, 30, meal_times.size)
+    meal_sizes = MEAL_RISE_MG_DL * variability * rng.uniform(0.5, 1.5, meal_times.size)
+    glucose += _bumps(minutes, meal_times, meal_sizes, MEAL_PEAK_MINUTES)
+
+    total_minutes = days * 1440
+    hypo_times = np.sort(rng.uniform(0, total_minutes, rng.poisson(hypo_per_day * days)))
+    hypo_depths = -rng.uniform(60, 110, hypo_times.size)
+    glucose += _bumps(minutes, hypo_times, hypo_depths, 40)
+    hyper_times = np.sort(rng.uniform(0, total_minutes, rng.poisson(hyper_per_day * days)))
+    hyper_heights = rng.uniform(100, 180, hyper_times.size)
+    glucose += _bumps(minutes, hyper_times, hyper_heights, 90)
+
+    # AR(1) noise via an exponential filter of white noise
+    noise = rng.normal(0, 4 * variability, n)
+    phi = 0.9
+    ar = np.empty(n)
+    level = 0.0
+    for k, value in enumerate(noise.tolist()):
+        level = phi * level + value
+        ar[k] = level
+    glucose = np.clip(np.round(glucose + ar), 40, 400)
+
+    keep = np.ones(n, dtype=bool)
+    for gap_start in rng.uniform(0, total_minutes, rng.poisson(gaps_per_day * days)):
+        length = rng.uniform(15, 180)
+        keep &= ~((minutes >= gap_start) & (minutes < gap_start + length))
+
+    timestamps = int(start.timestamp()) + (minutes[keep] * 60).astype(np.int64)
+    return CGMSeries(timestamps, glucose[keep].astype(np.float32), tz_offset=tz_offset, is_sorted=True)
+
+
+def trace_records(series: CGMSeries, fmt: str = "mock"):
+    """JSON-ready payload in one of the layouts load_cgm_file accepts."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    times = series.isoformat_many()
+    values = series.glucose.astype(np.int64).tolist()
+    if fmt == "dexcom":
+        return {
+            "unit": "mg/dL",
+            "records": [{"systemTime": t, "value": v} for t, v in zip(times, values)]
+        }
+    return [{"timestamp": t, "glucose_mg_per_dl": v, "status": "ok"} for t, v in zip(times, values)]
+
+
+def write_trace(series: CGMSeries, path: Path, fmt: str = "mock") -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    jsonio.dump_file(trace_records(series, fmt), path)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic CGM trace")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--days", type=float, default=14)
+    parser.add_argument("--interval", type=int, default=5, help="minutes between readings")
+    parser.add_argument("--baseline", type=float, default=120.0, help="fasting glucose, mg/dL")
+    parser.add_argument("--variability", type=float, default=1.0)
+    parser.add_argument("--hypo-per-day", type=float, default=0.3)
+    parser.add_argument("--hyper-per-day", type=float, default=0.5)
+    parser.add_argument("--gaps-per-day", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="mock")
+    args = parser.parse_args(argv)
+
+    series = generate_trace(
+        days=args.days,
+        interval_minutes=args.interval,
+        baseline_glucose=args.baseline,
+        variability=args.variability,
+        hypo_per_day=args.hypo_per_day,
+        hyper_per_day=args.hyper_per_day,
+        gaps_per_day=args.gaps_per_day,
+        seed=args.seed
+    )
+    write_trace(series, args.output, args.format)
+    print(f"Wrote {len(series)} readings to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from app.models.cgm_point import CGMPoint
+from app.models.cgm_series import CGMSeries, as_series
+from app.services.cgm_processing.metrics import (
+    glucose_bands, BAND_BELOW_54, BAND_54_70, BAND_180_250, BAND_ABOVE_250, BAND_MISSING
+)
+from app.services.cgm_processing.resample import CGMGrid, resample_to_grid
+
+CONGA_HOURS = 1
+
+# Risk thresholds used for recommendation flags (Kovatchev; Klonoff 2023 for GRI)
+LBGI_MODERATE_RISK = 2.5
+HBGI_HIGH_RISK = 9.0
+GRI_ZONES = ((20, "A"), (40, "B"), (60, "C"), (80, "D"))
+
+
+def compute_variability_metrics(readings: Union[CGMSeries, List[CGMPoint]]) -> Dict[str, Any]:
+    """
+    Extended glycemic variability and risk metrics for a CGMSeries
+    (or legacy CGMPoint list); see variability_from_arrays.
+    """
+    series = as_series(readings).sorted()
+    glucose = series.glucose.astype(np.float64)
+    return variability_from_arrays(series, glucose, glucose_bands(glucose), resample_to_grid(series))
+
+
+def _mage(values: np.ndarray, threshold: float) -> float:
+    """
+    Mean Amplitude of Glycemic Excursions in one pass.
+
+    Turning points are found vectorized; a hysteresis walk then keeps only
+    swings of at least `threshold` (1 SD). As in Service's definition,
+    excursions are averaged in the direction of the first one counted.
+    """
+    if values.size < 3 or threshold <= 0:
+        return 0.0
+    values = values[np.append(True, np.diff(values) != 0)]  # flat runs carry no turning point
+    if values.size < 3:
+        return 0.0
+    slopes = np.sign(np.diff(values))
+    turning = np.flatnonzero(slopes[1:] != slopes[:-1]) + 1
+    extrema = values[np.concatenate(([0], turning, [values.size - 1]))].tolist()
+
+    # Until the first qualifying swing, track the running low and high
+    low = high = extrema[0]
+    low_at = high_at = 0
+    for k, value in enumerate(extrema):
+        if value < low:
+            low, low_at = value, k
+        elif value > high:
+            high, high_at = value, k
+        if high - low >= threshold:
+            break
+    else:
+        return 0.0
+    direction = 1 if high_at > low_at else -1
+    anchor, candidate = (low, high) if direction > 0 else (high, low)
+
+    excursions = []  # (direction, amplitude), each confirmed by a reversal of >= threshold
+    for value in extrema[k + 1:]:
+        if (value - candidate) * direction > 0:
+            candidate = value  # the excursion keeps going
+        elif abs(value - candidate) >= threshold:
+            excursions.append((direction, abs(candidate - anchor)))
+            anchor, candidate, direction = candidate, value, -direction
+    if not excursions:
+        return float(abs(candidate - anchor))
+
+    # The first excursion starts from the running extreme of the trace's
+    # opening stretch, not from a confirmed turning point
+    if len(excursions) > 1:
+        excursions = excursions[1:]
+    first_direction = excursions[0][0]
+    return float(np.mean([amplitude for d, amplitude in excursions if d == first_direction]))
+
+
+def _lag_differences(grid: CGMGrid, seconds: int) -> np.ndarray:
+    """Grid value minus the value `seconds` earlier, where both readings exist."""
+    lag = grid.offset(seconds)
+    if len(grid) <= lag:
+        return np.empty(0)
+    diffs = grid.values[lag:] - grid.values[:-lag]
+    return diffs[~np.isnan(diffs)]
+
+
+def _risk(values: np.ndarray):
+    """Kovatchev symmetrized BG risk split into its low and high branches."""
+    f = 1.509 * (np.log(values) ** 1.084 - 5.381)
+    risk = 10 * f * f
+    return np.where(f < 0, risk, 0.0), np.where(f > 0, risk, 0.0)
+
+
+def _gri_zone(gri: float) -> str:
+    for limit, zone in GRI_ZONES:
+        if gri <= limit:
+            return zone
+    return "E"
+
+
+def variability_from_arrays(
+    series: CGMSeries,
+    glucose: np.ndarray,
+    bands: np.ndarray,
+    grid: CGMGrid
+) -> Dict[str, Any]:
+    """
+    MAGE, CONGA-n, MODD, J-index, LBGI/HBGI/ADRR and GRI over the shared
+    arrays of generate_summary. Everything is vectorized over the reading
+    or grid arrays except the MAGE walk over turning points, which is O(n).
+    CONGA and MODD pair readings by grid offset, so gaps are skipped rather
+    than bridged.
+    """
+    valid = bands != BAND_MISSING
+    values = glucose[valid]
+    if values.size == 0:
+        raise ValueError("No valid CGM glucose data available.")
+
+    mean = float(values.mean())
+    sd = float(values.std(ddof=1)) if values.size > 1 else 0.0
+
+    conga = _lag_differences(grid, CONGA_HOURS * 3600)
+    modd = _lag_differences(grid, 86400)
+
+    low_risk, high_risk = _risk(values)
+    days = (series.local_seconds()[valid] // 86400)
+    day_starts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+    adrr = np.maximum.reduceat(low_risk, day_starts) + np.maximum.reduceat(high_risk, day_starts)
+
+    counts = np.bincount(bands, minlength=BAND_MISSING + 1)
+    percent = counts[:BAND_MISSING] / values.size * 100
+    hypo_component = percent[BAND_BELOW_54] + 0.8 * percent[BAND_54_70]
+    hyper_component = percent[BAND_ABOVE_250] + 0.5 * percent[BAND_180_250]
+    gri = min(100.0, float(3.0 * hypo_component + 1.6 * hyper_component))
+
+    return {
+        "mage": round(_mage(grid.values[grid.valid], sd), 2),
+        f"conga_{CONGA_HOURS}": round(float(conga.std(ddof=1)), 2) if conga.size > 1 else None,
+        "modd": round(float(np.abs(modd).mean()), 2) if modd.size else None,
+        "j_index": round(0.001 * (mean + sd) ** 2, 2),
+        "lbgi": round(float(low_risk.mean()), 2),
+        "hbgi": round(float(high_risk.mean()), 2),
+        "adrr": round(float(adrr.mean()), 2),
+        "gri": round(gri, 2),
+        "gri_hypo_component": round(float(hypo_component), 2),
+        "gri_hyper_component": round(float(hyper_component), 2),
+        "gri_zone": _gri_zone(gri)
+    }
@@ -1,16 +1,81 @@
+import asyncio
+import time
+from contextlib import nullcontext
 from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 from app.services.cgm_processing.loader import load_cgm_file
 from app.services.cgm_processing.summarizer import generate_summary
 from app.services.cgm_processing.recommender import generate_recommendations
-from app.services.llm.generator import generate_interpretation
+from app.services.cgm_processing.rollups import build_daily_rollups, get_rollup_store
+from app.services.llm.generator import generate_interpretation, stream_interpretation
 from app.services.workflow.editor import save_interpretation
-from app.models.cgm_point import CGMPoint
+from app.services.workflow.concurrency import InFlightLimiter, run_cpu_on_upload
+from app.utils.telemetry import record_stage, stage_timer
 
 
-def run_interpretation_workflow(
+def summarize_upload(
+    source: Union[Path, bytes, BinaryIO],
+    include_events: bool = False,
+    extended_metrics: bool = False,
+    include_agp: bool = False
+) -> Tuple[dict, Dict[str, dict], List[Tuple[str, float]]]:
+    """
+    Load + summarize + day rollups; runs on the CPU pool, usually in a
+    worker process, so stage timings are returned rather than recorded.
+    """
+    timings = []
+    start = time.perf_counter()
+    readings = load_cgm_file(source)
+    timings.append(("parse", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    summary = generate_summary(readings, include_events, extended_metrics, include_agp)
+    timings.append(("summarize", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    rollups = build_daily_rollups(readings)
+    timings.append(("rollups", time.perf_counter() - start))
+    return summary, rollups, timings
+
+
+async def summarize_patient_upload(
+    patient_id: str,
+    file_path: Union[Path, BinaryIO],
+    include_events: bool = False,
+    extended_metrics: bool = False,
+    include_agp: bool = False
+) -> dict:
+    """Runs summarize_upload on the CPU pool and stores the day rollups."""
+    summary, rollups, timings = await run_cpu_on_upload(
+        summarize_upload, file_path, include_events, extended_metrics, include_agp
+    )
+    for stage, seconds in timings:
+        record_stage(stage, seconds)
+    await asyncio.to_thread(get_rollup_store().upsert, patient_id, rollups)
+    return summary
+
+
+def _save(patient_id: str, provider_id: str, summary: dict, interpretation_text: str) -> str:
+    with stage_timer("save"):
+        return save_interpretation(
+            patient_id=patient_id,
+            summary=summary,
+            interpretation_text=interpretation_text,
+            provider_id=provider_id,
+            editable=True,
+            finalized=False
+        )
+
+
+async def run_interpretation_workflow(
     patient_id: str,
     provider_id: str,
-    file_path: Path
+    file_path: Union[Path, BinaryIO],
+    on_stage: Optional[Callable[[str], None]] = None,
+    include_events: bool = False,
+    extended_metrics: bool = False,
+    limiter: Optional[InFlightLimiter] = None,
+    include_agp: bool = False
 ) -> dict:
     """
     Full pipeline:
@@ -20,30 +85,45 @@ def run_interpretation_workflow(
     - Call LLM for interpretation
     - Save editable version
 
+    `on_stage`, if given, is called with "parsing" (load and summarize),
+    "summarizing" (recommendations), "generating" and "saving" as each
+    step starts (used for job status).
+    `include_events` keeps the per-reading event lists in the summary and
+    `extended_metrics` adds the variability/risk block (variability.py)
+    and `include_agp` the hourly AGP bands.
+    Each step is timed into the cgm_stage_seconds histogram. Parsing and
+    summarizing run on the bounded CPU pool (see concurrency.py) and
+    storage writes on threads, so the event loop stays free for other
+    requests.
+    `file_path` may also be an open binary file (see load_cgm_file).
+    With a `limiter`, a slot is held only while parsing and summarizing
+    (ServerBusyError if none is free), not during the LLM call.
+
     Returns:
         dict with summary, interpretation_text, interpretation_id
     """
-    # Step 1: Load data
-    readings: list[CGMPoint] = load_cgm_file(file_path)
+    report = on_stage or (lambda stage: None)
 
-    # Step 2: Summarize
-    summary = generate_summary(readings)
+    # Steps 1-2: Load data and summarize (one trip to the CPU pool)
+    report("parsing")
+    with limiter.slot() if limiter else nullcontext():
+        summary = await summarize_patient_upload(
+            patient_id, file_path, include_events, extended_metrics, include_agp
+        )
+    report("summarizing")
 
     # Step 3: Get rule-based suggestions
-    recommendations = generate_recommendations(summary["recommendation_context"])
+    with stage_timer("recommend"):
+        recommendations = generate_recommendations(summary["recommendation_context"])
 
     # Step 4: Call LLM
-    interpretation_text = generate_interpretation(summary, recommendations)
+    report("generating")
+    with stage_timer("llm"):
+        interpretation_text = await generate_interpretation(summary, recommendations)
 
     # Step 5: Save editable version
-    interpretation_id = save_interpretation(
-        patient_id=patient_id,
-        summary=summary,
-        interpretation_text=interpretation_text,
-        provider_id=provider_id,
-        editable=True,
-        finalized=False
-    )
+    report("saving")
+    interpretation_id = await asyncio.to_thread(_save, patient_id, provider_id, summary, interpretation_text)
 
     return {
         "interpretation_id": interpretation_id,
@@ -51,3 +131,42 @@ def run_interpretation_workflow(
         "recommendations": recommendations,
         "interpretation_text": interpretation_text
     }
+
+
+async def stream_interpretation_workflow(
+    patient_id: str,
+    provider_id: str,
+    file_path: Union[Path, BinaryIO],
+    include_events: bool = False,
+    extended_metrics: bool = False,
+    include_agp: bool = False
+) -> AsyncIterator[dict]:
+    """
+    Streaming variant of run_interpretation_workflow.
+
+    Yields events as soon as each piece is ready:
+    - {"event": "summary", "data": {summary, recommendations}}
+    - {"event": "token", "data": {"text": ...}} per LLM fragment
+    - {"event": "done", "data": {interpretation_id, interpretation_text}}
+    The interpretation is saved only once the LLM stream has completed.
+    """
+    summary = await summarize_patient_upload(patient_id, file_path, include_events, extended_metrics, include_agp)
+    with stage_timer("recommend"):
+        recommendations = generate_recommendations(summary["recommendation_context"])
+
+    yield {"event": "summary", "data": {"summary": summary, "recommendations": recommendations}}
+
+    # Timed up to the last fragment, including time the client takes to read them
+    parts = []
+    with stage_timer("llm_stream"):
+        async for fragment in stream_interpretation(summary, recommendations):
+            parts.append(fragment)
+            yield {"event": "token", "data": {"text": fragment}}
+
+    interpretation_text = "".join(parts).strip()
+    interpretation_id = await asyncio.to_thread(_save, patient_id, provider_id, summary, interpretation_text)
+
+    yield {
+        "event": "done",
+        "data": {"interpretation_id": interpretation_id, "interpretation_text": interpretation_text}
+    }
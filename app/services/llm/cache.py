@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from app.config.loader import get_config
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of LLM completions.
+
+    Entries are keyed by a SHA-256 of (model, temperature, max_tokens, prompt).
+    The memory tier is a bounded LRU; the optional disk tier keeps one text
+    file per key and evicts the oldest files once `disk_max_bytes` is
+    exceeded. Both tiers honour `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = None,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 50 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk_index: Optional["OrderedDict[str, Tuple[int, float]]"] = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        payload = json.dumps([model, temperature, max_tokens, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, value[0], value[1])
+            return value[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now)
+            self._disk_put(key, value, now)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index or ()),
+                "disk_bytes": self._disk_bytes
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir is not None:
+                for key in list(self._load_disk_index()):
+                    self._disk_remove(key)
+
+    # -- memory tier -------------------------------------------------------
+
+    def _memory_put(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -- disk tier ---------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.txt"
+
+    def _load_disk_index(self) -> "OrderedDict[str, Tuple[int, float]]":
+        """Scans the cache directory once; afterwards the index is kept in memory."""
+        if self._disk_index is None:
+            self._disk_index = OrderedDict()
+            self._disk_bytes = 0
+            if self.disk_dir.exists():
+                entries = []
+                for path in self.disk_dir.glob("*.txt"):
+                    st = path.stat()
+                    entries.append((st.st_mtime, path.stem, st.st_size))
+                for mtime, key, size in sorted(entries):
+                    self._disk_index[key] = (size, mtime)
+                    self._disk_bytes += size
+        return self._disk_index
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        if self.disk_dir is None:
+            return None
+        index = self._load_disk_index()
+        entry = index.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[1], now):
+            self._disk_remove(key)
+            return None
+        try:
+            return self._path(key).read_text(encoding="utf-8"), entry[1]
+        except FileNotFoundError:
+            self._disk_remove(key)
+            return None
+
+    def _disk_put(self, key: str, value: str, created: float) -> None:
+        if self.disk_dir is None:
+            return
+        data = value.encode("utf-8")
+        if len(data) > self.disk_max_bytes:
+            return
+        index = self._load_disk_index()
+        if key in index:
+            self._disk_remove(key)
+
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, self._path(key))
+        index[key] = (len(data), created)
+        self._disk_bytes += len(data)
+
+        # Evict expired entries, then the oldest ones, until within budget
+        for old_key, (_, old_created) in list(index.items()):
+            if self._disk_bytes <= self.disk_max_bytes and not self._expired(old_created, created):
+                break
+            if old_key != key:
+                self._disk_remove(old_key)
+
+    def _disk_remove(self, key: str) -> None:
+        size, _ = self._disk_index.pop(key)
+        self._disk_bytes -= size
+        self._path(key).unlink(missing_ok=True)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache configured from llm.cache (None when disabled)."""
+    global _response_cache
+    config = get_config()
+    if _response_cache is None and config.llm_cache_enabled:
+        _response_cache = ResponseCache(
+            max_entries=config.llm_cache_max_entries,
+            ttl_seconds=config.llm_cache_ttl_seconds,
+            disk_dir=config.llm_cache_dir,
+            disk_max_bytes=config.llm_cache_disk_max_bytes
+        )
+    return _response_cache
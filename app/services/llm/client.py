@@ -1,14 +1,156 @@
-import os
-from openai import OpenAI
-from app.config.loader import Config
+import asyncio
+import random
+import threading
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from app.config.loader import get_config
+from app.utils.telemetry import LLM_REQUESTS, record_llm_usage
 
-# Load config
-config = Config()
+# openai (and httpx behind it) is imported on first use, so the metrics,
+# loader and batch code can be imported without it or an API key
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
-client = OpenAI(
-    base_url=config.llm_base_url,
-    api_key=config.llm_api_key
-)
+_client: Optional["OpenAI"] = None
+_client_lock = threading.Lock()
 
-def get_openai_client():
-    return client
+# One pooled async client + concurrency gate per running event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    """Transient failures worth retrying (APITimeoutError subclasses APIConnectionError)."""
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+    return (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def get_openai_client() -> "OpenAI":
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+            config = get_config()
+            _client = OpenAI(base_url=config.llm_base_url, api_key=config.llm_api_key)
+        return _client
+
+
+def _build_async_client() -> "AsyncOpenAI":
+    import httpx
+    from openai import AsyncOpenAI
+
+    config = get_config()
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.llm_max_connections,
+            max_keepalive_connections=config.llm_max_keepalive
+        ),
+        timeout=httpx.Timeout(config.llm_timeout, connect=config.llm_connect_timeout)
+    )
+    return AsyncOpenAI(
+        base_url=config.llm_base_url,
+        api_key=config.llm_api_key,
+        http_client=http_client,
+        max_retries=0  # retries are handled by create_chat_completion
+    )
+
+
+def _loop_state() -> tuple:
+    loop = asyncio.get_running_loop()
+    state = _async_clients.get(loop)
+    if state is None:
+        state = (_build_async_client(), asyncio.Semaphore(get_config().llm_max_concurrency))
+        _async_clients[loop] = state
+    return state
+
+
+def get_async_openai_client() -> "AsyncOpenAI":
+    """
+    Returns the pooled AsyncOpenAI client bound to the running event loop.
+    """
+    return _loop_state()[0]
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    config = get_config()
+    return random.uniform(0, min(config.llm_backoff_max, config.llm_backoff_base * (2 ** attempt)))
+
+
+async def create_chat_completion(**kwargs):
+    """
+    Awaitable chat completion on the shared pool.
+
+    At most `llm.max_concurrency` calls are in flight per event loop; each
+    call gets the configured timeout and is retried on transient errors
+    with jittered exponential backoff.
+    """
+    async_client, semaphore = _loop_state()
+    max_retries = get_config().llm_max_retries
+    attempt = 0
+    while True:
+        async with semaphore:
+            try:
+                response = await async_client.chat.completions.create(**kwargs)
+            except retryable_errors():
+                if attempt >= max_retries:
+                    LLM_REQUESTS.inc(mode="complete", outcome="error")
+                    raise
+                LLM_REQUESTS.inc(mode="complete", outcome="retry")
+            except Exception:
+                LLM_REQUESTS.inc(mode="complete", outcome="error")
+                raise
+            else:
+                LLM_REQUESTS.inc(mode="complete", outcome="ok")
+                record_llm_usage(getattr(response, "usage", None))
+                return response
+        # Back off outside the semaphore so waiting calls can proceed
+        await asyncio.sleep(_backoff_delay(attempt))
+        attempt += 1
+
+
+async def stream_chat_completion(**kwargs) -> AsyncIterator[str]:
+    """
+    Streams completion text deltas as they arrive.
+
+    The concurrency slot is held for the whole stream. Opening the stream
+    is retried like create_chat_completion; once tokens have been yielded
+    a failure propagates to the caller.
+    """
+    async_client, semaphore = _loop_state()
+    max_retries = get_config().llm_max_retries
+    attempt = 0
+    async with semaphore:
+        while True:
+            try:
+                stream = await async_client.chat.completions.create(stream=True, **kwargs)
+                break
+            except retryable_errors():
+                if attempt >= max_retries:
+                    LLM_REQUESTS.inc(mode="stream", outcome="error")
+                    raise
+                LLM_REQUESTS.inc(mode="stream", outcome="retry")
+            except Exception:
+                LLM_REQUESTS.inc(mode="stream", outcome="error")
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+            attempt += 1
+
+        try:
+            async for chunk in stream:
+                # Providers that report usage on streams send it with the last chunk
+                record_llm_usage(getattr(chunk, "usage", None))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            LLM_REQUESTS.inc(mode="stream", outcome="error")
+            raise
+        LLM_REQUESTS.inc(mode="stream", outcome="ok")
+
+
+async def aclose_async_client() -> None:
+    """Closes the pool bound to the running event loop (app shutdown)."""
+    state = _async_clients.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].close()
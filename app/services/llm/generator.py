@@ -1,19 +1,72 @@
-from app.services.llm.client import get_openai_client
+from typing import AsyncIterator
+from app.config.loader import get_config
+from app.services.llm.cache import ResponseCache, get_response_cache
+from app.services.llm.client import create_chat_completion, stream_chat_completion
 from app.services.llm.prompt import build_prompt
+from app.utils.telemetry import CACHE_LOOKUPS
 
-def generate_interpretation(summary: dict, recommendations: list[str]) -> str:
+TEMPERATURE = 0.2
+MAX_TOKENS = 500
+
+
+async def generate_interpretation(summary: dict, recommendations: list[str]) -> str:
     """
     Sends the structured CGM summary + recommendations to GPT-4.1
     and returns the human-readable interpretation.
+    Identical prompts are served from the response cache.
     """
     prompt = build_prompt(summary, recommendations)
+    model = get_config().llm_model
+
+    cache = get_response_cache()
+    key = ResponseCache.make_key(model, TEMPERATURE, MAX_TOKENS, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        CACHE_LOOKUPS.inc(cache="llm_response", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
 
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="openai/gpt-4.1",
+    response = await create_chat_completion(
+        model=model,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=500
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS
     )
 
-    return response.choices[0].message.content.strip()
+    text = response.choices[0].message.content.strip()
+    if cache is not None and text:
+        cache.put(key, text)
+    return text
+
+
+async def stream_interpretation(summary: dict, recommendations: list[str]) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_interpretation: yields text fragments as
+    the model produces them (a cached interpretation arrives as one fragment).
+    The full text is cached once the stream completes.
+    """
+    prompt = build_prompt(summary, recommendations)
+    model = get_config().llm_model
+
+    cache = get_response_cache()
+    key = ResponseCache.make_key(model, TEMPERATURE, MAX_TOKENS, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        CACHE_LOOKUPS.inc(cache="llm_response", result="miss" if cached is None else "hit")
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    async for delta in stream_chat_completion(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS
+    ):
+        parts.append(delta)
+        yield delta
+
+    text = "".join(parts).strip()
+    if cache is not None and text:
+        cache.put(key, text)
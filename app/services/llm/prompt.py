@@ -1,11 +1,30 @@
 from typing import Dict, Any
 
+
+def _event_count(patterns: Dict[str, Any], name: str) -> int:
+    """Reading count for an event type; older summaries only carry the per-reading list."""
+    return patterns.get(f"{name}_count", len(patterns.get(f"{name}s", [])))
+
+
 def build_prompt(summary: Dict[str, Any], recommendations: list[str]) -> str:
     """
     Builds a structured prompt for GPT-4.1 given CGM summary + recs.
     """
     metrics = summary.get("metrics", {})
     patterns = summary.get("patterns", {})
+    variability = summary.get("variability")
+    variability_lines = ""
+    if variability:
+        variability_lines = f"""
+Glycemic Variability and Risk:
+- MAGE: {variability.get('mage')} mg/dL
+- CONGA-1: {variability.get('conga_1')} mg/dL
+- MODD: {variability.get('modd')} mg/dL
+- J-index: {variability.get('j_index')}
+- LBGI / HBGI: {variability.get('lbgi')} / {variability.get('hbgi')}
+- ADRR: {variability.get('adrr')}
+- Glycemia Risk Index: {variability.get('gri')} (zone {variability.get('gri_zone')})
+"""
     
     prompt = f"""
 You are an expert endocrinologist interpreting Continuous Glucose Monitoring (CGM) data.
@@ -19,14 +38,17 @@ Metrics:
 - Time in Range (70–180 mg/dL): {metrics.get('tir_percent')}%
 - Time Below Range (<70): {metrics.get('below_70_percent')}%
 - Time Above Range (>180): {metrics.get('above_180_percent')}%
+- CGM Wear Time: {metrics.get('wear_time_percent')}% over {metrics.get('days_of_data')} days
 
 Patterns Detected:
 - Dawn Phenomenon: {patterns.get('dawn_phenomenon')}
-- No. of Hypoglycemia Events: {len(patterns.get('hypoglycemia_events', []))}
-- No. of Nocturnal Hypo Events: {len(patterns.get('nocturnal_hypoglycemia_events', []))}
-- No. of Hyperglycemia Events: {len(patterns.get('hyperglycemia_events', []))}
+- No. of Hypoglycemia Events: {_event_count(patterns, 'hypoglycemia_event')}
+- No. of Nocturnal Hypo Events: {_event_count(patterns, 'nocturnal_hypoglycemia_event')}
+- No. of Hyperglycemia Events: {_event_count(patterns, 'hyperglycemia_event')}
+- Hypoglycemia Episodes: {len(patterns.get('hypoglycemia_episodes', []))}
+- Hyperglycemia Episodes: {len(patterns.get('hyperglycemia_episodes', []))}
 - Postprandial Spikes: {len(patterns.get('postprandial_spikes', []))}
-
+{variability_lines}
 Recommendations (if needed):
 - {chr(10).join(f"- {rec}" for rec in recommendations)}
 
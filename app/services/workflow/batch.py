@@ -0,0 +1,96 @@
+import asyncio
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.config.loader import get_config
+from app.services.cgm_processing.loader import is_supported_upload
+from app.services.cgm_processing.recommender import generate_recommendations
+from app.services.controller import summarize_patient_upload
+from app.services.llm.generator import generate_interpretation
+from app.services.workflow.editor import save_interpretation
+from app.utils.json_stream import PayloadTooLargeError
+
+
+def extract_archive(
+    archive_path: Path,
+    dest_dir: Path,
+    max_members: Optional[int] = None
+) -> List[Tuple[str, Path]]:
+    """
+    Extracts the CGM export members (.json/.csv/.gz) of a zip archive into dest_dir.
+    Member paths are flattened to their file names; the member count
+    (against max_members) and sizes (against ingest.max_bytes) are checked
+    before anything is written.
+    """
+    max_bytes = get_config().ingest_max_bytes
+    extracted = []
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and is_supported_upload(Path(info.filename).name)
+            and not Path(info.filename).name.startswith(".")
+        ]
+        if max_members is not None and len(members) > max_members:
+            raise PayloadTooLargeError(f"archive holds {len(members)} files; at most {max_members} allowed")
+        for info in members:
+            name = Path(info.filename).name
+            if max_bytes is not None and info.file_size > max_bytes:
+                raise ValueError(f"{name}: archive member exceeds the {max_bytes} byte limit")
+        for info in members:
+            name = Path(info.filename).name
+            target = dest_dir / f"{len(extracted)}_{name}"
+            with archive.open(info) as src, open(target, "wb") as out:
+                while chunk := src.read(1024 * 1024):
+                    out.write(chunk)
+            extracted.append((name, target))
+    return extracted
+
+
+async def run_batch_interpretation(items: List[Dict]) -> List[Dict]:
+    """
+    Interprets many uploads at once.
+
+    Each item is {"filename", "path", "patient_id", "provider_id"}.
+    Summaries run on the shared CPU pool (see concurrency.py), at most
+    batch.workers of them at a time so one batch cannot queue ahead of
+    every other upload; LLM calls are issued with at most
+    batch.llm_concurrency in flight. One item failing does not affect the
+    others; results keep the input order.
+    """
+    config = get_config()
+    cpu_slots = asyncio.Semaphore(config.batch_workers)
+    llm_slots = asyncio.Semaphore(config.batch_llm_concurrency)
+
+    async def interpret(item: Dict) -> Dict:
+        result = {
+            "filename": item["filename"],
+            "patient_id": item["patient_id"],
+            "provider_id": item["provider_id"]
+        }
+        try:
+            async with cpu_slots:
+                summary = await summarize_patient_upload(item["patient_id"], Path(item["path"]))
+            recommendations = generate_recommendations(summary["recommendation_context"])
+            async with llm_slots:
+                interpretation_text = await generate_interpretation(summary, recommendations)
+            result["interpretation_id"] = await asyncio.to_thread(
+                save_interpretation,
+                patient_id=item["patient_id"],
+                summary=summary,
+                interpretation_text=interpretation_text,
+                provider_id=item["provider_id"],
+                editable=True,
+                finalized=False
+            )
+            result.update({
+                "status": "ok",
+                "summary": summary,
+                "recommendations": recommendations,
+                "interpretation_text": interpretation_text
+            })
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+        return result
+
+    return await asyncio.gather(*(interpret(item) for item in items))
@@ -1,27 +1,61 @@
-import json
-from pathlib import Path
+import threading
 from datetime import datetime
-from app.config.loader import Config
+from typing import Optional
+from app.config.loader import get_config
+from app.services.workflow.ledger import BillingLedger, read_legacy_billing_files
 
-config = Config()
-BILLING_LOG_DIR = config.billing_log_dir
+_ledger: Optional[BillingLedger] = None
+_ledger_lock = threading.Lock()
 
-def trigger_cpt_95251(patient_id: str, provider_id: str, duration_days: int) -> str:
+
+def get_billing_ledger() -> BillingLedger:
+    """
+    Process-wide ledger under billing.ledger_dir. The first time it is
+    created, per-event JSON files from paths.billing_log_dir are imported so
+    month-end queries cover the whole history.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            config = get_config()
+            is_new = not any(config.billing_ledger_dir.glob("segment-*.jsonl"))
+            _ledger = BillingLedger(
+                config.billing_ledger_dir,
+                segment_max_bytes=config.billing_segment_max_bytes,
+                fsync=config.billing_fsync
+            )
+            if is_new:
+                _ledger.import_records(read_legacy_billing_files(config.billing_log_dir))
+        return _ledger
+
+
+def trigger_cpt_95251(
+    patient_id: str,
+    provider_id: str,
+    duration_days: int,
+    interpretation_id: Optional[str] = None
+) -> str:
     """
     Logs a billing event if criteria are met.
+    Idempotent per interpretation_id: a retried finalize returns the
+    billing_id of the event already recorded instead of billing twice.
     """
     record = {
         "timestamp": datetime.utcnow().isoformat(),
         "patient_id": patient_id,
         "provider_id": provider_id,
         "cpt_code": "95251",
-        "duration_days": duration_days
+        "duration_days": duration_days,
+        "interpretation_id": interpretation_id
     }
 
-    record_id = f"{patient_id}_{datetime.utcnow().timestamp()}"
-    path = BILLING_LOG_DIR / f"{record_id}.json"
+    record, _ = get_billing_ledger().append(record)
+    return record["billing_id"]
 
-    with open(path, "w") as f:
-        json.dump(record, f, indent=2)
 
-    return record_id
+def shutdown_billing_ledger() -> None:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is not None:
+            _ledger.close()
+            _ledger = None
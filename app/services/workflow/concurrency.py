@@ -0,0 +1,133 @@
+import asyncio
+import functools
+import io
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+from app.config.loader import get_config
+from app.services.cgm_processing.loader import spool_upload
+from app.utils.telemetry import REQUESTS_SHED
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when the in-flight limit is reached; the API answers 429."""
+
+
+class InFlightLimiter:
+    """
+    Counts heavy requests (uploads) in flight and refuses new ones once
+    `limit` are admitted (None = unlimited). Admitted requests queue for
+    the CPU pool, so the limit also caps that queue.
+    """
+
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit is not None and self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def acquire(self) -> None:
+        """Takes a slot or raises ServerBusyError; pair with release()."""
+        if not self.try_acquire():
+            REQUESTS_SHED.inc()
+            raise ServerBusyError(f"Server is busy ({self.limit} uploads in flight); retry later.")
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_limiter: Optional[InFlightLimiter] = None
+_cpu_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def get_in_flight_limiter() -> InFlightLimiter:
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = InFlightLimiter(get_config().concurrency_max_in_flight)
+        return _limiter
+
+
+def get_cpu_executor() -> Executor:
+    """
+    Bounded pool for parsing and summarizing uploads off the event loop.
+    Spawned worker processes by default: parsing is mostly
+    Python code that would otherwise hold the GIL against the event loop.
+    concurrency.cpu_executor: "thread" keeps the work in-process.
+    """
+    global _cpu_executor
+    config = get_config()
+    with _lock:
+        if _cpu_executor is None:
+            if config.concurrency_cpu_executor == "thread":
+                _cpu_executor = ThreadPoolExecutor(
+                    max_workers=config.concurrency_cpu_workers,
+                    thread_name_prefix="cgm-cpu"
+                )
+            else:
+                _cpu_executor = ProcessPoolExecutor(
+                    max_workers=config.concurrency_cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return _cpu_executor
+
+
+def shutdown_cpu_executor() -> None:
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs fn on the CPU pool. fn and its arguments must be picklable
+    (module-level function; bytes or paths rather than open files) and fn
+    must not rely on in-process state.
+    """
+    call = functools.partial(fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_cpu_executor(), call)
+
+
+async def run_cpu_on_upload(fn: Callable[..., Any], source: Any, *args) -> Any:
+    """
+    run_cpu(fn, source, *args) for a path or an open upload. Open uploads
+    go to a thread pool as they are; with worker processes, small ones
+    (concurrency.inline_max_bytes) are parsed in-process on a thread and
+    only larger ones are copied to a temporary file for the worker to stream.
+    """
+    if not hasattr(source, "read") or not isinstance(get_cpu_executor(), ProcessPoolExecutor):
+        return await run_cpu(fn, source, *args)
+    if _remaining_bytes(source) <= get_config().concurrency_inline_max_bytes:
+        return await asyncio.to_thread(fn, source, *args)
+    path = await asyncio.to_thread(spool_upload, source)
+    try:
+        return await run_cpu(fn, path, *args)
+    finally:
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+
+
+def _remaining_bytes(fp: BinaryIO) -> int:
+    start = fp.tell()
+    size = fp.seek(0, io.SEEK_END) - start
+    fp.seek(start)
+    return size
@@ -0,0 +1,113 @@
+import asyncio
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.config.loader import get_config
+from app.utils.telemetry import CACHE_LOOKUPS
+
+
+def upload_key(patient_id: str, provider_id: str, upload_digest: str, **options) -> str:
+    """
+    Identity of an interpretation request: the patient, the requesting
+    provider (each gets their own saved interpretation), the upload bytes
+    and any options that change the summary (e.g. include_events).
+    """
+    flags = ",".join(f"{name}={value}" for name, value in sorted(options.items()))
+    identity = f"{patient_id}\0{provider_id}\0{upload_digest}\0{flags}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+# Result handed to followers when the leading run was cancelled
+_ABANDONED = object()
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution with a short-lived result memo.
+
+    Concurrent calls with the same key share one in-flight run; calls that
+    arrive within `ttl_seconds` after a successful run get a copy of its
+    result without running again. Failures are never memoized. If the
+    leading call is cancelled, a waiting call re-runs the work instead.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._recent: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self.coalesced = 0
+        self.replayed = 0
+
+    def recent(self, key: str) -> Optional[dict]:
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._recent[key]
+            return None
+        self._recent.move_to_end(key)
+        return copy.deepcopy(entry[1])
+
+    def _remember(self, key: str, result: dict) -> None:
+        self._recent[key] = (time.monotonic(), copy.deepcopy(result))
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[dict]]) -> dict:
+        while True:
+            cached = self.recent(key)
+            if cached is not None:
+                self.replayed += 1
+                CACHE_LOOKUPS.inc(cache="dedup", result="replayed")
+                return cached
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            result = await asyncio.shield(future)
+            if result is _ABANDONED:
+                # The leader was cancelled; the first follower back here leads the retry
+                continue
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc(cache="dedup", result="coalesced")
+            return copy.deepcopy(result)
+
+        CACHE_LOOKUPS.inc(cache="dedup", result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            # One client going away must not fail the others waiting on it
+            future.set_result(_ABANDONED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure with no followers is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._remember(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+
+_coalescer: Optional[RequestCoalescer] = None
+
+
+def get_interpret_coalescer() -> Optional[RequestCoalescer]:
+    """Process-wide coalescer for /api/interpret (None when dedup is disabled)."""
+    global _coalescer
+    config = get_config()
+    if _coalescer is None and config.dedup_enabled:
+        _coalescer = RequestCoalescer(
+            ttl_seconds=config.dedup_ttl_seconds,
+            max_entries=config.dedup_max_entries
+        )
+    return _coalescer
@@ -1,11 +1,84 @@
-import json
+import threading
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
-from app.config.loader import Config
+from typing import Dict, Iterator, List, Optional
+from app.config.loader import get_config
+from app.services.workflow.storage import InterpretationStore, get_interpretation_store
+
+# Write-through LRU of recently saved, loaded or edited records (storage.cache_size).
+# Entries are replaced, never mutated, so a hit can be returned without the lock;
+# callers get a shallow copy and must treat the summary as read-only.
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+_cache_store: Optional[InterpretationStore] = None
+_lock = threading.Lock()
+# interpretation_id -> [lock, number of threads using it]
+_record_locks: Dict[str, List] = {}
+
+
+def _check_store(store: InterpretationStore) -> None:
+    """Drops the cache when the process-wide store has been replaced (tests, benchmarks)."""
+    global _cache_store
+    if store is not _cache_store:
+        _cache.clear()
+        _cache_store = store
+
+
+def _cached(store: InterpretationStore, interpretation_id: str) -> Optional[dict]:
+    with _lock:
+        _check_store(store)
+        record = _cache.get(interpretation_id)
+        if record is not None:
+            _cache.move_to_end(interpretation_id)
+        return record
+
+
+def _remember(store: InterpretationStore, record: dict) -> None:
+    size = get_config().storage_cache_size
+    if size <= 0:
+        return
+    with _lock:
+        _check_store(store)
+        _cache[record["interpretation_id"]] = record
+        _cache.move_to_end(record["interpretation_id"])
+        while len(_cache) > size:
+            _cache.popitem(last=False)
+
+
+@contextmanager
+def _locked(interpretation_id: str) -> Iterator[None]:
+    """Serializes loads and edits of one interpretation; other ids proceed in parallel."""
+    with _lock:
+        entry = _record_locks.setdefault(interpretation_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _record_locks[interpretation_id]
+
+
+def _update(interpretation_id: str, fields: dict, require_editable: bool = False) -> dict:
+    """
+    Writes `fields` through to the store, which stays authoritative for the
+    finalized check, and merges them into the cached record. Only a cache
+    miss reads the record back from the store.
+    """
+    store = get_interpretation_store()
+    with _locked(interpretation_id):
+        record = _cached(store, interpretation_id)
+        if record is None:
+            record = store.update(interpretation_id, fields, require_editable)
+        else:
+            store.update_fields(interpretation_id, fields, require_editable)
+            record = {**record, **fields}
+        _remember(store, record)
+        return dict(record)
 
-config = Config()
-SAVE_DIR = config.output_dir
 
 def save_interpretation(
     patient_id: str,
@@ -16,7 +89,7 @@ def save_interpretation(
     finalized: bool = False
 ) -> str:
     """
-    Saves an editable or finalized interpretation to disk.
+    Saves an editable or finalized interpretation to the configured store.
     Returns the unique interpretation ID.
     """
     interpretation_id = str(uuid.uuid4())
@@ -33,45 +106,47 @@ def save_interpretation(
         "interpretation_text": interpretation_text
     }
 
-    path = SAVE_DIR / f"{interpretation_id}.json"
-    with open(path, "w") as f:
-        json.dump(output, f, indent=2)
+    store = get_interpretation_store()
+    store.save(output)
+    _remember(store, output)
 
     return interpretation_id
 
 
 def load_interpretation(interpretation_id: str) -> dict:
-    path = SAVE_DIR / f"{interpretation_id}.json"
-    if not path.exists():
-        raise FileNotFoundError(f"Interpretation not found: {interpretation_id}")
-
-    with open(path, "r") as f:
-        return json.load(f)
+    store = get_interpretation_store()
+    record = _cached(store, interpretation_id)
+    if record is None:
+        with _locked(interpretation_id):
+            # An edit may have cached the record while we waited
+            record = _cached(store, interpretation_id) or store.load(interpretation_id)
+            _remember(store, record)
+    return dict(record)
 
 
 def update_interpretation(interpretation_id: str, new_text: str, provider_id: str) -> None:
-    data = load_interpretation(interpretation_id)
-
-    if data.get("finalized", False):
-        raise ValueError("Interpretation has been finalized and cannot be edited.")
-
-    data["interpretation_text"] = new_text
-    data["timestamp"] = datetime.utcnow().isoformat()
-    data["provider_id"] = provider_id
-
-    path = SAVE_DIR / f"{interpretation_id}.json"
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    _update(
+        interpretation_id,
+        {
+            "interpretation_text": new_text,
+            "timestamp": datetime.utcnow().isoformat(),
+            "provider_id": provider_id
+        },
+        require_editable=True
+    )
 
 
 def finalize_interpretation(interpretation_id: str) -> dict:
-    data = load_interpretation(interpretation_id)
-    data["finalized"] = True
-    data["editable"] = False
-    data["timestamp"] = datetime.utcnow().isoformat()
-
-    path = SAVE_DIR / f"{interpretation_id}.json"
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-    return data  # for billing
+    return _update(
+        interpretation_id,
+        {
+            "finalized": True,
+            "editable": False,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )  # for billing
+
+
+def list_interpretations(**filters) -> list:
+    """Newest-first interpretation metadata; see InterpretationStore.list."""
+    return get_interpretation_store().list(**filters)
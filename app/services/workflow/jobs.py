@@ -0,0 +1,272 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config.loader import get_config
+from app.utils import jsonio
+from app.services.controller import run_interpretation_workflow
+
+# Job lifecycle
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+# Pipeline stages reported by run_interpretation_workflow(on_stage=...)
+STAGE_PARSING = "parsing"
+STAGE_SUMMARIZING = "summarizing"
+STAGE_GENERATING = "generating"
+STAGE_SAVING = "saving"
+STAGE_SAVED = "saved"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the worker pool and its queue are both at capacity."""
+
+
+class MemoryJobStore:
+    """
+    In-process job table; status is lost on restart. Finished jobs (and
+    their results) are dropped after `ttl_seconds`, oldest first once more
+    than `max_finished` are kept.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_finished: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._jobs: Dict[str, dict] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()  # job_id -> finish time
+        self._lock = threading.Lock()
+
+    def create(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+            if fields.get("status") in TERMINAL_STATUSES:
+                self._finished[job_id] = time.monotonic()
+                self._evict()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+
+class SQLiteJobStore:
+    """
+    Job table in a local SQLite file, so status survives restarts. Jobs
+    still queued or running when the store is opened were cut off by a
+    restart and are marked failed.
+    """
+
+    _COLUMNS = (
+        "job_id", "status", "stage", "patient_id", "provider_id",
+        "created_at", "updated_at", "result", "error"
+    )
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT, stage TEXT, patient_id TEXT, "
+                "provider_id TEXT, created_at TEXT, updated_at TEXT, result TEXT, error TEXT)"
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+                (STATUS_FAILED, "interrupted by restart", datetime.utcnow().isoformat(),
+                 STATUS_QUEUED, STATUS_RUNNING)
+            )
+
+    def create(self, job: dict) -> None:
+        row = [job.get(c) for c in self._COLUMNS]
+        row[7] = jsonio.dumps_text(row[7]) if row[7] is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(row))})",
+                row
+            )
+
+    def update(self, job_id: str, **fields) -> None:
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = jsonio.dumps_text(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                [*fields.values(), job_id]
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        if job["result"] is not None:
+            job["result"] = jsonio.loads(job["result"])
+        return job
+
+
+class JobQueue:
+    """
+    Bounded pool of interpretation workers.
+
+    Each worker thread owns a long-lived event loop, so the async pipeline
+    (and its pooled LLM client) runs off the server loop. At most
+    `workers + queue_depth` jobs are accepted at once.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[dict]],
+        store,
+        workers: int = 2,
+        queue_depth: int = 32
+    ):
+        self.runner = runner
+        self.store = store
+        self.capacity = workers + queue_depth
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="interpret-job",
+            initializer=self._init_worker
+        )
+
+    def _init_worker(self) -> None:
+        self._local.loop = asyncio.new_event_loop()
+
+    def submit(self, patient_id: str, provider_id: str, upload_path: Path) -> str:
+        with self._lock:
+            if self._outstanding >= self.capacity:
+                raise JobQueueFullError("Interpretation queue is full; retry later.")
+            self._outstanding += 1
+
+        job_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        self.store.create({
+            "job_id": job_id,
+            "status": STATUS_QUEUED,
+            "stage": None,
+            "patient_id": patient_id,
+            "provider_id": provider_id,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None
+        })
+        try:
+            self._executor.submit(self._run, job_id, patient_id, provider_id, upload_path)
+        except RuntimeError:
+            self._release()
+            raise
+        return job_id
+
+    def _release(self) -> None:
+        with self._lock:
+            self._outstanding -= 1
+
+    def _run(self, job_id: str, patient_id: str, provider_id: str, upload_path: Path) -> None:
+        def on_stage(stage: str) -> None:
+            self.store.update(job_id, stage=stage, updated_at=datetime.utcnow().isoformat())
+
+        try:
+            self.store.update(job_id, status=STATUS_RUNNING, updated_at=datetime.utcnow().isoformat())
+            result = self._local.loop.run_until_complete(self.runner(
+                patient_id=patient_id,
+                provider_id=provider_id,
+                file_path=upload_path,
+                on_stage=on_stage
+            ))
+            self.store.update(
+                job_id,
+                status=STATUS_SUCCEEDED,
+                stage=STAGE_SAVED,
+                result=result,
+                updated_at=datetime.utcnow().isoformat()
+            )
+        except Exception as e:
+            self.store.update(
+                job_id,
+                status=STATUS_FAILED,
+                error=str(e),
+                updated_at=datetime.utcnow().isoformat()
+            )
+        finally:
+            upload_path.unlink(missing_ok=True)
+            self._release()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue, created on first use from the jobs config."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            config = get_config()
+            if config.jobs_backend == "sqlite":
+                store = SQLiteJobStore(config.jobs_sqlite_path)
+            else:
+                store = MemoryJobStore(
+                    ttl_seconds=config.jobs_result_ttl_seconds,
+                    max_finished=config.jobs_max_finished
+                )
+            _job_queue = JobQueue(
+                runner=run_interpretation_workflow,
+                store=store,
+                workers=config.jobs_workers,
+                queue_depth=config.jobs_queue_depth
+            )
+        return _job_queue
+
+
+def spool_path(suffix: str = ".json") -> Path:
+    """Location for an upload that will outlive the request."""
+    spool_dir = get_config().jobs_spool_dir
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    return spool_dir / f"{uuid.uuid4()}{suffix}"
+
+
+def shutdown_job_queue() -> None:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is not None:
+            _job_queue.shutdown()
+            _job_queue = None
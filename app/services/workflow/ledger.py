@@ -0,0 +1,241 @@
+import os
+import threading
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.utils import jsonio
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class BillingLedger:
+    """
+    Append-only billing ledger in JSON Lines segments.
+
+    Records are appended to the newest segment and made durable with group
+    commit: concurrent writers share one fsync instead of paying one each.
+    An in-memory index (rebuilt from the segments on start-up) backs the
+    idempotency check on interpretation_id and the query/aggregate APIs.
+
+    The index is per process: two processes appending to the same
+    directory (e.g. several server workers) do not see each other's
+    records and can bill one interpretation twice. Run a single writer
+    process per ledger directory.
+    """
+
+    def __init__(self, directory: Path, segment_max_bytes: int = 64 * 1024 * 1024, fsync: bool = True):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        self._records: List[dict] = []
+        self._by_interpretation: Dict[str, dict] = {}
+        self._by_billing_id: Dict[str, dict] = {}
+
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment_no = self._replay()
+        self._fh = open(self._segment_path(self._segment_no), "ab")
+
+    # -- segments ----------------------------------------------------------
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+    def _replay(self) -> int:
+        """Rebuilds the index from disk; returns the segment number to append to."""
+        segments = self._segments()
+        for path in segments:
+            valid_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final write from a crash
+                    try:
+                        record = jsonio.loads(line)
+                    except ValueError:
+                        break
+                    self._index(record)
+                    valid_bytes += len(line)
+            if valid_bytes != path.stat().st_size:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_bytes)
+        if not segments:
+            return 1
+        return int(segments[-1].name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+    def _index(self, record: dict) -> None:
+        self._records.append(record)
+        self._by_billing_id[record["billing_id"]] = record
+        if record.get("interpretation_id"):
+            self._by_interpretation[record["interpretation_id"]] = record
+
+    def _roll_segment(self) -> None:
+        # Caller holds the lock and has waited out any in-flight fsync;
+        # make the closing segment durable before switching files
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        self._fh.close()
+        self._synced_seq = self._written_seq
+        self._segment_no += 1
+        self._fh = open(self._segment_path(self._segment_no), "ab")
+
+    # -- writes ------------------------------------------------------------
+
+    def append(self, record: dict) -> Tuple[dict, bool]:
+        """
+        Appends a billing record and waits until it is durable.
+        Returns (record, created). If a record already exists for the same
+        interpretation_id, that record is returned with created=False.
+        """
+        record = dict(record)
+        record.setdefault("billing_id", f"{record['patient_id']}_{uuid.uuid4().hex}")
+        line = jsonio.dumps(record) + b"\n"
+        interpretation_id = record.get("interpretation_id")
+
+        with self._lock:
+            while True:
+                existing = self._by_interpretation.get(interpretation_id) if interpretation_id else None
+                if existing is not None:
+                    return dict(existing), False
+                full = self._fh.tell() > 0 and self._fh.tell() + len(line) > self.segment_max_bytes
+                if not (full and self._syncing):
+                    break
+                # The segment cannot be closed under an in-flight fsync;
+                # waiting releases the lock, so check for duplicates again
+                self._synced.wait()
+
+            if full:
+                self._roll_segment()
+            self._fh.write(line)
+            self._index(record)
+            self._written_seq += 1
+            seq = self._written_seq
+
+        self._commit(seq)
+        return dict(record), True
+
+    def _commit(self, seq: int) -> None:
+        """Group commit: one writer fsyncs on behalf of everyone written so far."""
+        with self._synced:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self._synced.wait()
+                    continue
+                self._syncing = True
+                target = self._written_seq
+                self._fh.flush()
+                fd = self._fh.fileno()
+                break
+            else:
+                return
+        try:
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            with self._synced:
+                self._synced_seq = max(self._synced_seq, target)
+                self._syncing = False
+                self._synced.notify_all()
+
+    def import_records(self, records: Iterable[dict]) -> int:
+        """Bulk-appends pre-existing records (e.g. legacy files); returns the number added."""
+        added = 0
+        for record in records:
+            if record.get("billing_id") in self._by_billing_id:
+                continue
+            _, created = self.append(record)
+            added += created
+        return added
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.flush()
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    # -- reads -------------------------------------------------------------
+
+    def get(self, billing_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._by_billing_id.get(billing_id)
+            return dict(record) if record else None
+
+    def get_for_interpretation(self, interpretation_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._by_interpretation.get(interpretation_id)
+            return dict(record) if record else None
+
+    def query(
+        self,
+        provider_id: Optional[str] = None,
+        patient_id: Optional[str] = None,
+        month: Optional[str] = None,
+        cpt_code: Optional[str] = None
+    ) -> List[dict]:
+        """Records matching every given filter; `month` is "YYYY-MM"."""
+        with self._lock:
+            records = list(self._records)
+        return [
+            dict(r) for r in records
+            if (provider_id is None or r.get("provider_id") == provider_id)
+            and (patient_id is None or r.get("patient_id") == patient_id)
+            and (month is None or (r.get("timestamp") or "")[:7] == month)
+            and (cpt_code is None or r.get("cpt_code") == cpt_code)
+        ]
+
+    def aggregate(
+        self,
+        by: Sequence[str] = ("provider_id", "month", "cpt_code"),
+        **filters
+    ) -> List[dict]:
+        """
+        Counts and total monitored days grouped by any of
+        provider_id, patient_id, month and cpt_code. Legacy records missing
+        a field are grouped under None, sorted after the others.
+        """
+        allowed = {"provider_id", "patient_id", "month", "cpt_code"}
+        unknown = set(by) - allowed
+        if unknown:
+            raise ValueError(f"Cannot group billing records by: {sorted(unknown)}")
+
+        groups: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {"count": 0, "duration_days": 0})
+        for record in self.query(**filters):
+            values = {**record, "month": (record.get("timestamp") or "")[:7] or None}
+            group = groups[tuple(values.get(key) for key in by)]
+            group["count"] += 1
+            group["duration_days"] += int(record.get("duration_days") or 0)
+
+        return [
+            {**dict(zip(by, key)), **totals}
+            for key, totals in sorted(groups.items(), key=lambda item: _none_last(item[0]))
+        ]
+
+
+def _none_last(values: tuple) -> tuple:
+    return tuple((value is None, "" if value is None else str(value)) for value in values)
+
+
+def read_legacy_billing_files(directory: Path) -> List[dict]:
+    """Per-event JSON files written before the ledger existed, oldest first."""
+    records = []
+    for path in Path(directory).glob("*.json"):
+        try:
+            record = jsonio.load_file(path)
+        except (OSError, ValueError):
+            continue
+        record.setdefault("billing_id", path.stem)
+        records.append(record)
+    return sorted(records, key=lambda r: r.get("timestamp", ""))
@@ -0,0 +1,366 @@
+import argparse
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+from app.config.loader import get_config
+from app.utils import jsonio
+
+# Columns returned by list(); the summary is only loaded for a single record
+LISTING_FIELDS = (
+    "interpretation_id", "timestamp", "patient_id", "provider_id", "editable", "finalized"
+)
+
+
+class InterpretationStore(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def save(self, record: dict) -> None:
+        ...
+
+    @abstractmethod
+    def load(self, interpretation_id: str) -> dict:
+        """Returns the full record; raises FileNotFoundError if unknown."""
+
+    @abstractmethod
+    def update(self, interpretation_id: str, fields: dict, require_editable: bool = False) -> dict:
+        """
+        Applies `fields` atomically and returns the updated record.
+        With require_editable, raises ValueError if the record is finalized.
+        """
+
+    def update_fields(self, interpretation_id: str, fields: dict, require_editable: bool = False) -> None:
+        """Like update, for callers that already hold the record; backends may skip reading it back."""
+        self.update(interpretation_id, fields, require_editable)
+
+    @abstractmethod
+    def list(
+        self,
+        patient_id: Optional[str] = None,
+        provider_id: Optional[str] = None,
+        finalized: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[dict]:
+        """Newest-first listing metadata (LISTING_FIELDS) matching the filters."""
+
+    @abstractmethod
+    def iter_all(self) -> Iterator[dict]:
+        ...
+
+
+def _not_found(interpretation_id: str) -> FileNotFoundError:
+    return FileNotFoundError(f"Interpretation not found: {interpretation_id}")
+
+
+def _finalized_error() -> ValueError:
+    return ValueError("Interpretation has been finalized and cannot be edited.")
+
+
+class FileInterpretationStore(InterpretationStore):
+    """Legacy layout: `<dir>/<interpretation_id>.json`, listings scan the directory."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.skipped: List[Path] = []
+        self._lock = threading.Lock()
+
+    def _path(self, interpretation_id: str) -> Path:
+        return self.directory / f"{interpretation_id}.json"
+
+    def _write(self, record: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        jsonio.dump_file(record, self._path(record["interpretation_id"]))
+
+    def save(self, record: dict) -> None:
+        self._write(record)
+
+    def load(self, interpretation_id: str) -> dict:
+        path = self._path(interpretation_id)
+        if not path.exists():
+            raise _not_found(interpretation_id)
+        return jsonio.load_file(path)
+
+    def update(self, interpretation_id: str, fields: dict, require_editable: bool = False) -> dict:
+        with self._lock:
+            data = self.load(interpretation_id)
+            if require_editable and data.get("finalized", False):
+                raise _finalized_error()
+            data.update(fields)
+            self._write(data)
+            return data
+
+    def iter_all(self) -> Iterator[dict]:
+        """Yields every readable record; truncated or corrupt files are noted in `skipped`."""
+        self.skipped = []
+        if not self.directory.exists():
+            return
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                record = jsonio.load_file(path)
+            except (OSError, ValueError):
+                self.skipped.append(path)
+                continue
+            if not isinstance(record, dict) or "interpretation_id" not in record:
+                self.skipped.append(path)
+                continue
+            yield record
+
+    def list(self, patient_id=None, provider_id=None, finalized=None,
+             since=None, until=None, limit=100, offset=0) -> List[dict]:
+        matches = [
+            {field: record.get(field) for field in LISTING_FIELDS}
+            for record in self.iter_all()
+            if (patient_id is None or record.get("patient_id") == patient_id)
+            and (provider_id is None or record.get("provider_id") == provider_id)
+            and (finalized is None or bool(record.get("finalized")) == finalized)
+            and (since is None or record.get("timestamp", "") >= since)
+            and (until is None or record.get("timestamp", "") < until)
+        ]
+        matches.sort(key=lambda r: r.get("timestamp") or "", reverse=True)
+        return matches[offset:offset + limit]
+
+
+class SQLiteInterpretationStore(InterpretationStore):
+    """
+    Default backend: one row per interpretation in a WAL-mode SQLite file,
+    indexed by patient, provider, finalized status and timestamp. Edits and
+    finalization run as single IMMEDIATE transactions. One connection per
+    thread, so readers never block each other.
+    """
+
+    _COLUMNS = LISTING_FIELDS + ("summary", "interpretation_text")
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS interpretations (
+                    interpretation_id TEXT PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    patient_id TEXT NOT NULL,
+                    provider_id TEXT NOT NULL,
+                    editable INTEGER NOT NULL,
+                    finalized INTEGER NOT NULL,
+                    summary TEXT NOT NULL,
+                    interpretation_text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_interp_patient ON interpretations (patient_id, timestamp);
+                CREATE INDEX IF NOT EXISTS ix_interp_provider ON interpretations (provider_id, timestamp);
+                CREATE INDEX IF NOT EXISTS ix_interp_finalized ON interpretations (finalized, timestamp);
+                CREATE INDEX IF NOT EXISTS ix_interp_timestamp ON interpretations (timestamp);
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(record: dict) -> tuple:
+        return (
+            record["interpretation_id"],
+            record["timestamp"],
+            record["patient_id"],
+            record["provider_id"],
+            int(bool(record.get("editable", True))),
+            int(bool(record.get("finalized", False))),
+            jsonio.dumps_text(record["summary"]),
+            record["interpretation_text"]
+        )
+
+    @classmethod
+    def _record(cls, row: tuple) -> dict:
+        record = dict(zip(cls._COLUMNS, row))
+        record["editable"] = bool(record["editable"])
+        record["finalized"] = bool(record["finalized"])
+        record["summary"] = jsonio.loads(record["summary"])
+        return record
+
+    def save(self, record: dict) -> None:
+        self.save_many([record], replace=True)
+
+    def save_many(self, records: Iterable[dict], replace: bool = False) -> int:
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                f"{verb} INTO interpretations ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                (self._row(r) for r in records)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def load(self, interpretation_id: str) -> dict:
+        row = self._conn().execute(
+            f"SELECT {', '.join(self._COLUMNS)} FROM interpretations WHERE interpretation_id = ?",
+            (interpretation_id,)
+        ).fetchone()
+        if row is None:
+            raise _not_found(interpretation_id)
+        return self._record(row)
+
+    def update(self, interpretation_id: str, fields: dict, require_editable: bool = False) -> dict:
+        return self._record(self._update(interpretation_id, fields, require_editable, reload=True))
+
+    def update_fields(self, interpretation_id: str, fields: dict, require_editable: bool = False) -> None:
+        """Writes only the given columns; the summary is neither re-read nor re-parsed."""
+        self._update(interpretation_id, fields, require_editable, reload=False)
+
+    def _update(self, interpretation_id: str, fields: dict, require_editable: bool, reload: bool) -> Optional[tuple]:
+        values = dict(fields)
+        for flag in ("editable", "finalized"):
+            if flag in values:
+                values[flag] = int(bool(values[flag]))
+        if "summary" in values:
+            values["summary"] = jsonio.dumps_text(values["summary"])
+        unknown = set(values) - set(self._COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown interpretation fields: {sorted(unknown)}")
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = conn.execute(
+                "SELECT finalized FROM interpretations WHERE interpretation_id = ?",
+                (interpretation_id,)
+            ).fetchone()
+            if state is None:
+                raise _not_found(interpretation_id)
+            if require_editable and state[0]:
+                raise _finalized_error()
+            conn.execute(
+                f"UPDATE interpretations SET {', '.join(f'{k} = ?' for k in values)} "
+                "WHERE interpretation_id = ?",
+                [*values.values(), interpretation_id]
+            )
+            row = conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM interpretations WHERE interpretation_id = ?",
+                (interpretation_id,)
+            ).fetchone() if reload else None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def list(self, patient_id=None, provider_id=None, finalized=None,
+             since=None, until=None, limit=100, offset=0) -> List[dict]:
+        clauses, params = [], []
+        for column, value in (("patient_id", patient_id), ("provider_id", provider_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if finalized is not None:
+            clauses.append("finalized = ?")
+            params.append(int(finalized))
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT {', '.join(LISTING_FIELDS)} FROM interpretations {where} "
+            "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset]
+        ).fetchall()
+        listing = []
+        for row in rows:
+            record = dict(zip(LISTING_FIELDS, row))
+            record["editable"] = bool(record["editable"])
+            record["finalized"] = bool(record["finalized"])
+            listing.append(record)
+        return listing
+
+    def iter_all(self) -> Iterator[dict]:
+        cursor = self._conn().execute(
+            f"SELECT {', '.join(self._COLUMNS)} FROM interpretations ORDER BY timestamp"
+        )
+        for row in cursor:
+            yield self._record(row)
+
+
+def migrate_interpretations(
+    source: InterpretationStore,
+    dest: SQLiteInterpretationStore,
+    batch_size: int = 500
+) -> int:
+    """
+    Copies every record from `source` into `dest`. Records already present
+    in `dest` are left untouched, so the migration can be re-run safely.
+    Returns the number of records inserted.
+    """
+    inserted = 0
+    batch = []
+    for record in source.iter_all():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            inserted += dest.save_many(batch)
+            batch = []
+    if batch:
+        inserted += dest.save_many(batch)
+    return inserted
+
+
+_store: Optional[InterpretationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_interpretation_store() -> InterpretationStore:
+    """
+    Process-wide store selected by storage.backend ("sqlite" or "file").
+    When the SQLite database is first created, existing JSON records from
+    paths.interpretation_dir are imported so earlier interpretations stay
+    reachable.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = get_config()
+            if config.storage_backend == "file":
+                _store = FileInterpretationStore(config.output_dir)
+            else:
+                is_new = not config.storage_sqlite_path.exists()
+                _store = SQLiteInterpretationStore(config.storage_sqlite_path)
+                if is_new:
+                    migrate_interpretations(FileInterpretationStore(config.output_dir), _store)
+        return _store
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Interpretation storage tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Copy legacy JSON files into the SQLite store")
+    migrate.add_argument("--source", type=Path, default=config.output_dir)
+    migrate.add_argument("--dest", type=Path, default=config.storage_sqlite_path)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        source = FileInterpretationStore(args.source)
+        count = migrate_interpretations(source, SQLiteInterpretationStore(args.dest))
+        print(f"Migrated {count} interpretations from {args.source} to {args.dest}")
+        for path in source.skipped:
+            print(f"Skipped unreadable file: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from datetime import datetime, time
+import numpy as np
 
 def is_nocturnal(dt: datetime) -> bool:
     """
@@ -26,3 +27,24 @@ def parse_iso8601(s: str) -> datetime:
         return datetime.fromisoformat(s.replace("Z", "+00:00"))
     except Exception as e:
         raise ValueError(f"Invalid datetime format: {s}") from e
+
+
+def hours_of_day(local_seconds: np.ndarray) -> np.ndarray:
+    """
+    Vectorized hour-of-day (0-23) for epoch seconds already shifted to local time
+    """
+    return (local_seconds // 3600) % 24
+
+
+def nocturnal_mask(hours: np.ndarray) -> np.ndarray:
+    """
+    Vectorized is_nocturnal over an hour-of-day array
+    """
+    return (hours >= 22) | (hours < 6)
+
+
+def dawn_window_mask(hours: np.ndarray) -> np.ndarray:
+    """
+    Vectorized is_dawn_window over an hour-of-day array
+    """
+    return (hours >= 2) & (hours < 8)
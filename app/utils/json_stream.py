@@ -0,0 +1,120 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Optional
+
+_WHITESPACE = " \t\n\r"
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when a streamed payload exceeds a configured size limit."""
+
+
+class JSONStream:
+    """
+    Incremental reader over a binary JSON source.
+
+    Only the current chunk and the element being decoded are held in memory,
+    so arrays of any length can be walked one element at a time.
+    """
+
+    def __init__(self, fp: BinaryIO, chunk_size: int = 64 * 1024, max_bytes: Optional[int] = None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._decoder.decode(b"", final=True)
+            self._pos = 0
+            return False
+        self.bytes_read += len(chunk)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise PayloadTooLargeError(f"Payload exceeds the {self.max_bytes} byte limit")
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """Returns the next non-whitespace character without consuming it."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected '{char}', found {found!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A scalar ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yields the elements of the array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Malformed JSON array: unexpected {sep!r}")
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        Yields the keys of the object starting at the current position.
+        After each key the stream sits on its value, which the caller must
+        consume (value(), iter_array() or skip()).
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Malformed JSON object key")
+            self.expect(":")
+            yield key
+            sep = self.peek()
+            self._pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Malformed JSON object: unexpected {sep!r}")
+
+    def skip(self) -> None:
+        self.value()
@@ -0,0 +1,63 @@
+"""
+One JSON codec for the service: orjson when it is installed, the stdlib
+json module otherwise. Output is always compact UTF-8.
+"""
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+HAVE_ORJSON = orjson is not None
+
+
+def _default(obj: Any) -> Any:
+    """Types neither codec handles natively."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if HAVE_ORJSON:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def dumps_text(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def dump_file(obj: Any, path: Path) -> None:
+    """Writes `obj` compactly in a single write."""
+    with open(path, "wb") as f:
+        f.write(dumps(obj))
+
+
+def load_file(path: Path) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,261 @@
+"""
+Micro-benchmarks for the CGM hot paths on synthetic traces.
+
+    python -m benchmarks.run                      # compare against the baseline
+    python -m benchmarks.run --update-baseline    # record a new baseline
+    python -m benchmarks.run --only generate_summary --days 14 90
+
+Exits with status 1 when any benchmark's median is more than
+--max-regression slower than its baseline. Timings are only comparable on
+the machine that recorded them: when the environment differs from the
+baseline's, the comparison is printed for information and never fails.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.cgm_processing.loader import load_cgm_file
+from app.services.cgm_processing.metrics import compute_cgm_metrics
+from app.services.cgm_processing.patterns import detect_all_patterns
+from app.services.cgm_processing.recommender import generate_recommendations
+from app.services.cgm_processing.summarizer import generate_summary
+from app.services.cgm_processing.synthetic import generate_trace, write_trace
+from app.services.llm.prompt import build_prompt
+from app.services.workflow import billing, editor, storage
+from app.services.workflow.ledger import BillingLedger
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "baseline.json"
+DEFAULT_DAYS = (1, 7, 14, 90, 365)
+DEFAULT_MAX_REGRESSION = 0.25
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.5
+# environment() fields that must match for timings to be comparable
+COMPARABLE_FIELDS = ("host", "machine", "processor", "cpus", "python", "numpy")
+
+
+class _Workspace:
+    """Synthetic inputs and throwaway stores shared by the benchmarks."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._traces: Dict[int, object] = {}
+        self._files: Dict[int, Path] = {}
+        self._summaries: Dict[int, dict] = {}
+
+    def trace(self, days: int):
+        if days not in self._traces:
+            self._traces[days] = generate_trace(days=days, seed=days)
+        return self._traces[days]
+
+    def file(self, days: int) -> Path:
+        if days not in self._files:
+            self._files[days] = write_trace(self.trace(days), self.root / f"trace_{days}d.json")
+        return self._files[days]
+
+    def summary(self, days: int) -> dict:
+        if days not in self._summaries:
+            self._summaries[days] = generate_summary(self.trace(days))
+        return self._summaries[days]
+
+
+def _editor_cycle(ws: _Workspace, days: int) -> Callable[[], None]:
+    """Save, edit and finalize one interpretation through editor.py on a scratch SQLite store."""
+    storage._store = storage.SQLiteInterpretationStore(ws.root / f"interpretations_{days}d.db")
+    summary = ws.summary(days)
+
+    def run():
+        interpretation_id = editor.save_interpretation("bench", summary, "draft", "provider")
+        editor.update_interpretation(interpretation_id, "edited", "provider")
+        editor.finalize_interpretation(interpretation_id)
+    return run
+
+
+def _billing_append(ws: _Workspace, days: int) -> Callable[[], None]:
+    """One idempotent CPT 95251 event through billing.py on a scratch ledger (fsync on)."""
+    billing._ledger = BillingLedger(ws.root / f"ledger_{days}d", fsync=True)
+
+    def run():
+        billing.trigger_cpt_95251("bench", "provider", days, interpretation_id=str(uuid.uuid4()))
+    return run
+
+
+# name -> (factory(workspace, days) -> zero-argument callable, sized by days?)
+BENCHMARKS: Dict[str, tuple] = {
+    "load_cgm_file": (lambda ws, days: (lambda path=ws.file(days): load_cgm_file(path)), True),
+    "compute_cgm_metrics": (lambda ws, days: (lambda s=ws.trace(days): compute_cgm_metrics(s)), True),
+    "detect_all_patterns": (lambda ws, days: (lambda s=ws.trace(days): detect_all_patterns(s)), True),
+    "generate_summary": (lambda ws, days: (lambda s=ws.trace(days): generate_summary(s)), True),
+    "build_prompt": (
+        lambda ws, days: (
+            lambda summary=ws.summary(days): build_prompt(
+                summary, generate_recommendations(summary["recommendation_context"])
+            )
+        ),
+        True
+    ),
+    "editor_cycle": (_editor_cycle, True),
+    "billing_append": (_billing_append, False),
+}
+
+
+def time_callable(fn: Callable[[], None], repeat: int = 5, min_seconds: float = 0.2) -> Dict[str, float]:
+    """
+    Median and best per-call time over `repeat` rounds. Each round runs
+    enough calls to last about min_seconds / repeat, after one warm-up call.
+    """
+    fn()
+    start = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - start, 1e-7)
+    number = max(1, int(min_seconds / repeat / single))
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "median_ms": round(statistics.median(rounds) * 1000, 4),
+        "min_ms": round(min(rounds) * 1000, 4),
+        "calls": number * repeat
+    }
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None,
+    days: tuple = DEFAULT_DAYS,
+    repeat: int = 5,
+    min_seconds: float = 0.2
+) -> Dict[str, dict]:
+    """Results keyed "<benchmark>/<days>d" (or just the name when it does not scale with days)."""
+    results = {}
+    saved_store, saved_ledger = storage._store, billing._ledger
+    with tempfile.TemporaryDirectory() as tmp:
+        ws = _Workspace(Path(tmp))
+        try:
+            for name in names or BENCHMARKS:
+                factory, sized = BENCHMARKS[name]
+                for d in (days if sized else days[:1]):
+                    fn = factory(ws, d)
+                    key = f"{name}/{d}d" if sized else name
+                    results[key] = time_callable(fn, repeat, min_seconds)
+                    if sized:
+                        results[key]["readings"] = len(ws.trace(d))
+                    print(f"{key:32s} {results[key]['median_ms']:>12.3f} ms", file=sys.stderr)
+                if billing._ledger is not saved_ledger:
+                    billing._ledger.close()
+        finally:
+            storage._store, billing._ledger = saved_store, saved_ledger
+    return results
+
+
+def environment() -> dict:
+    return {
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "host": platform.node()
+    }
+
+
+def environment_mismatches(recorded: dict, current: dict) -> List[str]:
+    """COMPARABLE_FIELDS that differ (or were not recorded) between two environments."""
+    return [field for field in COMPARABLE_FIELDS if recorded.get(field) != current.get(field)]
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    max_regression: float = DEFAULT_MAX_REGRESSION,
+    noise_floor_ms: float = NOISE_FLOOR_MS
+) -> List[dict]:
+    """
+    Per-benchmark change against the baseline. An entry regresses when its
+    median is both more than max_regression slower (as a fraction) and more
+    than noise_floor_ms slower in absolute terms.
+    """
+    rows = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("inf")
+        slower_ms = current["median_ms"] - previous["median_ms"]
+        rows.append({
+            "benchmark": key,
+            "baseline_ms": previous["median_ms"],
+            "current_ms": current["median_ms"],
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + max_regression and slower_ms > noise_floor_ms
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CGM pipeline micro-benchmarks")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--days", nargs="+", type=int, default=list(DEFAULT_DAYS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="timed budget per benchmark")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--output", type=Path, help="also write this run's results here")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="allowed slowdown as a fraction (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, tuple(args.days), args.repeat, args.min_seconds)
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        merged = {}
+        if args.baseline.exists():
+            merged = json.loads(args.baseline.read_text())["results"]
+        merged.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"environment": report["environment"], "results": merged}, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    mismatches = environment_mismatches(baseline.get("environment", {}), report["environment"])
+    rows = compare(results, baseline["results"], args.max_regression)
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['benchmark']:32s} {row['baseline_ms']:>10.3f} -> {row['current_ms']:>10.3f} ms "
+              f"x{row['ratio']:<6} {flag}")
+    regressions = [row for row in rows if row["regressed"]]
+    if mismatches:
+        print(f"Baseline was recorded in a different environment ({', '.join(mismatches)}); "
+              "not gating on it. Record a local one with --update-baseline.")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.max_regression:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+import numpy as np
+from app.models.cgm_series import CGMSeries
+from app.services.cgm_processing.agp import compute_agp, daily_stats, local_seconds
+
+
+def test_agp_bands_match_numpy_percentiles_per_bin():
+    rng = np.random.default_rng(0)
+    n = 288 * 10
+    timestamps = 1754006400 + 300 * np.arange(n)
+    glucose = np.clip(120 + np.cumsum(rng.normal(0, 9, n)), 40, 400).astype(np.float32)
+    series = CGMSeries(timestamps, glucose, tz_offset=3600)
+
+    agp = compute_agp(series, bin_minutes=60)
+    hours = (series.local_seconds() % 86400) // 3600
+    for hour in (0, 7, 23):
+        expected = np.percentile(glucose[hours == hour].astype(np.float64), [5, 25, 50, 75, 95]).round(1)
+        assert [agp[f"p{p}"][hour] for p in (5, 25, 50, 75, 95)] == expected.tolist()
+    assert sum(agp["count"]) == n
+    assert len(daily_stats(series)) == 11
+
+
+def test_timezone_follows_daylight_saving_changes():
+    # 06:30 and 07:30 UTC straddle the 2025-03-09 US spring-forward
+    timestamps = np.array([
+        int(datetime(2025, 3, 9, 6, 30, tzinfo=timezone.utc).timestamp()),
+        int(datetime(2025, 3, 9, 7, 30, tzinfo=timezone.utc).timestamp())
+    ])
+    series = CGMSeries(timestamps, np.array([100, 200], dtype=np.float32))
+    minutes = (local_seconds(series, "America/New_York") % 86400) // 60
+    assert minutes.tolist() == [90, 210]
+
+    agp = compute_agp(series, bin_minutes=60, timezone="America/New_York")
+    assert agp["p50"][1] == 100.0 and agp["p50"][3] == 200.0 and agp["p50"][2] is None
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -12,3 +13,109 @@ def test_interpret_endpoint_mock():
         )
     assert response.status_code == 200
     assert "interpretation_text" in response.json()
+
+
+def test_interpret_stream_emits_summary_tokens_and_done(monkeypatch, tmp_path):
+    import json
+    from app.services import controller
+    from app.services.cgm_processing import rollups
+    from app.services.workflow import storage
+
+    async def fake_stream(summary, recommendations):
+        for fragment in ("Stable ", "control."):
+            yield fragment
+
+    monkeypatch.setattr(controller, "stream_interpretation", fake_stream)
+    monkeypatch.setattr(storage, "_store", storage.SQLiteInterpretationStore(tmp_path / "interp.db"))
+    monkeypatch.setattr(rollups, "_store", rollups.RollupStore(tmp_path / "rollups.db"))
+
+    with open("tests/fixtures/dexcom_cgm_24h.json", "rb") as f:
+        response = client.post(
+            "/api/interpret/stream",
+            files={"file": ("dexcom_cgm_24h.json", f, "application/json")},
+            data={"patient_id": "test-p", "provider_id": "test-doc"}
+        )
+    assert response.status_code == 200
+
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+
+    assert [name for name, _ in events] == ["summary", "token", "token", "done"]
+    assert "metrics" in events[0][1]["summary"]
+    done = events[-1][1]
+    assert done["interpretation_text"] == "Stable control."
+    assert storage._store.load(done["interpretation_id"])["interpretation_text"] == "Stable control."
+
+
+def test_interpret_batch_maps_files_and_reports_errors(monkeypatch, tmp_path):
+    import io
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.cgm_processing import rollups
+    from app.services.workflow import batch, concurrency, storage
+
+    async def fake_generate(summary, recommendations):
+        return "Batch interpretation."
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(batch, "generate_interpretation", fake_generate)
+    monkeypatch.setattr(concurrency, "_cpu_executor", executor)
+    monkeypatch.setattr(storage, "_store", storage.SQLiteInterpretationStore(tmp_path / "interp.db"))
+    monkeypatch.setattr(rollups, "_store", rollups.RollupStore(tmp_path / "rollups.db"))
+
+    fixture = open("tests/fixtures/dexcom_cgm_24h.json", "rb").read()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("week/p2.json", fixture)
+        zf.writestr("broken.json", b"{}")
+
+    response = client.post(
+        "/api/interpret/batch",
+        files=[
+            ("files", ("p1.json", fixture, "application/json")),
+            ("files", ("more.zip", archive.getvalue(), "application/zip")),
+        ],
+        data={"provider_id": "doc", "mapping": '{"p1.json": {"patient_id": "patient-1", "provider_id": "doc-1"}}'}
+    )
+    executor.shutdown()
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+
+    by_file = {r["filename"]: r for r in body["results"]}
+    assert by_file["p1.json"]["patient_id"] == "patient-1"
+    assert by_file["p1.json"]["provider_id"] == "doc-1"
+    assert by_file["p2.json"]["patient_id"] == "p2"
+    assert by_file["broken.json"]["status"] == "error"
+
+
+def test_interpret_batch_rejects_bad_mapping_and_oversized_archives(monkeypatch, tmp_path):
+    import io
+    import zipfile
+    from app.config.loader import get_config
+    from app.services.workflow import batch
+
+    response = client.post(
+        "/api/interpret/batch",
+        files=[("files", ("p1.json", b"[]", "application/json"))],
+        data={"provider_id": "doc", "mapping": '{"p1.json": 5}'}
+    )
+    assert response.status_code == 400
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"p{i}.json", b"[]")
+    monkeypatch.setattr(get_config(), "batch_max_files", 2)
+    with pytest.raises(batch.PayloadTooLargeError):
+        batch.extract_archive(io.BytesIO(archive.getvalue()), tmp_path, max_members=2)
+    assert not list(tmp_path.iterdir())
+
+    response = client.post(
+        "/api/interpret/batch",
+        files=[("files", ("many.zip", archive.getvalue(), "application/zip"))],
+        data={"provider_id": "doc"}
+    )
+    assert response.status_code == 413
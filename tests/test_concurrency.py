@@ -0,0 +1,88 @@
+from pathlib import Path
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.cgm_processing.loader import load_cgm_file
+from app.services.cgm_processing.summarizer import generate_summary
+from app.services.controller import summarize_upload
+from app.services.workflow import concurrency
+
+
+def test_uploads_beyond_the_in_flight_limit_get_429(monkeypatch):
+    limiter = concurrency.InFlightLimiter(1)
+    monkeypatch.setattr(concurrency, "_limiter", limiter)
+    client = TestClient(app)
+    upload = {"file": ("cgm.json", Path("tests/fixtures/dexcom_cgm_24h.json").read_bytes())}
+
+    assert limiter.try_acquire()
+    response = client.post("/api/agp", files=upload)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+
+    limiter.release()
+    assert client.post("/api/agp", files=upload).status_code == 200
+    assert limiter.in_flight == 0
+
+
+def test_interpret_releases_its_slot_before_the_llm_call(monkeypatch, tmp_path):
+    from app.services import controller
+    from app.services.cgm_processing import rollups
+    from app.services.workflow import dedup, storage
+
+    limiter = concurrency.InFlightLimiter(1)
+    seen = []
+
+    async def fake_generate(summary, recommendations):
+        seen.append(limiter.in_flight)
+        return "Stable."
+
+    monkeypatch.setattr(concurrency, "_limiter", limiter)
+    monkeypatch.setattr(dedup, "_coalescer", None)
+    monkeypatch.setattr(controller, "generate_interpretation", fake_generate)
+    monkeypatch.setattr(storage, "_store", storage.SQLiteInterpretationStore(tmp_path / "interp.db"))
+    monkeypatch.setattr(rollups, "_store", rollups.RollupStore(tmp_path / "rollups.db"))
+
+    response = TestClient(app).post(
+        "/api/interpret",
+        files={"file": ("cgm.json", Path("tests/fixtures/dexcom_cgm_24h.json").read_bytes())},
+        data={"patient_id": "p1", "provider_id": "d1"}
+    )
+    assert response.status_code == 200
+    assert seen == [0] and limiter.in_flight == 0
+
+
+def test_summarize_upload_takes_bytes_and_reports_stage_timings():
+    path = Path("tests/fixtures/dexcom_unhealthy_72h.json")
+    summary, rollups, timings = summarize_upload(path.read_bytes())
+    assert summary["metrics"] == generate_summary(load_cgm_file(path))["metrics"]
+    assert len(rollups) >= 3
+    assert [stage for stage, _ in timings] == ["parse", "summarize", "rollups"]
+
+
+def test_only_large_uploads_for_worker_processes_are_spooled(monkeypatch):
+    import asyncio
+    import io
+    import pytest
+    from app.config.loader import get_config
+    from app.services.cgm_processing.loader import CGMIngestLimitError, spool_upload
+
+    with pytest.raises(CGMIngestLimitError):
+        spool_upload(io.BytesIO(b"x" * 100), max_bytes=10)
+
+    spooled = []
+
+    def tracking_spool(fp):
+        spooled.append(spool_upload(fp))
+        return spooled[-1]
+
+    monkeypatch.setattr(concurrency, "spool_upload", tracking_spool)
+    raw = Path("tests/fixtures/dexcom_cgm_24h.json").read_bytes()
+    expected = load_cgm_file(raw).glucose.tolist()
+
+    async def parse(limit):
+        monkeypatch.setattr(get_config(), "concurrency_inline_max_bytes", limit)
+        return (await concurrency.run_cpu_on_upload(load_cgm_file, io.BytesIO(raw))).glucose.tolist()
+
+    assert asyncio.run(parse(len(raw))) == expected
+    assert spooled == []
+    assert asyncio.run(parse(0)) == expected
+    assert len(spooled) == 1 and not spooled[0].exists()
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from app.config.loader import Config
+
+
+def test_env_overrides_replace_yaml_values_with_typed_scalars():
+    config = Config(environ={
+        "CGM__LLM__MODEL": "gpt-4.1-mini",
+        "CGM__JOBS__WORKERS": "6",
+        "CGM__DEDUP__ENABLED": "false",
+        "CGM__BATCH__WORKERS": "",
+        "UNRELATED": "1"
+    })
+    assert config.llm_model == "gpt-4.1-mini"
+    assert config.jobs_workers == 6
+    assert config.dedup_enabled is False
+    assert config.batch_workers >= 1  # null falls back to the CPU count
+
+
+def test_pipeline_imports_without_openai_or_api_key():
+    code = (
+        "import sys\n"
+        "import app.services.workflow.batch, app.services.controller\n"
+        "assert 'openai' not in sys.modules\n"
+    )
+    env = {"PATH": "/usr/bin:/bin", "PYTHONPATH": "."}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app.services.workflow.dedup import RequestCoalescer, upload_key
+
+
+def test_coalescer_single_flight_and_replay():
+    calls = []
+
+    async def pipeline():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"interpretation_id": "abc", "summary": {"metrics": {}}}
+
+    async def scenario():
+        coalescer = RequestCoalescer(ttl_seconds=60)
+        key = upload_key("p1", "d1", "digest")
+        concurrent = await asyncio.gather(*(coalescer.run(key, pipeline) for _ in range(5)))
+        replay = await coalescer.run(key, pipeline)
+        other = await coalescer.run(upload_key("p2", "d1", "digest"), pipeline)
+        return coalescer, concurrent, replay, other
+
+    coalescer, concurrent, replay, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert {r["interpretation_id"] for r in concurrent} == {"abc"}
+    assert replay == concurrent[0]
+    assert coalescer.coalesced == 4 and coalescer.replayed == 1
+    assert upload_key("p1", "d1", "digest") != upload_key("p1", "d2", "digest")
+
+
+def test_coalescer_does_not_memoize_failures():
+    async def failing():
+        raise ValueError("bad upload")
+
+    async def scenario():
+        coalescer = RequestCoalescer()
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await coalescer.run("k", failing)
+        return coalescer
+
+    assert asyncio.run(scenario()).replayed == 0
+
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    calls = []
+
+    async def pipeline():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"interpretation_id": f"run-{len(calls)}"}
+
+    async def scenario():
+        coalescer = RequestCoalescer()
+        leader = asyncio.create_task(coalescer.run("k", pipeline))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(coalescer.run("k", pipeline)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert [r["interpretation_id"] for r in results] == ["run-2"] * 3
@@ -0,0 +1,61 @@
+import json
+import time
+import pytest
+from app.services.workflow.jobs import (
+    JobQueue, JobQueueFullError, MemoryJobStore, SQLiteJobStore, STATUS_SUCCEEDED, STATUS_FAILED
+)
+
+
+async def _fake_workflow(patient_id, provider_id, file_path, on_stage):
+    for stage in ("parsing", "summarizing", "generating", "saving"):
+        on_stage(stage)
+    data = json.loads(file_path.read_text())
+    if not data:
+        raise ValueError("empty upload")
+    return {"interpretation_id": f"{patient_id}-{len(data)}"}
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (STATUS_SUCCEEDED, STATUS_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_queue_runs_pipeline_and_reports_status(tmp_path):
+    for store in (MemoryJobStore(), SQLiteJobStore(tmp_path / "jobs.db")):
+        queue = JobQueue(runner=_fake_workflow, store=store, workers=1, queue_depth=4)
+        ok_upload, bad_upload = tmp_path / "ok.json", tmp_path / "bad.json"
+        ok_upload.write_text("[1, 2, 3]")
+        bad_upload.write_text("[]")
+
+        ok = _wait(queue, queue.submit("p1", "d1", ok_upload))
+        bad = _wait(queue, queue.submit("p2", "d1", bad_upload))
+        queue.shutdown(wait=True)
+
+        assert ok["stage"] == "saved" and ok["result"] == {"interpretation_id": "p1-3"}
+        assert bad["status"] == STATUS_FAILED and bad["error"] == "empty upload"
+        assert not ok_upload.exists() and not bad_upload.exists()
+
+
+def test_job_queue_rejects_when_full(tmp_path):
+    queue = JobQueue(runner=_fake_workflow, store=MemoryJobStore(), workers=1, queue_depth=0)
+    queue._outstanding = queue.capacity
+    with pytest.raises(JobQueueFullError):
+        queue.submit("p", "d", tmp_path / "x.json")
+    queue.shutdown()
+
+
+def test_finished_jobs_are_evicted_and_restart_fails_unfinished(tmp_path):
+    store = MemoryJobStore(ttl_seconds=3600, max_finished=2)
+    for i in range(3):
+        store.create({"job_id": f"j{i}", "status": "queued"})
+        store.update(f"j{i}", status=STATUS_SUCCEEDED, result={"big": "payload"})
+    assert store.get("j0") is None and store.get("j2")["result"] == {"big": "payload"}
+
+    SQLiteJobStore(tmp_path / "jobs.db").create({"job_id": "j", "status": "running"})
+    job = SQLiteJobStore(tmp_path / "jobs.db").get("j")
+    assert job["status"] == STATUS_FAILED and job["error"] == "interrupted by restart"
@@ -0,0 +1,34 @@
+import asyncio
+import httpx
+from openai import APIConnectionError
+from app.services.llm import client as llm_client
+
+
+class _FlakyCompletions:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise APIConnectionError(request=httpx.Request("POST", "http://llm.test"))
+        return {"model": kwargs["model"]}
+
+
+class _FakeClient:
+    def __init__(self, completions):
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+def test_create_chat_completion_retries_transient_errors(monkeypatch):
+    completions = _FlakyCompletions(failures=2)
+
+    async def run():
+        state = (_FakeClient(completions), asyncio.Semaphore(1))
+        monkeypatch.setattr(llm_client, "_loop_state", lambda: state)
+        monkeypatch.setattr(llm_client, "_backoff_delay", lambda attempt: 0)
+        return await llm_client.create_chat_completion(model="m")
+
+    assert asyncio.run(run()) == {"model": "m"}
+    assert completions.calls == 3
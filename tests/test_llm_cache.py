@@ -0,0 +1,34 @@
+import os
+import time
+from app.services.llm.cache import ResponseCache
+
+
+def test_response_cache_lru_and_disk_tiers(tmp_path):
+    cache = ResponseCache(max_entries=2, disk_dir=tmp_path, disk_max_bytes=10)
+    keys = [ResponseCache.make_key("m", 0.2, 500, f"prompt {i}") for i in range(3)]
+    assert len(set(keys)) == 3
+    assert cache.get(keys[0]) is None
+
+    for i, key in enumerate(keys):
+        cache.put(key, f"text{i}")  # 5 bytes each; disk budget keeps two
+
+    # keys[0] fell out of both the LRU and the disk budget
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == "text2"
+
+    # A fresh process only has the disk tier
+    cold = ResponseCache(max_entries=2, disk_dir=tmp_path, disk_max_bytes=10)
+    assert cold.get(keys[1]) == "text1"
+    assert cold.stats()["disk_hits"] == 1
+
+
+def test_response_cache_ttl(tmp_path):
+    cache = ResponseCache(ttl_seconds=60, disk_dir=tmp_path)
+    key = ResponseCache.make_key("m", 0.2, 500, "p")
+    cache.put(key, "text")
+    stale = time.time() - 120
+    os.utime(tmp_path / f"{key}.txt", (stale, stale))
+
+    cold = ResponseCache(ttl_seconds=60, disk_dir=tmp_path)
+    assert cold.get(key) is None
+    assert not (tmp_path / f"{key}.txt").exists()
@@ -0,0 +1,126 @@
+from pathlib import Path
+from app.services.cgm_processing.loader import load_cgm_file
+from app.models.cgm_series import CGMSeries, as_series
+
+
+def test_load_cgm_file_returns_sorted_series():
+    series = load_cgm_file(Path("tests/fixtures/dexcom_cgm_24h.json"))
+    assert isinstance(series, CGMSeries)
+    assert len(series) == 288
+    assert series.is_sorted
+    points = series.to_points()
+    assert as_series(points).timestamps.tolist() == series.timestamps.tolist()
+    assert points[0].timestamp.isoformat() == series.isoformat_many()[0]
+
+
+def test_streaming_loader_handles_dexcom_schema_and_limits(tmp_path, monkeypatch):
+    import json
+    import pytest
+    from app.config.loader import get_config
+    from app.services.cgm_processing.loader import CGMIngestLimitError
+
+    records = [
+        {"systemTime": f"2025-08-04T00:{m:02d}:00Z", "value": 100 + m}
+        for m in range(0, 60, 5)
+    ]
+    path = tmp_path / "dexcom.json"
+    path.write_text(json.dumps({"unit": "mg/dL", "meta": {"a": [1, 2.5]}, "records": records}))
+
+    monkeypatch.setattr(get_config(), "ingest_chunk_size", 7)
+    series = load_cgm_file(path)
+    assert series.glucose.tolist() == [r["value"] for r in records]
+
+    with pytest.raises(CGMIngestLimitError):
+        load_cgm_file(path, max_readings=5)
+    with pytest.raises(CGMIngestLimitError):
+        load_cgm_file(path, max_bytes=100)
+
+
+def test_loader_reads_file_objects_whole_or_streamed(monkeypatch):
+    import io
+    from app.config.loader import get_config
+
+    raw = Path("tests/fixtures/dexcom_cgm_24h.json").read_bytes()
+    whole = load_cgm_file(io.BytesIO(raw))
+
+    # Below the one-pass threshold the same bytes go through the streaming parser
+    monkeypatch.setattr(get_config(), "ingest_document_parse_max_bytes", 1024)
+    upload = io.BytesIO(b"ignored" + raw)
+    upload.seek(7)
+    streamed = load_cgm_file(upload)
+    assert not upload.closed
+    assert streamed.timestamps.tolist() == whole.timestamps.tolist()
+    assert streamed.glucose.tolist() == whole.glucose.tolist()
+    assert streamed.tz_offset == whole.tz_offset
+
+
+def test_gzipped_clarity_csv_is_detected_and_parsed_in_bulk(tmp_path):
+    import gzip
+
+    header = (
+        "Index,Timestamp (YYYY-MM-DDThh:mm:ss),Event Type,Event Subtype,Patient Info,Device Info,"
+        "Source Device ID,Glucose Value (mg/dL),Insulin Value (u),Carb Value (grams),Duration (hh:mm:ss),"
+        "Glucose Rate of Change (mg/dL/min),Transmitter Time (Long Integer),Transmitter ID"
+    )
+    rows = [
+        "1,,FirstName,,Jane,,,,,,,,,",
+        "2,2025-08-04T00:10:00,EGV,,,,Android G6,High,,,,,3,ABC",
+        "3,2025-08-04T00:00:00,EGV,,,,Android G6,118,,,,,1,ABC",
+        "4,2025-08-04T00:05:00,EGV,,,,Android G6,Low,,,,,2,ABC",
+        "5,2025-08-04T00:07:00,Carbs,,,,Android G6,,,30,,,,ABC",
+    ]
+    path = tmp_path / "clarity.csv.gz"
+    with gzip.open(path, "wt") as f:
+        f.write("\n".join([header] + rows) + "\n")
+
+    series = load_cgm_file(path)
+    assert series.glucose.tolist() == [118, 40, 400]
+    assert series.isoformat_many() == ["2025-08-04T00:00:00", "2025-08-04T00:05:00", "2025-08-04T00:10:00"]
+
+
+def test_libre_csv_uses_historic_readings_and_detects_day_first_dates(tmp_path):
+    lines = [
+        "Glucose Data,Generated on,14-08-2025 10:00 UTC,Generated by,Jane Doe",
+        "Device,Serial Number,Device Timestamp,Record Type,Historic Glucose mg/dL,Scan Glucose mg/dL",
+        "FreeStyle LibreLink,ABC,13-08-2025 23:45,0,101,",
+        "FreeStyle LibreLink,ABC,13-08-2025 23:50,1,,104",
+        "FreeStyle LibreLink,ABC,14-08-2025 00:00,0,99,",
+    ]
+    path = tmp_path / "libre.csv"
+    path.write_text("\r\n".join(lines) + "\r\n")
+
+    series = load_cgm_file(path)
+    assert series.glucose.tolist() == [101, 99]
+    assert series.isoformat_many() == ["2025-08-13T23:45:00", "2025-08-14T00:00:00"]
+
+
+def test_libre_dates_with_small_days_and_bom_prefixed_json(tmp_path):
+    import pytest
+
+    header = "Device,Serial Number,Device Timestamp,Record Type,Historic Glucose mg/dL,Scan Glucose mg/dL"
+    rows = [f"FreeStyle LibreLink,ABC,{day:02d}-08-2025 {hour:02d}:00,0,100," for day in range(1, 4) for hour in range(0, 24, 8)]
+    path = tmp_path / "libre.csv"
+    path.write_text("\n".join(["Glucose Data,Generated on,04-08-2025", header] + rows) + "\n")
+    assert load_cgm_file(path).isoformat_many()[:4] == [
+        "2025-08-01T00:00:00", "2025-08-01T08:00:00", "2025-08-01T16:00:00", "2025-08-02T00:00:00"
+    ]
+
+    path.write_text("\n".join(["Glucose Data,Generated on,04-08-2025", header, rows[0]]) + "\n")
+    with pytest.raises(ValueError, match="Ambiguous"):
+        load_cgm_file(path)
+
+    bom = tmp_path / "bom.json"
+    bom.write_bytes(b"\xef\xbb\xbf" + Path("tests/fixtures/dexcom_cgm_24h.json").read_bytes())
+    assert len(load_cgm_file(bom)) == 288
+
+
+def test_per_reading_offsets_survive_a_dst_switch():
+    import io
+    from app.utils.datetime_tools import hours_of_day
+
+    stamps = ["2025-03-09T01:30:00-05:00", "2025-03-09T03:30:00-04:00", "2025-03-09T04:30:00-04:00"]
+    payload = "[" + ",".join(f'{{"timestamp": "{t}", "glucose_mg_per_dl": 100}}' for t in stamps) + "]"
+    series = load_cgm_file(io.BytesIO(payload.encode()))
+    assert series.isoformat_many() == stamps
+    assert hours_of_day(series.local_seconds()).tolist() == [1, 3, 4]
+    assert [p.timestamp.isoformat() for p in series] == stamps
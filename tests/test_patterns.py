@@ -7,3 +7,35 @@ def test_pattern_detection_dawn():
     readings = [CGMPoint(timestamp=base + timedelta(minutes=i*5), glucose=70 + i) for i in range(72)]
     result = detect_all_patterns(readings)
     assert isinstance(result["dawn_phenomenon"], bool)
+
+
+def test_spike_window_follows_device_cadence_and_gaps():
+    base = datetime(2025, 8, 1, 8, 0)
+    # 15-minute device: +12 mg/dL per reading => +48 over one hour
+    libre = [CGMPoint(timestamp=base + timedelta(minutes=15 * i), glucose=100 + 12 * i) for i in range(8)]
+    spikes = detect_all_patterns(libre)["postprandial_spikes"]
+    assert spikes[0]["start"] == base.isoformat()
+    assert spikes[0]["end"] == (base + timedelta(hours=1)).isoformat()
+
+    # A 2-hour sensor gap must not be bridged by the 60-minute window
+    gapped = [CGMPoint(timestamp=base + timedelta(minutes=5 * i), glucose=100) for i in range(12)]
+    gapped += [CGMPoint(timestamp=base + timedelta(hours=3, minutes=5 * i), glucose=200) for i in range(12)]
+    assert detect_all_patterns(gapped)["postprandial_spikes"] == []
+
+
+def test_excursions_are_run_length_episodes():
+    base = datetime(2025, 8, 1, 12, 0)
+    values = [100, 65, 60, 62, 100, 100, 260, 300, 100] + [100] * 12 + [50]
+    readings = [CGMPoint(timestamp=base + timedelta(minutes=5 * i), glucose=g) for i, g in enumerate(values)]
+
+    result = detect_all_patterns(readings)
+    assert "hypoglycemia_events" not in result
+    assert result["hypoglycemia_event_count"] == 4
+    assert result["hypoglycemia_episodes"] == [
+        {"start": (base + timedelta(minutes=5)).isoformat(), "end": (base + timedelta(minutes=15)).isoformat(),
+         "min_glucose": 60.0, "duration_minutes": 15.0, "count": 3},
+        {"start": (base + timedelta(minutes=105)).isoformat(), "end": (base + timedelta(minutes=105)).isoformat(),
+         "min_glucose": 50.0, "duration_minutes": 5.0, "count": 1},
+    ]
+    assert [(e["max_glucose"], e["count"]) for e in result["hyperglycemia_episodes"]] == [(300.0, 2)]
+    assert len(detect_all_patterns(readings, include_events=True)["hypoglycemia_events"]) == 4
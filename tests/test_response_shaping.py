@@ -0,0 +1,62 @@
+import asyncio
+import gzip
+from pathlib import Path
+import pytest
+from app.api.middleware import CompressionMiddleware, choose_encoding
+from app.api.responses import select_fields
+from app.services.cgm_processing.loader import load_cgm_file
+from app.services.cgm_processing.summarizer import generate_summary, summary_view, event_page
+
+
+def test_views_trim_event_lists_and_pages_return_them():
+    summary = generate_summary(load_cgm_file(Path("tests/fixtures/dexcom_unhealthy_72h.json")), True)
+    spikes = summary["patterns"]["postprandial_spikes"]
+
+    trimmed = summary_view(summary, "summary")
+    assert "postprandial_spikes" not in trimmed["patterns"]
+    assert trimmed["event_counts"]["postprandial_spikes"] == len(spikes)
+    assert "postprandial_spikes" in summary["patterns"]  # original untouched
+    assert set(summary_view(summary, "metrics")) == {"metrics"}
+    with pytest.raises(ValueError):
+        summary_view(summary, "everything")
+
+    page = event_page(summary, "postprandial_spikes", offset=1, limit=2)
+    assert page["items"] == spikes[1:3] and page["total"] == len(spikes)
+
+    response = {"interpretation_id": "x", "summary": trimmed}
+    assert select_fields(response, "interpretation_id, summary.metrics.tir_percent, missing") == {
+        "interpretation_id": "x", "summary": {"metrics": {"tir_percent": summary["metrics"]["tir_percent"]}}
+    }
+
+
+async def _call(app, accept_encoding: bytes):
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding)]}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await CompressionMiddleware(app)(scope, None, send)
+    return sent
+
+
+def _app(body: bytes, content_type: bytes = b"application/json", more_body: bool = False):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+    return app
+
+
+def test_compression_negotiates_and_skips_small_and_streamed_bodies():
+    assert choose_encoding(b"gzip;q=0.5, identity") == "gzip"
+    assert choose_encoding(b"gzip;q=0") is None
+
+    body = b'{"values": [' + b"1," * 2000 + b"1]}"
+    start, message = asyncio.run(_call(_app(body), b"gzip"))
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert gzip.decompress(message["body"]) == body
+
+    for app in (_app(b"{}"), _app(body, b"text/event-stream"), _app(body, more_body=True)):
+        start, message = asyncio.run(_call(app, b"gzip"))[:2]
+        assert all(name != b"content-encoding" for name, _ in start["headers"])
+        assert message["body"] in (b"{}", body)
@@ -0,0 +1,40 @@
+import numpy as np
+from app.models.cgm_series import CGMSeries
+from app.services.cgm_processing.rolling import RollingSummary, RollingSummaryRegistry
+from app.services.cgm_processing.summarizer import generate_summary
+
+
+def _trace(days, seed=0):
+    rng = np.random.default_rng(seed)
+    n = days * 288
+    timestamps = 1754006400 + 300 * np.arange(n)
+    glucose = np.clip(120 + np.cumsum(rng.normal(0, 9, n)), 40, 400).round()
+    keep = rng.random(n) > 0.02  # sensor dropouts
+    return timestamps[keep], glucose[keep].astype(np.float32)
+
+
+def test_rolling_summary_matches_full_recompute_over_window():
+    timestamps, glucose = _trace(20)
+    state = RollingSummary(window_days=14)
+    for start in range(0, len(timestamps), 36):
+        # Each push overlaps the previous one by a few readings
+        lo = max(0, start - 3)
+        state.extend(CGMSeries(timestamps[lo:start + 36], glucose[lo:start + 36], tz_offset=-18000))
+
+    window = timestamps > timestamps[-1] - 14 * 86400
+    expected = generate_summary(CGMSeries(timestamps[window], glucose[window], tz_offset=-18000))
+    assert len(state) == int(window.sum())
+    assert state.summary() == expected
+
+
+def test_late_readings_rebuild_and_registry_evicts():
+    timestamps, glucose = _trace(3, seed=1)
+    state = RollingSummary(window_days=14)
+    state.extend(CGMSeries(timestamps[400:], glucose[400:], tz_offset=None))
+    assert state.extend(CGMSeries(timestamps[:410], glucose[:410], tz_offset=None)) == 400
+    assert state.summary() == generate_summary(CGMSeries(timestamps, glucose, tz_offset=None))
+
+    registry = RollingSummaryRegistry(window_days=14, max_patients=2)
+    for patient in ("a", "b", "c"):
+        registry.append(patient, CGMSeries(timestamps[:10], glucose[:10], tz_offset=None))
+    assert registry.get("a") is None and registry.get("c") is not None
@@ -0,0 +1,49 @@
+import numpy as np
+from app.models.cgm_series import CGMSeries
+from app.services.cgm_processing.rollups import (
+    RollupStore, build_daily_rollups, compare_periods, merge_rollups, rollup_metrics
+)
+from app.services.cgm_processing.summarizer import generate_summary
+
+
+def _trace(days, seed=0):
+    rng = np.random.default_rng(seed)
+    n = days * 288
+    timestamps = 1754006400 + 300 * np.arange(n)
+    glucose = np.clip(120 + np.cumsum(rng.normal(0, 9, n)), 40, 400).round()
+    keep = rng.random(n) > 0.03
+    keep[2000:2300] = False  # a day-spanning sensor gap
+    return CGMSeries(timestamps[keep], glucose[keep].astype(np.float32), tz_offset=-18000)
+
+
+def test_merged_day_rollups_match_full_recompute():
+    series = _trace(21)
+    rollups = build_daily_rollups(series)
+    days = sorted(rollups)[4:13]
+
+    merged = rollup_metrics(merge_rollups({day: rollups[day] for day in days}))
+    local_days = series.local_seconds().astype("datetime64[s]").astype("datetime64[D]").astype(str)
+    mask = (local_days >= days[0]) & (local_days <= days[-1])
+    expected = generate_summary(CGMSeries(series.timestamps[mask], series.glucose[mask], tz_offset=-18000))
+
+    assert {k: merged[k] for k in expected["metrics"]} == expected["metrics"]
+    assert merged["hypoglycemia_episode_count"] == len(expected["patterns"]["hypoglycemia_episodes"])
+    assert merged["hyperglycemia_episode_count"] == len(expected["patterns"]["hyperglycemia_episodes"])
+
+
+def test_store_keeps_most_complete_day_and_compares_periods(tmp_path):
+    series = _trace(21, seed=1)
+    store = RollupStore(tmp_path / "rollups.db")
+    store.upsert("p1", build_daily_rollups(series))
+    store.upsert("p1", build_daily_rollups(CGMSeries(series.timestamps[:50], series.glucose[:50], tz_offset=-18000)))
+
+    full = build_daily_rollups(series)
+    assert store.range("p1") == full
+
+    comparison = compare_periods(store, "p1", days=7)
+    current, previous = comparison["current"], comparison["previous"]
+    assert (current["start"], current["end"]) == ("2025-08-15", "2025-08-21")
+    assert previous["end"] == "2025-08-14"
+    assert comparison["delta"]["tir_percent"] == round(
+        current["metrics"]["tir_percent"] - previous["metrics"]["tir_percent"], 2
+    )
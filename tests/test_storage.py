@@ -0,0 +1,94 @@
+import json
+import pytest
+from app.services.workflow.storage import (
+    FileInterpretationStore, SQLiteInterpretationStore, migrate_interpretations
+)
+
+
+def _record(i, patient_id="p1", provider_id="d1"):
+    return {
+        "interpretation_id": f"id-{i}",
+        "timestamp": f"2025-08-0{i}T10:00:00",
+        "patient_id": patient_id,
+        "provider_id": provider_id,
+        "editable": True,
+        "finalized": False,
+        "summary": {"metrics": {"tir_percent": 70.0 + i}},
+        "interpretation_text": f"text {i}"
+    }
+
+
+def test_sqlite_store_indexes_updates_and_locks_finalized(tmp_path):
+    store = SQLiteInterpretationStore(tmp_path / "interp.db")
+    for i, patient in ((1, "p1"), (2, "p2"), (3, "p1")):
+        store.save(_record(i, patient_id=patient))
+
+    assert [r["interpretation_id"] for r in store.list(patient_id="p1")] == ["id-3", "id-1"]
+    assert store.list(patient_id="p1", since="2025-08-02") == [store.list(patient_id="p1")[0]]
+
+    edited = store.update("id-1", {"interpretation_text": "edited"}, require_editable=True)
+    assert edited["interpretation_text"] == "edited" and edited["summary"]["metrics"]["tir_percent"] == 71.0
+
+    store.update("id-1", {"finalized": True, "editable": False})
+    assert [r["interpretation_id"] for r in store.list(finalized=True)] == ["id-1"]
+    with pytest.raises(ValueError):
+        store.update("id-1", {"interpretation_text": "late"}, require_editable=True)
+    with pytest.raises(FileNotFoundError):
+        store.load("missing")
+
+
+def test_migrate_legacy_files_is_idempotent(tmp_path):
+    legacy_dir = tmp_path / "interpretations"
+    legacy_dir.mkdir()
+    for i in (1, 2):
+        (legacy_dir / f"id-{i}.json").write_text(json.dumps(_record(i)))
+
+    dest = SQLiteInterpretationStore(tmp_path / "interp.db")
+    assert migrate_interpretations(FileInterpretationStore(legacy_dir), dest) == 2
+    assert migrate_interpretations(FileInterpretationStore(legacy_dir), dest) == 0
+    assert dest.load("id-2") == _record(2)
+
+
+
+def test_new_sqlite_store_imports_legacy_files(tmp_path, monkeypatch):
+    from app.config.loader import get_config
+    from app.services.workflow import storage
+
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    (legacy / "id-1.json").write_text(json.dumps(_record(1)))
+    monkeypatch.setattr(get_config(), "output_dir", legacy)
+    monkeypatch.setattr(get_config(), "storage_sqlite_path", tmp_path / "interp.db")
+    monkeypatch.setattr(get_config(), "storage_backend", "sqlite")
+    monkeypatch.setattr(storage, "_store", None)
+
+    assert storage.get_interpretation_store().load("id-1")["interpretation_text"] == "text 1"
+    storage._store.update("id-1", {"interpretation_text": "edited"})
+
+    monkeypatch.setattr(storage, "_store", None)
+    assert storage.get_interpretation_store().load("id-1")["interpretation_text"] == "edited"
+
+
+def test_editor_cache_writes_through_without_rereading(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.workflow import editor, storage
+
+    store = SQLiteInterpretationStore(tmp_path / "interp.db")
+    monkeypatch.setattr(storage, "_store", store)
+    interpretation_id = editor.save_interpretation("p1", {"metrics": {"tir_percent": 70.0}}, "draft", "d1")
+
+    def no_reads(*args):
+        raise AssertionError("cached record was read back from the store")
+    monkeypatch.setattr(store, "load", no_reads)
+    monkeypatch.setattr(store, "update", no_reads)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: editor.update_interpretation(interpretation_id, f"edit {i}", f"d{i}"), range(32)))
+    final = editor.finalize_interpretation(interpretation_id)
+    assert final["finalized"] and final["summary"] == {"metrics": {"tir_percent": 70.0}}
+    assert not editor._record_locks
+    with pytest.raises(ValueError):
+        editor.update_interpretation(interpretation_id, "late", "d1")
+
+    monkeypatch.undo()
+    assert SQLiteInterpretationStore(tmp_path / "interp.db").load(interpretation_id) == final
@@ -0,0 +1,24 @@
+from pathlib import Path
+from app.services.cgm_processing.loader import load_cgm_file
+from app.services.cgm_processing.metrics import compute_cgm_metrics
+from app.services.cgm_processing.patterns import detect_all_patterns
+from app.services.cgm_processing.recommender import generate_recommendations
+from app.services.cgm_processing.summarizer import generate_summary
+
+
+def test_fused_summary_matches_standalone_kernels():
+    series = load_cgm_file(Path("tests/fixtures/dexcom_unhealthy_72h.json"))
+    summary = generate_summary(series)
+    assert summary["metrics"] == compute_cgm_metrics(series)
+    assert summary["patterns"] == detect_all_patterns(series.to_points())
+    assert "agp" not in summary
+    assert generate_summary(series, include_agp=True)["agp"]["bin_minutes"] == 60
+
+
+def test_insufficient_data_qualifies_recommendations():
+    # 72 hours is well short of the 14 days needed for a reliable summary
+    summary = generate_summary(load_cgm_file(Path("tests/fixtures/dexcom_unhealthy_72h.json")))
+    assert summary["recommendation_context"]["insufficient_data"]
+    recs = generate_recommendations(summary["recommendation_context"])
+    assert recs[0].startswith("Less than 14 days")
+    assert generate_recommendations({"insufficient_data": True}) == recs[:1]
@@ -0,0 +1,28 @@
+import numpy as np
+from app.services.cgm_processing.loader import load_cgm_file
+from app.services.cgm_processing.synthetic import generate_trace, write_trace
+from benchmarks.run import compare
+
+
+def test_generator_is_deterministic_and_round_trips_through_loader(tmp_path):
+    series = generate_trace(days=3, seed=7, gaps_per_day=1.0)
+    again = generate_trace(days=3, seed=7, gaps_per_day=1.0)
+    assert np.array_equal(series.timestamps, again.timestamps)
+    assert np.array_equal(series.glucose, again.glucose)
+    assert len(series) < 3 * 288  # gaps removed readings
+    assert series.glucose.min() >= 40 and series.glucose.max() <= 400
+
+    for fmt in ("mock", "dexcom"):
+        loaded = load_cgm_file(write_trace(series, tmp_path / f"{fmt}.json", fmt))
+        assert np.array_equal(loaded.timestamps, series.timestamps)
+        assert np.array_equal(loaded.glucose, series.glucose)
+
+
+def test_benchmark_gate_flags_only_material_slowdowns():
+    baseline = {"a": {"median_ms": 10.0}, "b": {"median_ms": 0.1}, "c": {"median_ms": 10.0}}
+    results = {"a": {"median_ms": 14.0}, "b": {"median_ms": 0.3}, "c": {"median_ms": 11.0}, "new": {"median_ms": 1.0}}
+    rows = {row["benchmark"]: row for row in compare(results, baseline, max_regression=0.25)}
+    assert rows["a"]["regressed"]
+    assert not rows["b"]["regressed"]  # 3x, but under the noise floor
+    assert not rows["c"]["regressed"]
+    assert "new" not in rows
@@ -0,0 +1,42 @@
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.middleware import TelemetryMiddleware
+from app.config.loader import get_config
+from app.main import app
+from app.utils.telemetry import Histogram, stage_timer
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, stage="parse")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="parse"} 4' in lines
+
+
+def test_metrics_endpoint_and_opt_in_slow_request_log(monkeypatch, caplog):
+    monkeypatch.setattr(get_config(), "telemetry_slow_request_ms", 0)
+
+    # A throwaway app, so the probe route does not outlive this test
+    probe_app = FastAPI()
+    probe_app.add_middleware(TelemetryMiddleware)
+
+    @probe_app.get("/_telemetry_probe")
+    async def probe():
+        with stage_timer("probe"):
+            return {"ok": True}
+
+    with caplog.at_level(logging.WARNING, logger="app.api.middleware"):
+        assert TestClient(probe_app).get("/_telemetry_probe").status_code == 200
+    assert any("probe=" in record.getMessage() for record in caplog.records)
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'cgm_http_requests_total{method="GET",route="/_telemetry_probe",status="200"} 1' in response.text
+    assert 'cgm_stage_seconds_count{stage="probe"} 1' in response.text
@@ -0,0 +1,35 @@
+import numpy as np
+from app.models.cgm_series import CGMSeries
+from app.services.cgm_processing.summarizer import generate_summary
+from app.services.cgm_processing.variability import compute_variability_metrics
+
+
+def _sine_trace(days: int, phase: float = 0.0) -> CGMSeries:
+    # 150 ± 60 mg/dL with a 6-hour period: peak-to-nadir swings of ~120 mg/dL
+    n = 288 * days
+    minutes = 5 * np.arange(n)
+    glucose = 150 + 60 * np.sin(2 * np.pi * minutes / 360 + phase)
+    return CGMSeries(1754006400 + 60 * minutes, glucose.astype(np.float32))
+
+
+def test_mage_and_lagged_metrics_on_periodic_trace():
+    for phase in (0.0, 1.0, 2.0, 3.0):
+        variability = compute_variability_metrics(_sine_trace(3, phase))
+        assert 100 <= variability["mage"] <= 120
+    # A 6-hour period repeats every day, so day-over-day differences vanish
+    assert variability["modd"] == 0.0
+    assert variability["conga_1"] > 0
+    assert variability["lbgi"] < variability["hbgi"]
+
+
+def test_extended_metrics_are_opt_in_and_feed_risk_flags():
+    steady = CGMSeries(1754006400 + 300 * np.arange(288 * 3), np.full(288 * 3, 110, dtype=np.float32))
+    assert "variability" not in generate_summary(steady)
+
+    summary = generate_summary(steady, extended_metrics=True)
+    assert summary["variability"]["gri"] == 0.0 and summary["variability"]["gri_zone"] == "A"
+    assert not summary["recommendation_context"]["hypo_risk"]
+
+    low = CGMSeries(steady.timestamps, np.full(288 * 3, 50, dtype=np.float32))
+    context = generate_summary(low, extended_metrics=True)["recommendation_context"]
+    assert context["hypo_risk"] and context["high_gri"]